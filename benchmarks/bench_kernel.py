@@ -0,0 +1,71 @@
+"""Micro-benchmark: fused HERKernel vs. the previous per-term closures,
+and batched evaluation of many parameter sets vs. a Python loop.
+
+Run from the project root:  python -m benchmarks.bench_kernel [n_points]
+"""
+import sys
+import timeit
+import numpy as np
+
+from webapp.models.kernels import HERKernel, F, PARAM_ORDER, evaluate_batch
+
+F1 = 38.92
+SIMPLIFIED = dict(k1=3e-8, k1r=2e-6, k2=5e-9, k2r=1e-10, bbv=0.4, bbh=0.6)
+FULL = dict(k1=1e-6, k1r=1e-5, k2=1e-7, k3=1e-6, bbv=0.5, bbh=0.5)
+
+
+def legacy_simplified(x, k1, k1r, k2, k2r, bbv, bbh):
+    vtotal = 2 * (((k1 * k2 * (1 - np.e ** (2 * F1 * x))) * np.e ** (-bbh * x * F1)) /
+                  (k1 * np.e ** ((bbh - bbv) * F1 * x) + k2 + np.e ** (F1 * x) *
+                   (k1r * np.e ** ((bbh - bbv) * F1 * x) + k2r)))
+    return -F * vtotal
+
+
+def legacy_full(x, k1, k1r, k2, k3, bbv, bbh):
+    k2r = (k1 * k2) / k1r
+    k3r = (k3 * k1 ** 2) / (k1r ** 2)
+    A1 = -2 * k3 + 2 * k3r
+    B1 = (-np.e ** ((-bbv) * F1 * x)) * k1 - np.e ** ((1 - bbv) * F1 * x) * k1r - k2 / np.e ** (bbh * F1 * x) - np.e ** ((1 - bbh) * F1 * x) * k2r - 4 * k3r
+    C1 = k1 / np.e ** (bbv * F1 * x) + np.e ** ((1 - bbh) * F1 * x) * k2r + 2 * k3r
+    disc = B1 ** 2 - (4 * A1 * C1)
+    disc = np.where(disc < 0, 0.0, disc)
+    theta = (-B1 - np.sqrt(disc)) / (2 * A1)
+    term1 = (k1 * (1 - theta)) / np.e ** (bbv * F1 * x)
+    term2 = np.e ** ((1 - bbh) * F1 * x) * k2r * (1 - theta)
+    term3 = np.e ** ((1 - bbv) * F1 * x) * k1r * theta
+    term4 = (k2 * theta) / np.e ** (bbh * F1 * x)
+    return -F * (term1 + term2 + term3 - term4)
+
+
+def _best(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main(n=100_000):
+    x = np.linspace(-0.6, 0.0, n)
+    kernel = HERKernel(x, F1)
+    number = max(1, 2_000_000 // n)
+    print(f'n_points={n}')
+    for name, legacy, fused, p in (
+        ('simplified', legacy_simplified, kernel.simplified_current, SIMPLIFIED),
+        ('full', legacy_full, kernel.full_current, FULL),
+    ):
+        t_old = _best(lambda: legacy(x, **p), number)
+        t_new = _best(lambda: fused(**p), number)
+        print(f'{name:10s} legacy {t_old * 1e3:8.3f} ms  kernel {t_new * 1e3:8.3f} ms  speedup {t_old / t_new:5.2f}x')
+
+    # a DE population / parameter sweep: M parameter sets on a short grid
+    m, xs = 1000, np.linspace(-0.6, 0.0, 500)
+    small = HERKernel(xs, F1)
+    rng = np.random.default_rng(0)
+    print(f'batch M={m} n_points={xs.size}')
+    for name, p in (('simplified', SIMPLIFIED), ('full', FULL)):
+        base = np.array([p[k] for k in PARAM_ORDER[name]])
+        P = base * rng.uniform(0.5, 2.0, (m, base.size))
+        t_old = _best(lambda: [small.evaluate(name, dict(zip(PARAM_ORDER[name], row))) for row in P], 1)
+        t_new = _best(lambda: evaluate_batch(P, xs, name, F1), 1)
+        print(f'{name:10s} loop   {t_old * 1e3:8.3f} ms  batch  {t_new * 1e3:8.3f} ms  speedup {t_old / t_new:5.2f}x')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
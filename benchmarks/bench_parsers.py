@@ -0,0 +1,71 @@
+"""Benchmark: shared C-engine parser vs. the previous python-engine path.
+
+Writes synthetic potentiostat exports (BOM + header line, tab separated,
+three columns) of 10^5 and 10^6 rows to a temp dir and times both parsers,
+then compares peak traced memory of the old path and the chunked reader.
+
+Run from the project root:  python -m benchmarks.bench_parsers [n_rows ...]
+"""
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from webapp.utils.parsers import load_columns, load_columns_chunked
+
+
+def legacy_load(path, current_col=0, potential_col=1):
+    # the former hydrogen_fitting._load_data body
+    df = pd.read_csv(path, sep=None, engine='python', comment='#', header=None)
+    df2 = df.iloc[:, [current_col, potential_col]].apply(pd.to_numeric, errors='coerce')
+    return df2.dropna(how='any').values
+
+
+def write_export(path, n):
+    rng = np.random.default_rng(0)
+    potential = np.linspace(-1.0, 0.0, n)
+    current = -1e-4 * np.exp(-10 * potential) * (1 + 0.01 * rng.standard_normal(n))
+    time_s = np.arange(n) * 0.01
+    with open(path, 'w', encoding='utf-8-sig') as f:
+        f.write('WE(1).Current (A)\tWE(1).Potential (V)\tTime (s)\n')
+        np.savetxt(f, np.column_stack([current, potential, time_s]), delimiter='\t', fmt='%.10g')
+
+
+def _best(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), out
+
+
+def _peak_mb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def main(sizes=(100_000, 1_000_000)):
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            path = os.path.join(tmp, f'export_{n}.txt')
+            write_export(path, n)
+            mb = os.path.getsize(path) / 2 ** 20
+            t_old, old = _best(lambda: legacy_load(path), repeat=1 if n >= 1_000_000 else 3)
+            t_new, new = _best(lambda: load_columns(path))
+            assert np.array_equal(old, new)
+            print(f'rows={n:>9d} ({mb:6.1f} MB)  python engine {t_old:7.3f} s  '
+                  f'C engine {t_new:7.3f} s  speedup {t_old / t_new:5.1f}x')
+            print(f'{"":>29s}peak memory: python engine {_peak_mb(lambda: legacy_load(path)):7.1f} MB  '
+                  f'chunked {_peak_mb(lambda: load_columns_chunked(path)):7.1f} MB')
+
+
+if __name__ == '__main__':
+    main(tuple(int(a) for a in sys.argv[1:]) or (100_000, 1_000_000))
@@ -0,0 +1,85 @@
+"""Benchmark: PNG renders per second, pyplot per call vs. the rendering engine.
+
+Fits a synthetic 2000-point polarisation curve once, then renders its fit,
+theta and Tafel panels repeatedly:
+
+- pyplot: a new figure per plot with tight_layout (the former code path);
+- engine, no cache: reused figure templates, data swapped per render;
+- engine, cached: the same result again (render cache hits);
+- panels: the three panels of a new result per round, serial vs. threads.
+
+Run from the project root:  python -m benchmarks.bench_render [rounds]
+"""
+import io
+import sys
+import time
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from webapp.models.hydrogen import hydrogen_fitting
+from webapp.services import fitting_service, rendering
+from webapp.services.rendering import RenderCache, PLOTS
+
+
+def pyplot_png(kind, series):
+    # the former fit_png / theta_png / tafel_png body
+    spec = PLOTS[kind]
+    fig, ax = plt.subplots(figsize=(6, 4))
+    for (x, y), (style, label) in zip(series, spec['lines']):
+        ax.plot(x, y, style, label=label)
+    ax.set_xlabel(spec['xlabel'])
+    ax.set_ylabel(spec['ylabel'])
+    if spec['title']:
+        ax.set_title(spec['title'])
+    ax.legend()
+    ax.grid(True)
+    buf = io.BytesIO()
+    fig.tight_layout()
+    fig.savefig(buf, format='png')
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def make_fitter(n=2000):
+    rng = np.random.default_rng(0)
+    potential = np.linspace(-0.5, 0.0, n)
+    current = -1e-3 * np.exp(-12 * potential) * (1 + 0.01 * rng.standard_normal(n))
+    fitter = hydrogen_fitting.from_arrays(potential, current)
+    fitter.fit_data(model_type='simplified', fitting_method='least_squares')
+    return fitter
+
+
+def _rate(fn, rounds):
+    fn(0)  # warm up fonts and templates
+    t0 = time.perf_counter()
+    for i in range(rounds):
+        fn(i + 1)
+    return rounds / (time.perf_counter() - t0)
+
+
+def main(rounds=20):
+    fitter = make_fitter()
+    panels = {'fit': fitting_service._fit_series(fitter), 'theta': fitting_service._theta_series(fitter),
+              'tafel': fitting_service._tafel_series(fitter)}
+
+    def varied(i):
+        # a slightly different result per round, so nothing is served from the cache
+        return {k: [(x, np.asarray(y) * (1 + 1e-9 * i)) for x, y in s] for k, s in panels.items()}
+
+    old = _rate(lambda i: [pyplot_png(k, s) for k, s in varied(i).items()], rounds) * 3
+    new = _rate(lambda i: [rendering.render(k, s, cache=RenderCache(0)) for k, s in varied(i).items()], rounds) * 3
+    cache = RenderCache()
+    hot = _rate(lambda i: [rendering.render(k, s, cache=cache) for k, s in panels.items()], rounds) * 3
+    print(f'pyplot per call      {old:7.1f} PNG/s')
+    print(f'engine, no cache     {new:7.1f} PNG/s  ({new / old:4.1f}x)')
+    print(f'engine, cached       {hot:7.1f} PNG/s  ({hot / old:6.1f}x)')
+    for workers in (0, 3):
+        rate = _rate(lambda i: (rendering.RENDER_CACHE.clear(), rendering.render_panels(
+            {k: (k, s) for k, s in varied(i).items()}, workers=workers)), rounds) * 3
+        print(f'panels, {"serial" if workers == 0 else f"{workers} threads":<12s} {rate:7.1f} PNG/s')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
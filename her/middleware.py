@@ -0,0 +1,49 @@
+"""Response compression negotiated from Accept-Encoding.
+
+Brotli when the client accepts `br` and the optional `brotli` package is
+installed, gzip otherwise (Django's GZipMiddleware). Streaming responses
+are passed through untouched: server-sent fit progress and NDJSON batch
+rows must reach the client as they are produced, and ZIP downloads are
+already compressed (as are PNGs, which are skipped too).
+"""
+import re
+
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# below this the encoding overhead outweighs the savings
+MIN_SIZE = 200
+# already compressed formats
+SKIP_TYPES = ('application/zip', 'image/png')
+
+
+def _accepts(request, coding):
+    accept = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    return any(part.split(';')[0].strip() == coding for part in accept.split(','))
+
+
+class CompressionMiddleware(GZipMiddleware):
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding') or len(response.content) < MIN_SIZE:
+            return response
+        if response.get('Content-Type', '').split(';')[0] in SKIP_TYPES:
+            return response
+        if brotli is not None and _accepts(request, 'br'):
+            patch_vary_headers(response, ('Accept-Encoding',))
+            compressed = brotli.compress(response.content, quality=5)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            if response.has_header('ETag'):
+                # a compressed body is a different representation (as GZipMiddleware does)
+                response['ETag'] = re.sub(r'"$', ';br"', response['ETag'])
+            response['Content-Length'] = str(len(compressed))
+            response['Content-Encoding'] = 'br'
+            return response
+        return super().process_response(request, response)
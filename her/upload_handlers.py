@@ -0,0 +1,109 @@
+"""Upload handler that parses data files while they are being received.
+
+`datafile` uploads are spooled to a temporary file as usual, and every
+chunk is also fed to a `StreamingColumnParser` running on a background
+thread. By the time the request body has been read, the numeric columns
+are parsed, and the uploaded file carries them as `parsed_columns` (and
+its sha256 as `content_digest`) for `build_fitter_from_request`. Other
+file fields use Django's default handlers.
+
+Column and delimiter choices may be passed in the query string
+(`?current_col=1&potential_col=2&delimiter=auto`, 1-based like the form)
+so that only those two columns are kept; otherwise every column is kept
+and the pair is picked once the form fields are known.
+
+Django only calls `upload_interrupted` for some failures; a client that
+disconnects or a multipart error mid-stream ends the request without it.
+The parser is therefore also aborted when the request finishes and when
+the handler is garbage collected, so its thread and queued chunks never
+outlive the request.
+"""
+import hashlib
+import weakref
+import threading
+
+from django.core.files.uploadhandler import TemporaryFileUploadHandler, StopFutureHandlers
+from django.core.signals import request_finished
+
+from webapp.utils.parsers import StreamingColumnParser
+
+
+class StreamingParseUploadHandler(TemporaryFileUploadHandler):
+    field_names = ('datafile',)
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.parser = None
+
+    def _query(self, key):
+        try:
+            return self.request.GET.get(key) if self.request is not None else None
+        except Exception:
+            return None
+
+    def _requested_columns(self):
+        try:
+            return int(self._query('current_col')) - 1, int(self._query('potential_col')) - 1
+        except (TypeError, ValueError):
+            return None
+
+    def new_file(self, field_name, *args, **kwargs):
+        self._abort()
+        if field_name not in self.field_names:
+            return
+        super().new_file(field_name, *args, **kwargs)
+        self.digest = hashlib.sha256()
+        parser = StreamingColumnParser(delimiter=self._query('delimiter') or 'auto',
+                                       columns=self._requested_columns())
+        self.parser = parser
+        # teardown paths that skip upload_interrupted; abort() is a no-op once the parse is closed
+        weakref.finalize(self, parser.abort)
+        request_finished.connect(_abort_on_finish(parser), weak=False, dispatch_uid=('theher-parse', id(parser)))
+        raise StopFutureHandlers()
+
+    def _abort(self):
+        if self.parser is not None:
+            self.parser.abort()
+            self.parser = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.parser is None:
+            return raw_data
+        self.file.write(raw_data)
+        self.digest.update(raw_data)
+        self.parser.feed(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.parser is None:
+            return None
+        parser, self.parser = self.parser, None
+        uploaded = super().file_complete(file_size)
+        uploaded.content_digest = self.digest.hexdigest()
+        try:
+            uploaded.parsed_columns = parser.close()
+        except Exception:
+            # leave it to the regular parser, which reports the error with the form's settings
+            uploaded.parsed_columns = None
+        return uploaded
+
+    def upload_interrupted(self):
+        self._abort()
+        super().upload_interrupted()
+
+
+def _abort_on_finish(parser):
+    """A one-shot request_finished receiver aborting `parser` (harmless after a complete parse).
+
+    Other requests finish on other threads; only the end of the request
+    served by this thread (the one that received the upload) counts.
+    """
+    uid = ('theher-parse', id(parser))
+    thread = threading.get_ident()
+
+    def receiver(sender, **kwargs):
+        if threading.get_ident() != thread:
+            return
+        parser.abort()
+        request_finished.disconnect(dispatch_uid=uid)
+    return receiver
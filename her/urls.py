@@ -6,11 +6,26 @@ app_name = 'her'
 urlpatterns = [
     path('', views.index, name='index'),
     path('fit', views.fit, name='fit'),
+    path('api/fit', views.fit_arrays, name='fit_arrays'),
+    path('analyze', views.analyze, name='analyze'),
+    path('fit_stream', views.fit_stream, name='fit_stream'),
+    path('fit_stream/<str:stream_id>/stop', views.fit_stream_stop, name='fit_stream_stop'),
     path('plot', views.plot, name='plot'),
     path('plot_theta', views.plot_theta, name='plot_theta'),
     path('plot_tafel', views.plot_tafel, name='plot_tafel'),
     path('export_plots_zip', views.export_plots_zip, name='export_plots_zip'),
     path('fit_summary', views.fit_summary, name='fit_summary'),
+    path('evaluate', views.evaluate, name='evaluate'),
+    path('api/calculate', views.evaluate, name='api_calculate'),
+    path('jobs', views.job_submit, name='job_submit'),
+    path('jobs/<str:job_id>', views.job_status, name='job_status'),
+    path('jobs/<str:job_id>/result', views.job_result, name='job_result'),
+    path('jobs/<str:job_id>/cancel', views.job_cancel, name='job_cancel'),
+    path('fit_segments', views.fit_segments, name='fit_segments'),
+    path('batch', views.batch, name='batch'),
+    path('batch/<str:batch_id>/table', views.batch_table, name='batch_table'),
+    path('batch/<str:batch_id>/download', views.batch_download, name='batch_download'),
+    path('cache_stats', views.cache_stats, name='cache_stats'),
     path('docs', views.docs, name='docs'),
     path('about', views.about, name='about'),
 ]
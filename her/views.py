@@ -1,11 +1,18 @@
 import io
+import json
 from django.shortcuts import render
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 
 # Reuse existing service layer from the Flask migration to avoid duplicating logic
 from webapp.services.fitting_service import run_fit, render_plot, render_theta_plot, render_tafel_plot, build_fitter_from_request
-from webapp.services.fitting_service import render_theta_data, render_tafel_data, render_plot_data, render_plots_zip
+from webapp.services.fitting_service import cache_stats as fit_cache_stats, evaluate_params, stream_fit, stop_stream
+from webapp.services.fitting_service import array_form, analyze as analyze_fit, render_data
+from webapp.services.jobs import JOBS, QueueFull, submit_fit, job_result as fit_job_result
+from webapp.services.batch import batch_table as batch_rows, stream_batch, batch_table_csv, batch_zip
+from webapp.services.cycles import fit_segments as fit_cycle_segments
+from webapp.services.export import export_request
+from webapp.utils.payloads import BINARY_CONTENT_TYPE
 
 
 def index(request):
@@ -22,13 +29,69 @@ def fit(request):
     return JsonResponse(result, status=status)
 
 
+@csrf_exempt
+def fit_arrays(request):
+    # /fit for in-memory data: JSON {potential, current, ...} or a .npy/.npz/raw float body
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST required'}, status=405)
+    try:
+        form = array_form(request.body, request.content_type, request.GET.dict())
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    result = run_fit(form, None)
+    status = 200 if result.get('success') else 400
+    return JsonResponse(result, status=status)
+
+
+@csrf_exempt
+def analyze(request):
+    # fit, theta, Tafel and fitted curves from one parse and one fit (images=1 adds base64 PNGs)
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST required'}, status=405)
+    result = analyze_fit(request.POST, request.FILES, accept=request.headers.get('Accept', ''))
+    if isinstance(result, bytes):
+        return HttpResponse(result, content_type=BINARY_CONTENT_TYPE)
+    status = 200 if result.get('success') else 400
+    return JsonResponse(result, status=status)
+
+
+@csrf_exempt
+def fit_stream(request):
+    # same form as /fit; progress arrives as server-sent events while the optimizer runs
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST required'}, status=405)
+    resp = StreamingHttpResponse(stream_fit(request.POST, request.FILES), content_type='text/event-stream')
+    resp['Cache-Control'] = 'no-cache'
+    resp['X-Accel-Buffering'] = 'no'
+    return resp
+
+
+@csrf_exempt
+def fit_stream_stop(request, stream_id):
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST required'}, status=405)
+    if not stop_stream(stream_id):
+        return JsonResponse({'success': False, 'error': 'Unknown or finished stream'}, status=404)
+    return JsonResponse({'success': True})
+
+
+def _plot_data_response(request, kind):
+    # as=json / as=data: arrays only (encoding=list|base64|binary, dtype=float64|float32); the browser draws
+    try:
+        body, content_type = render_data(request.POST, request.FILES, kind, request.headers.get('Accept', ''))
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    if isinstance(body, bytes):
+        return HttpResponse(body, content_type=content_type)
+    return JsonResponse(body)
+
+
 @csrf_exempt
 def plot(request):
     if request.method != 'POST':
         return JsonResponse({'success': False, 'error': 'POST required'}, status=405)
-    if request.POST.get('as') == 'json':
-        data = render_plot_data(request.POST, request.FILES)
-        return JsonResponse(data)
+    if request.POST.get('as') in ('json', 'data'):
+        return _plot_data_response(request, 'fit')
     img = render_plot(request.POST, request.FILES)
     return HttpResponse(img, content_type='image/png')
 
@@ -38,9 +101,8 @@ def plot_theta(request):
     if request.method != 'POST':
         return JsonResponse({'success': False, 'error': 'POST required'}, status=405)
     # support JSON data export when requested via 'as' parameter
-    if request.POST.get('as') == 'json':
-        data = render_theta_data(request.POST, request.FILES)
-        return JsonResponse(data)
+    if request.POST.get('as') in ('json', 'data'):
+        return _plot_data_response(request, 'theta')
     img = render_theta_plot(request.POST, request.FILES)
     return HttpResponse(img, content_type='image/png')
 
@@ -49,24 +111,126 @@ def plot_theta(request):
 def plot_tafel(request):
     if request.method != 'POST':
         return JsonResponse({'success': False, 'error': 'POST required'}, status=405)
-    if request.POST.get('as') == 'json':
-        data = render_tafel_data(request.POST, request.FILES)
-        return JsonResponse(data)
+    if request.POST.get('as') in ('json', 'data'):
+        return _plot_data_response(request, 'tafel')
     img = render_tafel_plot(request.POST, request.FILES)
     return HttpResponse(img, content_type='image/png')
 
 
 @csrf_exempt
 def export_plots_zip(request):
+    # one fit (or session_id), streamed as it is zipped; formats=csv,npz,parquet,png,svg
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST required'}, status=405)
+    try:
+        filename, chunks = export_request(request.POST, request.FILES)
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    resp = StreamingHttpResponse(chunks, content_type='application/zip')
+    resp['Content-Disposition'] = f'attachment; filename={filename}'
+    return resp
+
+
+@csrf_exempt
+def evaluate(request):
+    # optimizer-free model evaluation for the parameter sliders (JSON body or form)
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST required'}, status=405)
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Invalid JSON body'}, status=400)
+    else:
+        data = request.POST.dict()
+    result = evaluate_params(data)
+    status = 200 if result.get('success') else 400
+    return JsonResponse(result, status=status)
+
+
+@csrf_exempt
+def job_submit(request):
+    # queue a fit (same form as /fit) and return its job id straight away
     if request.method != 'POST':
         return JsonResponse({'success': False, 'error': 'POST required'}, status=405)
     try:
-        bz = render_plots_zip(request.POST, request.FILES)
-        resp = HttpResponse(bz, content_type='application/zip')
-        resp['Content-Disposition'] = 'attachment; filename=plots.zip'
-        return resp
+        status = submit_fit(request.POST, request.FILES)
+    except QueueFull as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=429)
     except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse(dict(status, success=True), status=202)
+
+
+def job_status(request, job_id):
+    status = JOBS.status(job_id)
+    if status is None:
+        return JsonResponse({'success': False, 'error': 'Unknown job id'}, status=404)
+    return JsonResponse(dict(status, success=True))
+
+
+def job_result(request, job_id):
+    result = fit_job_result(job_id)
+    if result is None:
+        return JsonResponse({'success': False, 'error': 'Unknown job id'}, status=404)
+    # 202 while the job is still queued/running, 200 once the fit is available
+    status = 200 if result.get('success') else (202 if result.get('state') in ('queued', 'running') else 409)
+    return JsonResponse(result, status=status)
+
+
+@csrf_exempt
+def job_cancel(request, job_id):
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST required'}, status=405)
+    status = JOBS.cancel(job_id)
+    if status is None:
+        return JsonResponse({'success': False, 'error': 'Unknown job id'}, status=404)
+    return JsonResponse(dict(status, success=True))
+
+
+@csrf_exempt
+def fit_segments(request):
+    # same form as /fit; the file is split into sweeps and each cathodic segment is fitted
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST required'}, status=405)
+    result = fit_cycle_segments(request.POST, request.FILES)
+    status = 200 if result.get('success') else 400
+    return JsonResponse(result, status=status)
+
+
+@csrf_exempt
+def batch(request):
+    # many files (or zip archives) in `datafiles`; one NDJSON line per file as its fit finishes
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'POST required'}, status=405)
+    uploads = request.FILES.getlist('datafiles') + request.FILES.getlist('datafile')
+    resp = StreamingHttpResponse(stream_batch(request.POST, uploads, n_jobs=request.POST.get('jobs')),
+                                 content_type='application/x-ndjson')
+    resp['Cache-Control'] = 'no-cache'
+    resp['X-Accel-Buffering'] = 'no'
+    return resp
+
+
+def batch_table(request, batch_id):
+    table = batch_rows(batch_id)
+    if table is None:
+        return JsonResponse({'success': False, 'error': 'Unknown or expired batch id'}, status=404)
+    resp = HttpResponse(batch_table_csv(table), content_type='text/csv')
+    resp['Content-Disposition'] = 'attachment; filename=batch_results.csv'
+    return resp
+
+
+def batch_download(request, batch_id):
+    chunks = batch_zip(batch_id)
+    if chunks is None:
+        return JsonResponse({'success': False, 'error': 'Unknown or expired batch id'}, status=404)
+    resp = StreamingHttpResponse(chunks, content_type='application/zip')
+    resp['Content-Disposition'] = 'attachment; filename=batch_results.zip'
+    return resp
+
+
+def cache_stats(request):
+    return JsonResponse(fit_cache_stats())
 
 
 @csrf_exempt
@@ -0,0 +1,110 @@
+import io
+import os
+import zipfile
+import pytest
+from webapp.services import batch
+from webapp.services.result_cache import MemoryResultCache
+
+HERE = os.path.dirname(__file__)
+FIXTURE = os.path.abspath(os.path.join(HERE, '..', 'test_fixture.csv'))
+SAMPLE = os.path.abspath(os.path.join(HERE, '..', 'sample_data', 'sample.csv'))
+
+
+def _zip_of(*paths):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as z:
+        for p in paths:
+            z.write(p, 'run/' + os.path.basename(p))
+        z.writestr('__MACOSX/._junk', b'x')
+    buf.seek(0)
+    buf.name = 'runs.zip'
+    return buf
+
+
+def test_batch_of_zip_members_with_per_file_config():
+    form = {'area_electrode': '1', 'fitting_method': 'least_squares', 'seed': '1',
+            'configs': '{"run/sample.csv": {"model_type": "full"}}'}
+    events = list(batch.run_batch(form, [_zip_of(FIXTURE, SAMPLE), io.BytesIO(b'not,a\nfile,x\n')],
+                                  n_jobs=2, cache=MemoryResultCache()))
+    assert events[0]['event'] == 'start' and len(events[0]['files']) == 3
+    assert sorted(e['file'] for e in events if e['event'] == 'file') == sorted(events[0]['files'])
+    done = events[-1]
+    table = {r['file']: r for r in done['table']}
+    assert done['n_failed'] == 1 and not table['file3']['success']
+    assert table['run/test_fixture.csv']['model_type'] != table['run/sample.csv']['model_type']
+    assert table['run/sample.csv']['chisqr'] is not None and 'k3' in table['run/sample.csv']
+
+    csv_text = batch.batch_table_csv(done['table'])
+    assert csv_text.splitlines()[0].startswith('file,success,model_type,n_points')
+    with zipfile.ZipFile(io.BytesIO(b''.join(batch.batch_zip(done['batch_id'])))) as z:
+        names = z.namelist()
+    assert 'batch_results.csv' in names and 'run/sample/theta.csv' in names and 'run/test_fixture/tafel.csv' in names
+
+
+def test_fit_files_reuses_cached_results():
+    cache = MemoryResultCache()
+    form = {'area_electrode': '1', 'fitting_method': 'least_squares', 'seed': '2'}
+    first = list(batch.run_batch(form, paths=[FIXTURE], cache=cache))[-1]['table']
+    second = list(batch.run_batch(form, paths=[FIXTURE], cache=cache))[-1]['table']
+    assert not first[0]['cached'] and second[0]['cached'] and first[0]['chisqr'] == second[0]['chisqr']
+    assert batch.fit_files([FIXTURE], form)[0]['success']
+
+
+def test_duplicate_names_get_their_own_zip_folders():
+    def upload():
+        with open(FIXTURE, 'rb') as f:
+            buf = io.BytesIO(f.read())
+        buf.name = 'data.csv'
+        return buf
+
+    form = {'area_electrode': '1', 'fitting_method': 'least_squares', 'seed': '3'}
+    done = list(batch.run_batch(form, [upload(), upload()], cache=MemoryResultCache()))[-1]
+    assert [r['file'] for r in done['table']] == ['data.csv', 'data.csv#2']
+    with zipfile.ZipFile(io.BytesIO(b''.join(batch.batch_zip(done['batch_id'])))) as z:
+        names = z.namelist()
+    assert 'data/fit_plot.csv' in names and 'data_2/fit_plot.csv' in names
+    assert batch.bundle_stem('data.txt', {'data', 'data_2'}) == 'data_3'
+
+
+def test_oversized_zip_members_are_refused(monkeypatch):
+    monkeypatch.setattr(batch, 'MAX_MEMBER_BYTES', 100)
+    with pytest.raises(ValueError, match='larger than'):
+        batch.expand_uploads([_zip_of(FIXTURE)])
+    monkeypatch.setattr(batch, 'MAX_MEMBER_BYTES', 2 ** 30)
+    monkeypatch.setattr(batch, 'MAX_TOTAL_BYTES', os.path.getsize(FIXTURE) + 1)
+    with pytest.raises(ValueError, match='expands to more than'):
+        batch.expand_uploads([_zip_of(FIXTURE, SAMPLE)])
+
+
+def test_zip_keeps_every_file_when_batch_outgrows_sessions(monkeypatch):
+    from webapp.services.session_store import SESSIONS
+    monkeypatch.setattr(SESSIONS, 'max_entries', 1)
+    form = {'area_electrode': '1', 'fitting_method': 'least_squares', 'seed': '5'}
+    done = list(batch.run_batch(form, paths=[FIXTURE, SAMPLE], cache=MemoryResultCache()))[-1]
+    assert done['n_failed'] == 0 and 'session_id' not in done['table'][0]
+    with zipfile.ZipFile(io.BytesIO(b''.join(batch.batch_zip(done['batch_id'])))) as z:
+        names = z.namelist()
+    stems = {n.split('/')[-2] for n in names if n.endswith('/fit_plot.csv')}
+    assert stems == {'test_fixture', 'sample'} and not any(n.endswith('ERROR.txt') for n in names)
+
+
+def test_zip_reports_files_without_tables():
+    form = {'area_electrode': '1', 'fitting_method': 'least_squares', 'seed': '5'}
+    done = list(batch.run_batch(form, paths=[FIXTURE], cache=MemoryResultCache()))[-1]
+    batch.BATCHES.get(done['batch_id'])['bundles'].clear()
+    with zipfile.ZipFile(io.BytesIO(b''.join(batch.batch_zip(done['batch_id'])))) as z:
+        names = z.namelist()
+    assert [n for n in names if n.endswith('ERROR.txt')] == [os.path.splitext(FIXTURE)[0] + '/ERROR.txt']
+    assert not any(n.endswith('fit_plot.csv') for n in names)
+
+
+def test_batches_are_bounded_by_the_bytes_of_their_tables(monkeypatch):
+    from webapp.services.session_store import SessionStore
+    form = {'area_electrode': '1', 'fitting_method': 'least_squares', 'seed': '6'}
+    monkeypatch.setattr(batch, 'BATCHES', SessionStore(max_entries=16, ttl=None, max_bytes=1,
+                                                       sizer=batch.BATCHES.sizer))
+    first = list(batch.run_batch(form, paths=[FIXTURE], cache=MemoryResultCache()))[-1]['batch_id']
+    assert batch.BATCHES.nbytes > 0
+    second = list(batch.run_batch(form, paths=[FIXTURE], cache=MemoryResultCache()))[-1]['batch_id']
+    # over budget: only the newest batch stays
+    assert batch.batch_zip(first) is None and batch.batch_zip(second) is not None
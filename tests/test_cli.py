@@ -0,0 +1,54 @@
+import os
+import csv
+from webapp import cli
+
+HERE = os.path.dirname(__file__)
+FIXTURE = os.path.abspath(os.path.join(HERE, '..', 'test_fixture.csv'))
+
+
+def test_cli_fit_writes_table_and_plot_bundles(tmp_path):
+    out = tmp_path / 'results.csv'
+    rc = cli.main(['fit', os.path.join(HERE, '..', 'sample_data', '*.csv'), FIXTURE, '--fitting-method', 'least_squares',
+                   '--area-electrode', '1', '--seed', '1', '--vary-bbh', 'false', '-o', str(out),
+                   '--plots', str(tmp_path / 'plots'), '-q'])
+    assert rc == 0
+    rows = list(csv.DictReader(open(out)))
+    assert len(rows) == 2 and all(r['success'] == 'True' for r in rows) and rows[0]['bbh'] == '0.5'
+    assert sorted(os.listdir(tmp_path / 'plots' / 'test_fixture')) == [
+        'fit.png', 'fit_plot.csv', 'tafel.csv', 'tafel.png', 'theta.csv', 'theta.png']
+    assert cli.main(['fit', str(tmp_path / 'missing*.csv'), '-q']) == 2
+
+
+def test_cli_plot_folders_follow_the_input_tree(tmp_path):
+    for sub in ('a', 'b'):
+        (tmp_path / sub).mkdir()
+        (tmp_path / sub / 'run.csv').write_bytes(open(FIXTURE, 'rb').read())
+    rc = cli.main(['fit', str(tmp_path / '*' / 'run.csv'), '--fitting-method', 'least_squares', '--area-electrode', '1',
+                   '--seed', '1', '-o', str(tmp_path / 'results.csv'), '--plots', str(tmp_path / 'plots'), '-q'])
+    assert rc == 0
+    assert sorted(os.listdir(tmp_path / 'plots')) == ['a', 'b']
+    assert 'fit.png' in os.listdir(tmp_path / 'plots' / 'a' / 'run') and 'fit.png' in os.listdir(tmp_path / 'plots' / 'b' / 'run')
+
+
+def test_cli_reports_plot_bundles_it_cannot_write(tmp_path, monkeypatch, capsys):
+    from webapp.services import fitting_service
+
+    def broken(fitter, **kws):
+        raise RuntimeError('no renderer')
+
+    monkeypatch.setattr(fitting_service, 'plot_images', broken)
+    rc = cli.main(['fit', FIXTURE, '--fitting-method', 'least_squares', '--area-electrode', '1', '--seed', '1',
+                   '-o', str(tmp_path / 'results.csv'), '--plots', str(tmp_path / 'plots'), '-q'])
+    assert rc == 1
+    assert 'plot bundle not written: no renderer' in capsys.readouterr().err
+    assert list(csv.DictReader(open(tmp_path / 'results.csv')))[0]['success'] == 'True'
+
+
+def test_cli_leaves_no_datasets_behind(tmp_path, monkeypatch):
+    from webapp.services import fitting_service
+    from webapp.services.dataset_store import DatasetStore
+    store = DatasetStore(str(tmp_path / 'datasets'))
+    monkeypatch.setattr(fitting_service, 'DATASETS', store)
+    rc = cli.main(['fit', FIXTURE, '--fitting-method', 'least_squares', '--area-electrode', '1', '--seed', '1',
+                   '-o', str(tmp_path / 'results.csv'), '-q'])
+    assert rc == 0 and store.stats()['stored'] == 0 and not os.path.exists(store.root)
@@ -0,0 +1,56 @@
+import os
+import numpy as np
+from webapp.models.hydrogen import hydrogen_fitting
+from webapp.services import fitting_service
+from webapp.services.dataset_store import DatasetStore
+from webapp.utils.datasets import save_dataset, load_dataset, file_digest
+from webapp.utils.parsers import parse_columns, load_columns
+
+FIXTURE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test_fixture.csv'))
+
+
+def test_round_trip_is_memory_mapped(tmp_path):
+    parsed = parse_columns(FIXTURE)
+    assert parsed.complete
+    path = save_dataset(str(tmp_path / 'ds'), parsed, {'source': 'fixture'})
+    loaded = load_dataset(path)
+    assert isinstance(loaded.data, np.memmap) and not loaded.data.flags.writeable
+    assert loaded.meta == {'source': 'fixture'}
+    assert np.array_equal(loaded.select(0, 1), load_columns(FIXTURE, 'auto', 0, 1))
+    # the chosen pair is a view of the mapped array, in either order
+    assert np.shares_memory(loaded.select(1, 0), loaded.data)
+    assert np.array_equal(loaded.select(1, 0), parsed.select(1, 0))
+
+
+def test_from_store_matches_file_parse(tmp_path):
+    path = save_dataset(str(tmp_path / 'ds'), parse_columns(FIXTURE))
+    kw = dict(area_electrode=1.0, ohmic_drop=2.0, current_col=1, potential_col=2)
+    a = hydrogen_fitting.from_store(path, **kw)
+    b = hydrogen_fitting(file_path=FIXTURE, **kw)
+    assert np.array_equal(a.potential, b.potential) and np.array_equal(a.current, b.current)
+
+
+def test_request_reuses_stored_dataset(tmp_path, monkeypatch):
+    store = DatasetStore(str(tmp_path))
+    monkeypatch.setattr(fitting_service, 'DATASETS', store)
+    form = {'file_path': FIXTURE, 'area_electrode': '1'}
+    first = fitting_service.build_fitter_from_request(form, None)
+    assert store.key_for(file_digest(FIXTURE)) in store
+    second = fitting_service.build_fitter_from_request(form, None)
+    assert store.stats()['hits'] == 1 and store.stats()['stored'] == 1
+    assert np.array_equal(first.current, second.current)
+
+
+def test_dataset_writes_are_swept_under_the_upload_quota(tmp_path):
+    from webapp.services.upload_store import UploadStore
+    store = DatasetStore(str(tmp_path / 'ds'))
+    uploads = UploadStore(str(tmp_path / 'up'), quota_bytes=1, max_age=0, datasets=store, min_age=0,
+                          sweep_interval=3600)
+    parsed = parse_columns(FIXTURE)
+    old = store.put(store.key_for('ab' * 32), parsed)
+    past = os.path.getmtime(old) - 100
+    os.utime(old, (past, past))
+    new = store.put(store.key_for('cd' * 32), parsed)
+    # the write itself triggered the sweep: the older dataset is gone, the new one kept
+    assert not os.path.exists(old) and os.path.exists(new)
+    assert uploads.stats()['evicted'] == 1
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from webapp.utils.decimate import lttb_indices, minmax_indices, decimate_indices, decimate
+
+
+def _sweep(n=100_000):
+    x = np.linspace(-1.0, 0.0, n)
+    y = -np.exp(-8 * x) + 0.01 * np.random.default_rng(0).standard_normal(n)
+    y[n // 3] = 50.0  # a spike must survive display decimation
+    return x, y
+
+
+def test_minmax_keeps_envelope_and_end_points():
+    x, y = _sweep()
+    idx = minmax_indices(y, 1000)
+    assert idx.shape[0] <= 1002 and idx[0] == 0 and idx[-1] == x.shape[0] - 1
+    assert np.all(np.diff(idx) > 0)
+    assert y[idx].max() == y.max() and y[idx].min() == y.min()
+
+
+def test_lttb_budget_spike_and_nan():
+    x, y = _sweep()
+    y[10:20] = np.nan
+    idx = lttb_indices(x, y, 500)
+    assert idx.shape[0] == 500 and np.all(np.isfinite(y[idx]))
+    assert x.shape[0] // 3 in idx and idx[-1] == x.shape[0] - 1
+    # small inputs come back whole
+    assert np.array_equal(lttb_indices(x[100:150], y[100:150], 500), np.arange(50))
+
+
+def test_shared_grid_stays_aligned():
+    x, y = _sweep(20_000)
+    arrays = {'x': x, 'a': y, 'b': 2 * y, 'none': None}
+    out, n = decimate(arrays, 'x', 1000)
+    assert n == 20_000 and out['none'] is None
+    assert out['x'].shape == out['a'].shape == out['b'].shape and out['x'].shape[0] <= 1000
+    assert np.array_equal(out['b'], 2 * out['a'])
+    # nothing to do below the budget or without one
+    assert decimate(arrays, 'x', 0)[0] is arrays and decimate_indices(x, [y], 50_000) is None
+    with pytest.raises(ValueError):
+        decimate_indices(x, [y], 100, 'random')
@@ -0,0 +1,66 @@
+import io
+import os
+import zipfile
+import numpy as np
+import pytest
+
+from webapp.services import fitting_service, export
+
+FIXTURE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test_fixture.csv'))
+
+
+def _session():
+    res = fitting_service.run_fit({'file_path': FIXTURE, 'fitting_method': 'least_squares', 'seed': '1'}, None)
+    assert res['success']
+    return res
+
+
+def test_zip_streams_from_one_fit_in_chunks(monkeypatch):
+    res = _session()
+
+    def _no_refit(*a, **k):
+        raise AssertionError('the export should reuse the session')
+    monkeypatch.setattr(fitting_service, 'build_fitter_from_request', _no_refit)
+    name, chunks = export.export_request({'session_id': res['session_id'], 'formats': 'csv,npz,png,svg'}, None)
+    fitter = fitting_service.SESSIONS.get(res['session_id'])
+    z = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+    assert name == 'plots.zip'
+    assert z.testzip() is None
+    assert {'summary.json', 'fit_plot.csv', 'theta.csv', 'tafel.csv', 'curves.npz', 'fit.png', 'tafel.svg'} <= set(z.namelist())
+    # CSVs round-trip the float64 curves exactly
+    theta = np.loadtxt(io.BytesIO(z.read('theta.csv')), delimiter=',', skiprows=1)
+    expected = fitting_service.export_tables(fitter)['theta'][1]
+    assert np.array_equal(theta[:, 0], expected[0]) and np.array_equal(theta[:, 1], expected[1], equal_nan=True)
+    assert z.read('theta.csv').decode() == fitting_service.plots_csv(fitter)['theta.csv']
+    npz = np.load(io.BytesIO(z.read('curves.npz')))
+    assert npz['potential'].shape[0] == res['n_points']
+
+
+def test_export_rejects_unknown_formats_before_fitting():
+    with pytest.raises(ValueError):
+        export.export_request({'formats': 'csv,xlsx'}, None)
+    assert export.export_formats({}) == ['csv']
+    assert export.export_formats({'formats': ['png', 'csv', 'png']}) == ['png', 'csv']
+
+
+def test_large_tables_arrive_in_pieces():
+    potential = np.linspace(-0.6, 0.0, 50_000)
+    current = -1e-3 * np.exp(-12 * potential) * (1 + 0.01 * np.random.default_rng(0).standard_normal(50_000))
+    res = fitting_service.run_fit({'potential': potential.tolist(), 'current': current.tolist(),
+                                   'fitting_method': 'least_squares', 'seed': '1'}, None)
+    fitter = fitting_service.SESSIONS.get(res['session_id'])
+    pieces = [p for p in export.iter_zip(fitter, res['session_id'], ['csv'], chunk_rows=5000) if p]
+    assert len(pieces) > 3
+    z = zipfile.ZipFile(io.BytesIO(b''.join(pieces)))
+    assert z.read('fit_plot.csv').count(b'\n') == 50_001
+
+
+def test_csv_values_print_as_their_shortest_repr():
+    tables = {'theta': (('Potential', 'Hydrogen_Coverage'), (np.array([0.1, -0.25]), np.array([1 / 3, np.nan])))}
+    text = fitting_service.tables_csv(tables)['theta.csv']
+    assert text == 'Potential,Hydrogen_Coverage\n0.1,0.3333333333333333\n-0.25,nan\n'
+    buf = export._StreamBuffer()
+    with zipfile.ZipFile(buf, 'w') as z:
+        chunks = list(export._csv_member(z, buf, 'theta.csv', *tables['theta'], chunk_rows=1))
+    with zipfile.ZipFile(io.BytesIO(b''.join(chunks) + buf.drain())) as z:
+        assert z.read('theta.csv').decode() == text
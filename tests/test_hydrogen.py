@@ -23,3 +23,49 @@ def test_theta_and_tafel():
     assert theta.shape == np.asarray(f.potential).shape
     x, slope = f.compute_tafel_slope()
     assert x.shape == slope.shape
+
+def test_seeded_fit_is_reproducible():
+    def run(seed):
+        f = hydrogen_fitting(file_path=FIXTURE, area_electrode=1.0)
+        f.fit_data(model_type='simplified', fitting_method='powell', seed=seed)
+        assert f.seed == seed
+        return f.get_params_dict(), np.asarray(f.result_model.best_fit)
+    p1, y1 = run(1234)
+    p2, y2 = run(1234)
+    assert p1 == p2
+    assert np.array_equal(y1, y2)
+
+def test_gradient_method_uses_analytic_jacobian():
+    f = hydrogen_fitting(file_path=FIXTURE, area_electrode=1.0)
+    res = f.fit_data(model_type='simplified', fitting_method='least_squares', seed=3)
+    assert callable(res.call_kws.get('jac'))
+    assert np.isfinite(res.chisqr)
+
+def test_multistart_ranks_candidates():
+    f = hydrogen_fitting(file_path=FIXTURE, area_electrode=1.0)
+    res = f.fit_data(model_type='simplified', fitting_method='powell', seed=5, multistart=3, n_jobs=1)
+    ranked = f.multistart_results
+    assert [c['rank'] for c in ranked] == [1, 2, 3]
+    chis = [c['chisqr'] for c in ranked]
+    assert chis == sorted(chis)
+    assert res.chisqr <= chis[0] * (1 + 1e-6)
+
+def test_global_method_searches_log_space():
+    f = hydrogen_fitting(file_path=FIXTURE, area_electrode=1.0)
+    names, lo, hi, fixed = f._search_space('simplified')
+    assert names[:4] == ['k1', 'k1r', 'k2', 'k2r'] and lo[0] == -20 and hi[0] == -2
+    res = f.fit_data(model_type='simplified', fitting_method='differential_evolution', seed=2, n_jobs=1)
+    assert f.global_search['method'] == 'differential_evolution'
+    assert np.isfinite(res.chisqr)
+
+
+def test_iter_cb_reports_and_stops_fit():
+    f = hydrogen_fitting(file_path=FIXTURE, area_electrode=1.0)
+    seen = []
+
+    def cb(progress):
+        seen.append(progress)
+        return len(seen) >= 3
+    res = f.fit_data(model_type='simplified', fitting_method='nelder', seed=1, iter_cb=cb, progress_interval=0)
+    assert len(seen) == 3 and res.aborted
+    assert set(seen[-1]) == {'stage', 'iter', 'chisqr', 'params', 'elapsed'} and 'k1' in seen[-1]['params']
@@ -0,0 +1,40 @@
+import numpy as np
+from webapp.models.hydrogen import F, her_simplified_jacobian, hydrogen_full_jacobian
+
+F1 = 38.92
+X = np.linspace(-0.3, -0.05, 11)
+
+
+def _simplified(x, k1, k1r, k2, k2r, bbv, bbh):
+    a = F1 * x
+    v = 2 * k1 * k2 * (1 - np.exp(2 * a)) * np.exp(-bbh * a) / (
+        k1 * np.exp((bbh - bbv) * a) + k2 + np.exp(a) * (k1r * np.exp((bbh - bbv) * a) + k2r))
+    return -F * v
+
+
+def _full(x, k1, k1r, k2, k3, bbv, bbh):
+    a = F1 * x
+    k2r = k1 * k2 / k1r
+    k3r = k3 * k1 ** 2 / k1r ** 2
+    A = -2 * k3 + 2 * k3r
+    B = -np.exp(-bbv * a) * k1 - np.exp((1 - bbv) * a) * k1r - k2 * np.exp(-bbh * a) - np.exp((1 - bbh) * a) * k2r - 4 * k3r
+    C = k1 * np.exp(-bbv * a) + np.exp((1 - bbh) * a) * k2r + 2 * k3r
+    th = (-B - np.sqrt(B ** 2 - 4 * A * C)) / (2 * A)
+    return -F * (k1 * (1 - th) * np.exp(-bbv * a) + np.exp((1 - bbh) * a) * k2r * (1 - th)
+                 + np.exp((1 - bbv) * a) * k1r * th - k2 * th * np.exp(-bbh * a))
+
+
+def _check(func, jac, vals):
+    J = jac(X, **vals, f1=F1)
+    for name, v in vals.items():
+        h = abs(v) * 1e-4
+        num = (func(X, **dict(vals, **{name: v + h})) - func(X, **dict(vals, **{name: v - h}))) / (2 * h)
+        assert np.allclose(J[name], num, rtol=1e-4), name
+
+
+def test_simplified_jacobian_matches_finite_differences():
+    _check(_simplified, her_simplified_jacobian, dict(k1=3e-8, k1r=2e-6, k2=5e-9, k2r=1e-10, bbv=0.4, bbh=0.6))
+
+
+def test_full_jacobian_matches_finite_differences():
+    _check(_full, hydrogen_full_jacobian, dict(k1=1e-6, k1r=1e-5, k2=1e-7, k3=1e-6, bbv=0.5, bbh=0.5))
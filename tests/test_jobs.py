@@ -0,0 +1,97 @@
+import os
+import time
+import pytest
+from webapp.models.hydrogen import hydrogen_fitting
+from webapp.services.jobs import JobQueue, QueueFull, submit_fit, DONE, CANCELLED, TIMEOUT, FINISHED
+from webapp.services.result_cache import MemoryResultCache
+from webapp.services.session_store import SESSIONS
+from webapp.utils.parallel import cpu_count
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'test_fixture.csv')
+
+
+def _fitter():
+    return hydrogen_fitting(file_path=FIXTURE, area_electrode=1.0)
+
+
+def _wait(queue, job_id, limit=60):
+    end = time.time() + limit
+    while time.time() < end:
+        status = queue.status(job_id)
+        if status['state'] in FINISHED:
+            return status
+        time.sleep(0.02)
+    raise AssertionError('job did not finish')
+
+
+def test_job_runs_in_worker_and_lands_in_session():
+    queue = JobQueue(max_workers=1, cache=MemoryResultCache())
+    job = queue.submit(_fitter(), 'simplified', 'least_squares', seed=4)
+    status = _wait(queue, job.id)
+    assert status['state'] == DONE and status['session_id'] in SESSIONS
+    assert job.result['success'] and job.result['seed'] == 4
+    # the same fit again is answered from the result cache without a worker
+    again = queue.submit(_fitter(), 'simplified', 'least_squares', seed=4)
+    assert again.state == DONE and again.result['cached']
+    assert again.result['parameters'] == job.result['parameters']
+    queue.shutdown()
+
+
+def test_cancel_timeout_and_queue_limit():
+    queue = JobQueue(max_workers=1, max_queued=2, timeout=0.2, cache=MemoryResultCache())
+    fitters = [_fitter() for _ in range(3)]
+    slow = queue.submit(fitters[0], 'full', 'basinhopping', seed=1)
+    waiting = queue.submit(fitters[1], 'full', 'basinhopping', seed=2)
+    with pytest.raises(QueueFull):
+        queue.submit(fitters[2], 'full', 'basinhopping', seed=3)
+    assert queue.cancel(waiting.id)['state'] == CANCELLED
+    assert _wait(queue, slow.id)['state'] == TIMEOUT
+    queue.shutdown()
+
+
+def test_cancel_does_not_wait_for_the_worker_and_warm_start_is_kept():
+    queue = JobQueue(max_workers=1, cache=MemoryResultCache())
+    slow = queue.submit(_fitter(), 'full', 'basinhopping', seed=5)
+    end = time.time() + 30
+    while queue.get(slow.id).process is None and time.time() < end:
+        time.sleep(0.02)
+    t0 = time.time()
+    assert queue.cancel(slow.id)['state'] == CANCELLED
+    assert time.time() - t0 < 0.5 and queue.stats()['running'] == 0
+
+    first = queue.submit(_fitter(), 'simplified', 'least_squares', seed=6)
+    assert _wait(queue, first.id)['state'] == DONE
+    form = {'file_path': FIXTURE, 'area_electrode': '1', 'fitting_method': 'basinhopping',
+            'warm_start': first.session_id}
+    status = submit_fit(form, None, queue=queue)
+    job = queue.get(status['job_id'])
+    assert job.start and job.fitting_method == 'least_squares'
+    assert _wait(queue, job.id)['state'] == DONE
+    assert job.result['warm_start']['session_id'] == first.session_id
+    queue.shutdown()
+
+
+@pytest.mark.skipif(not hasattr(os, 'killpg'), reason='process groups are POSIX only')
+def test_timeout_stops_the_whole_worker_process_group():
+    queue = JobQueue(max_workers=2, timeout=1.0, cache=MemoryResultCache())
+    assert queue.fit_jobs == max(1, cpu_count() // 2)
+    slow = queue.submit(_fitter(), 'full', 'basinhopping', seed=7, multistart=4)
+    end = time.time() + 30
+    while queue.get(slow.id).process is None and time.time() < end:
+        time.sleep(0.02)
+    pid = queue.get(slow.id).process.pid
+    while os.getpgid(pid) != pid and time.time() < end:
+        time.sleep(0.02)
+    assert os.getpgid(pid) == pid
+    assert _wait(queue, slow.id)['state'] == TIMEOUT
+    # the job process and the multistart pool it started are gone
+    end = time.time() + 10
+    while time.time() < end:
+        try:
+            os.killpg(pid, 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.05)
+    else:
+        raise AssertionError('worker process group still running')
+    queue.shutdown()
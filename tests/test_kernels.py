@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from webapp.models.kernels import HERKernel, PARAM_ORDER, evaluate_batch
+from test_jacobian import _simplified, _full
+
+X = np.linspace(-0.6, 0.05, 200)
+SIMPLIFIED = dict(k1=3e-8, k1r=2e-6, k2=5e-9, k2r=1e-10, bbv=0.4, bbh=0.6)
+FULL = dict(k1=1e-6, k1r=1e-5, k2=1e-7, k3=1e-6, bbv=0.5, bbh=0.5)
+
+
+def test_simplified_matches_closed_form():
+    current, theta = HERKernel(X).simplified(**SIMPLIFIED)
+    assert np.allclose(current, _simplified(X, **SIMPLIFIED), rtol=1e-12)
+    assert np.all((theta >= 0) & (theta <= 1))
+
+
+def test_full_matches_closed_form():
+    current, theta = HERKernel(X).full(**FULL)
+    assert np.allclose(current, _full(X, **FULL), rtol=1e-6)
+    assert np.all((theta >= 0) & (theta <= 1))
+
+
+def test_buffers_are_reused_but_results_are_not():
+    k = HERKernel(X)
+    a = k.simplified_current(**SIMPLIFIED)
+    b = k.simplified_current(**dict(SIMPLIFIED, k1=1e-7))
+    assert a is not b and not np.array_equal(a, b)
+
+
+def test_no_overflow_at_large_overpotential():
+    x = np.linspace(-20.0, 0.0, 50)
+    for current, theta in (HERKernel(x).full(**FULL), HERKernel(x).simplified(**SIMPLIFIED)):
+        assert np.all(np.isfinite(theta))
+        assert not np.any(np.isnan(current))
+
+
+def test_batch_matches_per_row_kernel():
+    rng = np.random.default_rng(0)
+    for model, base in (('simplified', SIMPLIFIED), ('full', FULL)):
+        names = PARAM_ORDER[model]
+        P = np.array([base[k] for k in names]) * rng.uniform(0.5, 2.0, (7, len(names)))
+        # a tiny max_bytes forces one row per chunk plus the batched path
+        for max_bytes in (1, 2 ** 26):
+            current, theta = evaluate_batch(P, X, model, max_bytes=max_bytes)
+            assert current.shape == theta.shape == (7, X.size)
+            for row, c, t in zip(P, current, theta):
+                ref_c, ref_t = HERKernel(X).evaluate(model, dict(zip(names, row)))
+                assert np.allclose(c, ref_c, rtol=1e-9) and np.allclose(t, ref_t, rtol=1e-9)
+
+
+def test_batch_tafel_and_shape_check():
+    P = [SIMPLIFIED[k] for k in PARAM_ORDER['simplified']]
+    current, theta, slope = evaluate_batch(P, X, 'simplified', tafel=True)
+    assert slope.shape == (1, X.size)
+    with pytest.raises(ValueError):
+        evaluate_batch(np.ones((2, 5)), X, 'full')
@@ -1,4 +1,6 @@
 import os
+import numpy as np
+import pytest
 from webapp.utils.parsers import parse_data_file
 
 
@@ -8,3 +10,52 @@ def test_parse_sample():
     assert len(pot) > 0
     assert len(cur) > 0
     assert pot.shape == cur.shape
+
+
+def test_sniffs_header_bom_and_column_order():
+    from webapp.utils.parsers import load_columns, sniff_format
+    data = '﻿WE(1).Current (A)\tWE(1).Potential (V)\tTime (s)\n-1e-4\t-0.9\t0\n-2e-4\t-0.95\t1\n'.encode('utf-8')
+    fmt = sniff_format(data)
+    assert fmt.sep == '\t' and fmt.skiprows == 1 and fmt.n_columns == 3
+    arr = load_columns(data, 'auto', current_col=2, potential_col=1)
+    assert arr.dtype == np.float64 and arr.tolist() == [[0.0, -0.9], [1.0, -0.95]]
+
+
+def test_decimal_comma_footer_and_fallback_columns():
+    from webapp.utils.parsers import load_columns
+    data = b'# exported\nE;I\n-0,95;-0,0001\n-0,96;-0,0002\nend of data\n'
+    assert load_columns(data).tolist() == [[-0.95, -0.0001], [-0.96, -0.0002]]
+    # columns beyond the file fall back to the first two
+    assert load_columns(b'1 2\n3 4\n', ' ', 4, 7).tolist() == [[1.0, 2.0], [3.0, 4.0]]
+
+
+def test_chunked_and_streaming_match_bulk_parse():
+    from webapp.utils.parsers import load_columns, load_columns_chunked, StreamingColumnParser
+    from webapp.models.hydrogen import hydrogen_fitting
+    path = os.path.join(os.path.dirname(__file__), '..', 'uploads', 'LSV_Mo2C_EF0_3.txt')
+    bulk = load_columns(path)
+    assert np.array_equal(load_columns_chunked(path, chunksize=7), bulk)
+    parser = StreamingColumnParser(chunksize=11)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(100), b''):
+            parser.feed(chunk)
+    parsed = parser.close()
+    assert np.array_equal(parsed.select(0, 1), bulk)
+    assert np.array_equal(parsed.select(1, 0), bulk[:, ::-1])
+    fitter = hydrogen_fitting(columns=parsed, area_electrode=1.0)
+    assert np.array_equal(fitter._raw, bulk)
+
+
+def test_streaming_parser_exits_when_the_upload_is_dropped():
+    from webapp.utils.parsers import StreamingColumnParser
+    # the client went away mid-upload: teardown aborts the parser
+    parser = StreamingColumnParser(chunksize=11)
+    parser.feed(b'E,I\n-0.1,-1e-6\n-0.2,')
+    parser.abort()
+    assert parser.join(5)
+    # nobody aborted it, but no more bytes arrive: the idle timeout stops it
+    stalled = StreamingColumnParser(chunksize=11, idle_timeout=1.0)
+    stalled.feed(b'E,I\n-0.1,-1e-6\n')
+    assert stalled.join(10)
+    with pytest.raises(OSError):
+        stalled.close()
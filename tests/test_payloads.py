@@ -0,0 +1,40 @@
+import json
+import numpy as np
+import pytest
+
+from webapp.utils.payloads import (pack_arrays, unpack_arrays, encode_arrays, decode_base64, data_format,
+                                   BINARY_CONTENT_TYPE)
+
+
+def test_binary_container_round_trip_and_alignment():
+    x = np.linspace(-1, 0, 7)
+    y = np.array([1.0, np.nan, np.inf, -2.5, 0.0, 3.0, 4.0])
+    blob = pack_arrays({'x': x, 'y': y, 'none': None}, 'float32', meta={'session_id': 'abc'})
+    arrays, meta = unpack_arrays(blob)
+    assert meta == {'session_id': 'abc'} and set(arrays) == {'x', 'y'}
+    assert np.allclose(arrays['x'], x) and arrays['x'].dtype == np.float32
+    assert np.isnan(arrays['y'][1]) and np.isinf(arrays['y'][2])
+    # every array starts 8-byte aligned, so typed-array views need no copy
+    size = int.from_bytes(blob[4:8], 'little')
+    header = json.loads(blob[8:8 + size])
+    assert (8 + size) % 8 == 0 and all(f['offset'] % 8 == 0 for f in header['fields'].values())
+
+
+def test_base64_is_smaller_than_lists_and_lossless():
+    a = np.random.default_rng(0).standard_normal(10_000)
+    lists = json.dumps(encode_arrays({'a': a}))
+    b64 = encode_arrays({'a': a}, 'base64')
+    assert np.array_equal(decode_base64(b64['a']), a)
+    assert len(json.dumps(b64)) < 0.7 * len(lists)
+    f32 = encode_arrays({'a': a}, 'base64', 'float32')
+    assert len(json.dumps(f32)) < 0.35 * len(lists)
+
+
+def test_data_format_fields_and_accept_header():
+    assert data_format({}) == ('list', 'float64')
+    assert data_format({'encoding': 'base64', 'dtype': 'f32'}) == ('base64', 'float32')
+    assert data_format({}, accept=BINARY_CONTENT_TYPE) == ('binary', 'float64')
+    with pytest.raises(ValueError):
+        data_format({'encoding': 'msgpack'})
+    with pytest.raises(ValueError):
+        data_format({'dtype': 'float16'})
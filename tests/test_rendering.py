@@ -0,0 +1,67 @@
+import threading
+import numpy as np
+import pytest
+
+from webapp.services import rendering
+from webapp.services.rendering import RenderCache, render, render_panels
+
+PNG = b'\x89PNG\r\n\x1a\n'
+
+
+def _series(scale=1.0):
+    x = np.linspace(-0.5, 0.0, 200)
+    return [(x, scale * np.exp(-10 * x)), (x, scale * np.exp(-9.5 * x))]
+
+
+def test_render_reuses_template_and_caches_by_data():
+    cache = RenderCache()
+    a = render('fit', _series(), cache=cache)
+    assert a.startswith(PNG)
+    assert render('fit', _series(), cache=cache) is a
+    b = render('fit', _series(2.0), cache=cache)
+    assert b != a and cache.stats()['entries'] == 2 and cache.stats()['hits'] == 1
+    # size and format are part of the key
+    assert render('fit', _series(), size=(4, 3), cache=cache) != a
+    assert render('fit', _series(), fmt='svg', cache=cache).lstrip().startswith(b'<?xml')
+    # a second render of new data went through the same figure template
+    assert len(rendering._local.templates) >= 1
+
+
+def test_render_cache_is_bounded_lru():
+    cache = RenderCache(max_bytes=10)
+    cache.set('a', b'12345')
+    cache.set('b', b'12345')
+    cache.get('a')
+    cache.set('c', b'12345')
+    assert cache.get('b') is None and cache.get('a') == b'12345' and cache.stats()['bytes'] == 10
+    cache.set('big', b'x' * 11)
+    assert cache.get('big') is None
+
+
+def test_render_rejects_unknown_kind_and_format():
+    with pytest.raises(ValueError):
+        render('bode', _series())
+    with pytest.raises(ValueError):
+        render('fit', _series(), fmt='gif')
+
+
+def test_render_panels_concurrent_matches_serial():
+    jobs = {'fit': ('fit', _series(3.0)), 'theta': ('theta', _series(3.0)[:1]), 'tafel': ('tafel', _series(3.0)[:1])}
+    serial = {k: render(kind, s, cache=RenderCache()) for k, (kind, s) in jobs.items()}
+    rendering.RENDER_CACHE.clear()
+    threaded = render_panels(jobs, workers=3)
+    assert threaded == serial
+    # templates are per thread, so concurrent renders never share a figure
+    errors = []
+
+    def worker(i):
+        try:
+            render('theta', [(np.arange(50.0), np.arange(50.0) * i)], cache=RenderCache())
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
@@ -0,0 +1,79 @@
+import os
+import numpy as np
+from webapp.models.hydrogen import hydrogen_fitting
+from webapp.services import fitting_service
+from webapp.services.result_cache import MemoryResultCache, SQLiteResultCache, fit_cache_key
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'test_fixture.csv')
+
+
+def _fitter(**kw):
+    return hydrogen_fitting(file_path=FIXTURE, area_electrode=1.0, **kw)
+
+
+def test_key_covers_data_and_config():
+    f = _fitter()
+    cfg = f.fit_config()
+    k = fit_cache_key(f._raw, cfg)
+    assert k == fit_cache_key(f._raw.copy(), dict(cfg))
+    assert k != fit_cache_key(f._raw, dict(cfg, ohmic_drop=1.0))
+    assert k != fit_cache_key(f._raw * 1.0001, cfg)
+
+
+def test_memory_cache_hit_skips_fit(monkeypatch):
+    cache = MemoryResultCache(max_entries=4)
+    f = _fitter()
+    assert fitting_service.fit_with_cache(f, 'simplified', 'powell', seed=7, cache=cache) is False
+    first = f.get_params_dict()
+
+    g = _fitter()
+    monkeypatch.setattr(g, 'fit_data', lambda *a, **k: (_ for _ in ()).throw(AssertionError('refit')))
+    assert fitting_service.fit_with_cache(g, 'simplified', 'powell', seed=7, cache=cache) is True
+    assert g.seed == 7
+    assert g.get_params_dict() == first
+    assert g.compute_theta().shape == g.potential.shape
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_sqlite_cache_roundtrip(tmp_path):
+    f = _fitter()
+    f.fit_data(model_type='full', fitting_method='powell')
+    payload = f.result_payload()
+    path = str(tmp_path / 'cache.sqlite3')
+    SQLiteResultCache(path).set('k', payload)
+
+    cache = SQLiteResultCache(path)  # new instance, as after a restart
+    got = cache.get('k')
+    assert got['model_type'] == payload['model_type']
+    assert np.array_equal(got['best_fit'], payload['best_fit'])
+    assert cache.get('missing') is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_blank_seed_draws_a_new_start_and_only_given_seeds_hit_the_cache(monkeypatch):
+    cache = MemoryResultCache(max_entries=4)
+    monkeypatch.setattr(fitting_service, 'RESULT_CACHE', cache)
+    form = {'file_path': os.path.abspath(FIXTURE), 'area_electrode': '1', 'fitting_method': 'least_squares',
+            'seed': '', 'k1_init': '', 'k2_init': ''}
+    first = fitting_service.run_fit(dict(form), None)
+    second = fitting_service.run_fit(dict(form), None)
+    assert first['success'] and not first['cached'] and not second['cached']
+    assert second['seed'] != first['seed'] and cache.stats()['entries'] == 0
+    # reusing the reported seed replays that fit from the cache
+    again = fitting_service.run_fit(dict(form, seed=str(first['seed'])), None)
+    repeat = fitting_service.run_fit(dict(form, seed=str(first['seed'])), None)
+    assert not again['cached'] and repeat['cached'] and repeat['parameters'] == again['parameters']
+    assert again['parameters'] == first['parameters']
+
+
+def test_memory_cache_byte_budget_uses_encoded_size():
+    from webapp.services.result_cache import encode_payload
+    payload = {'best_fit': np.zeros(1000), 'chisqr': 1.0}
+    size = len(encode_payload(payload))
+    cache = MemoryResultCache(max_entries=100, max_bytes=int(2.5 * size))
+    for key in 'abc':
+        cache.set(key, payload)
+    assert cache.get('a') is None and cache.get('b') is not None and cache.get('c') is not None
+    assert cache.stats()['bytes'] == 2 * size
+    cache.set('big', {'best_fit': np.zeros(10000)})
+    assert cache.stats()['entries'] == 1 and cache.get('big') is not None
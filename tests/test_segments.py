@@ -0,0 +1,107 @@
+import numpy as np
+from webapp.utils.segments import load_blocks, parse_blocks, split_reversals, segments
+from webapp.services import cycles
+from webapp.services.result_cache import MemoryResultCache
+
+
+def _cv_text(cycles_, n=30, seed=0):
+    rng = np.random.default_rng(seed)
+    lines = ['Potential/V,Current/A']
+    for c in range(cycles_):
+        down = np.linspace(0.0, -0.3, n)
+        up = down[::-1][1:]
+        for x in np.concatenate([down, up]):
+            i = -1e-6 * (1 + 0.2 * c) * np.expm1(-x / 0.04) + rng.normal(0, 1e-9)
+            lines.append(f'{i:.6e},{x + rng.normal(0, 2e-4):.5f}')
+        if c == 0:
+            lines += ['', '# cycle 2', 'Potential/V,Current/A']
+    return '\n'.join(lines) + '\n'
+
+
+def test_blocks_and_reversals():
+    blocks = load_blocks(_cv_text(3).encode(), current_col=0, potential_col=1)
+    # a blank/comment/header separator after the first cycle, then two cycles back to back
+    assert [b.shape[0] for b in blocks] == [59, 118]
+    runs = split_reversals(blocks[1][:, 1])
+    assert [d for _, _, d in runs] == [-1, 1, -1, 1]
+    assert runs[0][1] - 1 == runs[1][0]
+    segs = segments(blocks)
+    assert len(segs) == 3 and all(s['direction'] == -1 for s in segs)
+    assert len(segments(blocks, branch='all')) == 6
+
+
+def test_comment_lines_split_blocks():
+    text = 'I,E\n1,0.1\n2,0.2\n# cycle 2\n3,0.3\n4,0.4 # note\n5,0.5\n'
+    blocks = load_blocks(text.encode())
+    assert [b.shape[0] for b in blocks] == [2, 3]
+    assert blocks[1][1].tolist() == [4.0, 0.4]
+
+
+def test_fit_segments_tracks_each_cycle(tmp_path):
+    path = tmp_path / 'cv.csv'
+    path.write_text(_cv_text(3))
+    form = {'file_path': str(path), 'area_electrode': '1', 'fitting_method': 'least_squares', 'seed': '4'}
+    out = cycles.fit_segments(form, None, n_jobs=2, cache=MemoryResultCache())
+    assert out['success'] and out['n_segments'] == 3
+    assert [s['segment'] for s in out['segments']] == [1, 2, 3]
+    assert all(s['success'] and s['direction'] == 'cathodic' for s in out['segments'])
+    assert len(out['drift']['k1']) == 3 and len(out['drift']['chisqr']) == 3
+
+
+def test_fit_segments_parses_once_and_keeps_sessions(tmp_path, monkeypatch):
+    from webapp.services.dataset_store import DatasetStore
+    from webapp.services.session_store import SESSIONS
+    path = tmp_path / 'cv.csv'
+    path.write_text(_cv_text(2, seed=1))
+    calls = []
+
+    def counting(*args, **kws):
+        calls.append(args)
+        return parse_blocks(*args, **kws)
+
+    monkeypatch.setattr(cycles, 'DATASETS', DatasetStore(tmp_path / 'datasets'))
+    monkeypatch.setattr(cycles, 'parse_blocks', counting)
+    monkeypatch.setattr(cycles.fitting_service, 'build_fitter_from_request', None)
+    before = len(SESSIONS)
+    form = {'file_path': str(path), 'area_electrode': '1', 'fitting_method': 'least_squares', 'seed': '4'}
+    first = cycles.fit_segments(form, None, n_jobs=1, cache=MemoryResultCache())
+    second = cycles.fit_segments(form, None, n_jobs=1, cache=MemoryResultCache())
+    assert first['success'] and first['n_segments'] == 2 and len(calls) == 1
+    assert [s['chisqr'] for s in second['segments']] == [s['chisqr'] for s in first['segments']]
+    assert len(SESSIONS) == before and 'session_id' not in first['segments'][0]
+
+
+def test_stored_blocks_count_against_the_upload_quota(tmp_path, monkeypatch):
+    import os
+    from webapp.services.dataset_store import DatasetStore
+    from webapp.services.upload_store import UploadStore
+    store = DatasetStore(tmp_path / 'datasets')
+    uploads = UploadStore(str(tmp_path / 'up'), quota_bytes=1, max_age=0, datasets=store, min_age=0)
+    monkeypatch.setattr(cycles, 'DATASETS', store)
+    paths = []
+    for i in range(2):
+        paths.append(tmp_path / f'cv{i}.csv')
+        paths[-1].write_text(_cv_text(2, seed=i))
+    cycles.stored_blocks(str(paths[0]), 'auto', (0, 1))
+    [first] = [os.path.join(store.root, shard, key) for shard in os.listdir(store.root)
+               for key in os.listdir(os.path.join(store.root, shard))]
+    os.utime(first, (1, 1))
+    cycles.stored_blocks(str(paths[1]), 'auto', (0, 1))
+    assert not os.path.exists(first) and uploads.stats()['evicted'] == 1
+
+
+def test_chunked_block_parse_matches_one_pass():
+    text = _cv_text(3).encode()
+    whole = parse_blocks(text)
+    chunked = parse_blocks(text, chunksize=7)
+    assert np.array_equal(whole.data, chunked.data)
+    assert [b.shape[0] for b in load_blocks(text)] == [59, 118]
+
+
+def test_runs_without_direction_are_labelled_flat(tmp_path):
+    path = tmp_path / 'cv.csv'
+    path.write_text(_cv_text(2))
+    form = {'file_path': str(path), 'area_electrode': '1', 'fitting_method': 'least_squares', 'seed': '4',
+            'branch': 'all', 'reversal_tol': '10'}
+    out = cycles.fit_segments(form, None, n_jobs=1, cache=MemoryResultCache())
+    assert out['success'] and [s['direction'] for s in out['segments']] == ['flat', 'flat']
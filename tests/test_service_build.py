@@ -1,4 +1,6 @@
 import os
+import json
+import numpy as np
 from webapp.services import fitting_service
 
 
@@ -9,3 +11,140 @@ def test_build_fitter_from_sample():
     # Expect a hydrogen_fitting instance (has attribute 'fit_data')
     assert hasattr(fitter, 'fit_data')
     assert hasattr(fitter, 'potential') or hasattr(fitter, '_raw')
+
+
+def test_evaluate_params_reuses_session_without_refit():
+    fixture = os.path.join(os.path.dirname(__file__), '..', 'test_fixture.csv')
+    res = fitting_service.run_fit({'file_path': os.path.abspath(fixture), 'area_electrode': '1',
+                                   'model_type': 'simplified', 'fitting_method': 'least_squares', 'seed': '3'}, None)
+    assert res['success']
+    out = fitting_service.evaluate_params({'session_id': res['session_id']})
+    assert out['success'] and out['params'] == {k: res['parameters'][k] for k in out['params']}
+    n = res['n_points']
+    assert len(out['predictions']['current']) == len(out['predictions']['tafel_theo_slope']) == n
+    moved = fitting_service.evaluate_params({'session_id': res['session_id'], 'bbh': 0.3})
+    assert moved['params']['bbh'] == 0.3 and moved['predictions']['current'] != out['predictions']['current']
+
+
+def test_evaluate_params_on_raw_grid():
+    out = fitting_service.evaluate_params({'potential': [-0.3, -0.2, -0.1], 'f1': 38.92, 'k1': 1e-6, 'k1r': 1e-5,
+                                           'k2': 1e-7, 'k3': 1e-6, 'bbv': 0.5, 'bbh': 0.5})
+    assert out['success'] and out['model_type'] == 'full'
+    assert not fitting_service.evaluate_params({'potential': [-0.1], 'k1': 1.0})['success']
+
+
+def test_stream_fit_reports_progress_and_stops_early():
+    fixture = os.path.join(os.path.dirname(__file__), '..', 'test_fixture.csv')
+    form = {'file_path': os.path.abspath(fixture), 'area_electrode': '1', 'model_type': 'full',
+            'fitting_method': 'basinhopping', 'seed': '5'}
+    events = []
+    for chunk in fitting_service.stream_fit(form, None, interval=0.0):
+        event, data = chunk.split('\n')[:2]
+        payload = json.loads(data[len('data: '):])
+        events.append((event[len('event: '):], payload))
+        if events[-1][0] == 'progress':
+            # stop as soon as the first iteration is reported
+            assert fitting_service.stop_stream(events[0][1]['stream_id'])
+    kinds = [e for e, _ in events]
+    assert kinds[0] == 'start' and 'progress' in kinds and kinds[-1] == 'result'
+    result = events[-1][1]
+    assert result['success'] and result['aborted'] and not result['cached']
+    assert not fitting_service.stop_stream(events[0][1]['stream_id'])
+
+
+def test_fit_from_arrays_matches_file_fit():
+    import io
+    import numpy as np
+    from webapp.models.hydrogen import hydrogen_fitting
+    from webapp.utils.parsers import load_columns
+    fixture = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test_fixture.csv'))
+    cur, pot = load_columns(fixture, 'auto', 0, 1).T
+    kw = dict(area_electrode=1.0, ohmic_drop=2.0, ref_correction=0.1)
+    a = hydrogen_fitting.from_arrays(pot, cur, **kw)
+    b = hydrogen_fitting(file_path=fixture, **kw)
+    assert np.array_equal(a.potential, b.potential) and np.array_equal(a.current, b.current)
+
+    body = json.dumps({'potential': pot.tolist(), 'current': cur.tolist(), 'area_electrode': 1,
+                       'vary_bbh': False, 'fitting_method': 'least_squares', 'seed': 3})
+    form = fitting_service.array_form(body.encode(), 'application/json')
+    res = fitting_service.run_fit(form, None)
+    assert res['success'] and res['n_points'] == len(pot) and res['parameters']['bbh'] == 0.5
+    buf = io.BytesIO()
+    np.save(buf, np.column_stack([pot, cur]))
+    for raw, query in ((buf.getvalue(), None), (np.column_stack([pot, cur]).astype('<f4').tobytes(), {'dtype': '<f4'})):
+        form = fitting_service.array_form(raw, 'application/octet-stream', query)
+        assert np.allclose(fitting_service.build_fitter_from_request(form, None).current, b.current, rtol=1e-6)
+
+
+def test_warm_start_refit_reuses_session_data_and_parameters():
+    fixture = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test_fixture.csv'))
+    form = {'file_path': fixture, 'area_electrode': '1', 'model_type': 'simplified', 'fitting_method': 'powell',
+            'seed': '11'}
+    cold = fitting_service.run_fit(form, None)
+    assert cold['success'] and cold['warm_start'] is None
+    cold_fitter = fitting_service.SESSIONS.get(cold['session_id'])
+    # no file in the refit: only the corrections change, the raw columns come from the session
+    warm = fitting_service.run_fit({'warm_start': cold['session_id'], 'area_electrode': '1', 'ohmic_drop': '0.5',
+                                    'model_type': 'simplified', 'fitting_method': 'powell', 'seed': '11'}, None)
+    assert warm['success'] and warm['warm_start'] == {'session_id': cold['session_id'], 'fitting_method': 'powell'}
+    warm_fitter = fitting_service.SESSIONS.get(warm['session_id'])
+    assert warm_fitter._raw is not cold_fitter._raw and (warm_fitter._raw == cold_fitter._raw).all()
+    assert warm_fitter.result_model.nfev < cold_fitter.result_model.nfev
+    # another model (or other data) gets no warm start
+    assert warm_fitter.warm_start(cold_fitter, 'full') is None
+    sample = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'sample_data', 'sample.csv'))
+    other = fitting_service.build_fitter_from_request({'file_path': sample}, None)
+    assert other.warm_start(cold_fitter, 'simplified') is None
+
+
+def test_analyze_returns_every_curve_from_one_fit():
+    import base64
+    fixture = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test_fixture.csv'))
+    out = fitting_service.analyze({'file_path': fixture, 'area_electrode': '1', 'fitting_method': 'least_squares',
+                                   'seed': '2', 'images': '1'}, None)
+    assert out['success'] and out['parameters'] and out['stats']['chisqr'] is not None
+    curves = out['curves']
+    n = out['n_points']
+    assert all(len(curves[k]) == n for k in ('potential', 'current', 'fitted', 'theta', 'tafel_slope'))
+    assert all(base64.b64decode(out['images'][k])[:4] == b'\x89PNG' for k in ('fit', 'theta', 'tafel'))
+    # the session is reused, not refitted
+    again = fitting_service.analyze({'session_id': out['session_id']}, None)
+    assert again['session_id'] == out['session_id'] and again['curves'] == curves and 'images' not in again
+    json.dumps(again, allow_nan=False)
+
+
+def test_plot_data_modes_share_one_session():
+    from webapp.utils.payloads import unpack_arrays, decode_base64
+    fixture = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test_fixture.csv'))
+    res = fitting_service.run_fit({'file_path': fixture, 'fitting_method': 'least_squares', 'seed': '1'}, None)
+    form = {'session_id': res['session_id']}
+    lists, ctype = fitting_service.render_data(form, None, 'theta')
+    assert ctype == 'application/json' and len(lists['x']) == res['n_points']
+    b64, _ = fitting_service.render_data(dict(form, encoding='base64'), None, 'theta')
+    assert b64['encoding'] == 'base64' and np.allclose(decode_base64(b64['y']), np.array(lists['y'], dtype=float),
+                                                       equal_nan=True)
+    blob, ctype = fitting_service.render_data(dict(form, encoding='binary', dtype='float32'), None, 'tafel')
+    arrays, meta = unpack_arrays(blob)
+    assert ctype.startswith('application/x-theher') and meta['session_id'] == res['session_id']
+    assert set(arrays) == {'x', 'slope', 'slope_abs'} and arrays['x'].dtype == np.float32
+    packed = fitting_service.analyze(dict(form, encoding='binary'), None)
+    curves, meta = unpack_arrays(packed)
+    assert meta['success'] and meta['parameters'] and curves['potential'].shape[0] == res['n_points']
+
+
+def test_display_decimation_leaves_exports_at_full_resolution():
+    from webapp.services import rendering
+    potential = np.linspace(-0.6, 0.0, 20_000)
+    current = -1e-3 * np.exp(-12 * potential)
+    res = fitting_service.run_fit({'potential': potential.tolist(), 'current': current.tolist(),
+                                   'fitting_method': 'least_squares', 'seed': '1'}, None)
+    form = {'session_id': res['session_id']}
+    out = fitting_service.analyze(dict(form, max_points='500'), None)
+    assert out['decimation']['n_display'] == len(out['curves']['potential']) <= 500
+    assert len(out['curves']['fitted']) == len(out['curves']['theta']) == len(out['curves']['potential'])
+    data, _ = fitting_service.render_data(dict(form, max_points='300', decimate='minmax'), None, 'theta')
+    assert len(data['x']) <= 302 and data['decimation']['n_points'] == 20_000
+    # the export path has every point
+    session = fitting_service.SESSIONS.get(res['session_id'])
+    assert fitting_service.plots_csv(session)['theta.csv'].count('\n') == 20_001
+    assert len(rendering.thin([(potential, current)], 1000)[0][0]) <= 1002
@@ -0,0 +1,58 @@
+import os
+from webapp.services import fitting_service
+from webapp.services.session_store import SessionStore
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'test_fixture.csv')
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    store = SessionStore(max_entries=2, ttl=10)
+    a = store.put('a')
+    b = store.put('b')
+    assert store.get(a) == 'a'  # refresh a, so b is least recently used
+    store.put('c')
+    assert store.get(b) is None
+    assert store.get(a) == 'a'
+    assert len(store) == 2
+
+    import webapp.services.session_store as mod
+    now = mod.time.monotonic()
+    monkeypatch.setattr(mod.time, 'monotonic', lambda: now + 60)
+    assert store.get(a) is None
+    assert len(store) == 0
+
+
+def test_session_reuses_fit(monkeypatch):
+    form = {'file_path': os.path.abspath(FIXTURE), 'model_type': 'simplified'}
+    res = fitting_service.run_fit(form, None)
+    assert res['success'] and res['session_id']
+
+    def _no_refit(*a, **k):
+        raise AssertionError('fit should come from the session')
+    monkeypatch.setattr(fitting_service, 'build_fitter_from_request', _no_refit)
+    data = fitting_service.render_plot_data({'session_id': res['session_id']}, None)
+    assert len(data['x']) == res['n_points']
+
+
+def test_byte_budget_evicts_large_sessions():
+    import numpy as np
+    from webapp.services.session_store import value_nbytes
+
+    class Fit:
+        def __init__(self, n):
+            self.current = np.zeros(n)
+            self.view = self.current[::2]
+
+    store = SessionStore(max_entries=10, ttl=None, max_bytes=2500)
+    assert value_nbytes(Fit(100)) == 800
+    a, b = store.put(Fit(100)), store.put(Fit(100))
+    c = store.put(Fit(100))
+    assert len(store) == 3 and store.nbytes == 2400
+    store.get(a)
+    store.put(Fit(100))
+    # b was least recently used; the store is back under budget
+    assert store.get(b) is None and store.get(a) is not None and store.nbytes == 2400
+    big = store.put(Fit(1000))
+    assert store.get(big) is not None and len(store) == 1
+    store.discard(big)
+    assert store.nbytes == 0 and c
@@ -0,0 +1,78 @@
+import io
+import os
+import time
+import threading
+from webapp.services.dataset_store import DatasetStore
+from webapp.services.upload_store import UploadStore
+from webapp.utils.parsers import parse_columns
+
+FIXTURE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test_fixture.csv'))
+
+
+class _Upload(io.BytesIO):
+    name = 'data.csv'
+
+
+def test_same_name_uploads_do_not_collide_and_identical_bytes_dedupe(tmp_path):
+    store = UploadStore(str(tmp_path / 'up'), quota_bytes=0, max_age=0)
+    a, da = store.save(_Upload(b'1,2\n3,4\n'))
+    b, db = store.save(_Upload(b'5,6\n7,8\n'))
+    c, dc = store.save(_Upload(b'1,2\n3,4\n'))
+    assert a != b and a == c and da == dc
+    assert open(a, 'rb').read() == b'1,2\n3,4\n' and open(b, 'rb').read() == b'5,6\n7,8\n'
+    # a known digest skips reading the upload at all
+    assert store.save(object(), digest=da) == (a, da)
+    assert store.stats()['saved'] == 2 and store.stats()['deduped'] == 2
+    assert not [n for n in os.listdir(store.root) if n.startswith('.tmp-')]
+
+
+def test_sweep_evicts_least_recently_used_uploads_and_datasets(tmp_path):
+    datasets = DatasetStore(str(tmp_path / 'ds'))
+    store = UploadStore(str(tmp_path / 'up'), quota_bytes=0, max_age=0, datasets=datasets, min_age=0)
+    old = datasets.put(datasets.key_for('ab' * 32), parse_columns(FIXTURE))
+    paths = [store.save(_Upload(bytes([i]) * 1000))[0] for i in range(3)]
+    past = time.time() - 100
+    os.utime(old, (past, past))
+    os.utime(paths[0], (past + 1, past + 1))
+    store.quota_bytes = 2500
+    assert store.sweep(keep=paths[0]) >= 1
+    assert os.path.exists(paths[0]) and not os.path.exists(old)
+    assert sum(os.path.getsize(p) for p in paths if os.path.exists(p)) <= 2500
+
+
+def test_sweep_spares_entries_in_use_by_other_requests(tmp_path):
+    store = UploadStore(str(tmp_path / 'up'), quota_bytes=0, max_age=0, min_age=0)
+    mine, _ = store.save(_Upload(b'1,2\n3,4\n' * 100))
+    theirs, _ = store.save(_Upload(b'5,6\n7,8\n' * 100))
+    leased, release = threading.Event(), threading.Event()
+
+    def request():
+        # another request saved `theirs` and is still parsing it
+        with store.lease(theirs):
+            leased.set()
+            release.wait(5)
+
+    worker = threading.Thread(target=request)
+    worker.start()
+    assert leased.wait(5)
+    store.quota_bytes = 1
+    try:
+        store.sweep(keep=mine)
+        assert os.path.exists(mine) and os.path.exists(theirs)
+        assert store.stats()['leased'] == 1
+    finally:
+        release.set()
+        worker.join()
+    assert store.sweep() == 2 and not os.path.exists(theirs) and store.stats()['leased'] == 0
+
+
+def test_recently_used_entries_survive_sweeps_from_other_processes(tmp_path):
+    store = UploadStore(str(tmp_path / 'up'), quota_bytes=1, max_age=0, min_age=60)
+    fresh, digest = store.save(_Upload(b'1,2\n3,4\n'))
+    old, _ = store.save(_Upload(b'5,6\n7,8\n'))
+    past = time.time() - 120
+    for p in (fresh, old):
+        os.utime(p, (past, past))
+    # a repeat upload counts as a use
+    store.save(_Upload(b'1,2\n3,4\n'))
+    assert store.sweep() == 1 and os.path.exists(fresh) and not os.path.exists(old)
@@ -28,10 +28,19 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    # gzip (or brotli when installed) for JSON and plot responses; static files come compressed from WhiteNoise
+    'her.middleware.CompressionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
 ]
 
+# Data files are parsed while the upload streams in (see her/upload_handlers.py)
+FILE_UPLOAD_HANDLERS = [
+    'her.upload_handlers.StreamingParseUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
 # CSRF settings for production
 CSRF_TRUSTED_ORIGINS = [
     'https://theher.onrender.com',
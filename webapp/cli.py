@@ -0,0 +1,146 @@
+"""Command-line batch runner.
+
+    python -m webapp.cli fit 'archive/**/*.csv' --model-type full --area-electrode 0.196 \
+        --jobs 8 --output results.csv --plots bundles/
+
+Fit options are the /fit form fields (`--ohmic-drop` sets `ohmic_drop`,
+`--k1-init` sets `k1_init`, ...), applied to every file; `--configs`
+points at a JSON file of per-file overrides like the /batch `configs`
+field. Files fit in parallel on `--jobs` processes (default: all cores)
+through `webapp.services.batch`, so the result cache is shared with the
+web app; the files are parsed directly, without copies in the dataset
+store. The consolidated table is written as CSV, or
+Parquet when the output name ends in `.parquet` (needs pyarrow); `--plots`
+adds one folder per file with the fit, theta and Tafel CSVs and PNGs,
+laid out like the input files below their common directory. Each bundle
+is written as soon as its file is fitted, so nothing is held for the
+whole run.
+
+The exit status is 0 when every file fitted (and its plot bundle was
+written), 1 when some failed and 2 when no file matched.
+"""
+import os
+import sys
+import glob
+import json
+import argparse
+
+# form fields accepted by build_fitter_from_request and run_fit
+FORM_FIELDS = (
+    'model_type', 'fitting_method', 'seed', 'multistart',
+    'area_electrode', 'ohmic_drop', 'ref_correction', 'ref_potential', 'pH', 'temperature', 'gas_constant',
+    'delimiter', 'current_col', 'potential_col', 'current_units',
+    'bbv', 'bbv_min', 'bbv_max', 'vary_bbv', 'bbh', 'bbh_min', 'bbh_max', 'vary_bbh',
+) + tuple(f'{k}{suffix}' for k in ('k1', 'k1r', 'k2', 'k2r', 'k3')
+          for suffix in ('_init', '_min', '_max')) + tuple(f'vary_{k}' for k in ('k1', 'k1r', 'k2', 'k2r', 'k3'))
+
+
+def expand_paths(patterns):
+    """Return the sorted, de-duplicated files matched by glob `patterns` (`**` recurses)."""
+    found = []
+    for pattern in patterns:
+        matches = glob.glob(os.path.expanduser(pattern), recursive=True) or ([pattern] if os.path.isfile(pattern) else [])
+        found.extend(os.path.abspath(p) for p in matches if os.path.isfile(p))
+    return sorted(set(found))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m webapp.cli', description='TheHER headless analysis')
+    sub = parser.add_subparsers(dest='command', required=True)
+    fit = sub.add_parser('fit', help='fit data files and write a results table')
+    fit.add_argument('patterns', nargs='+', help='data files or glob patterns (quote them; ** recurses)')
+    fit.add_argument('-j', '--jobs', type=int, default=0, help='worker processes (default: all cores)')
+    fit.add_argument('-o', '--output', default='results.csv', help='results table (.csv or .parquet)')
+    fit.add_argument('--plots', metavar='DIR', help='write per-file CSV and PNG plot bundles to DIR')
+    fit.add_argument('--configs', metavar='JSON', help='per-file overrides: {"file name": {"field": value}}')
+    fit.add_argument('-q', '--quiet', action='store_true', help='no per-file progress on stderr')
+    form = fit.add_argument_group('fit options (same as the /fit form fields)')
+    for field in FORM_FIELDS:
+        form.add_argument('--' + field.replace('_', '-'), dest=field, metavar=field.split('_')[-1].upper())
+    return parser
+
+
+def write_table(table, path):
+    from .services.batch import batch_table_csv, table_columns
+    if path.lower().endswith('.parquet'):
+        import pandas as pd
+        try:
+            pd.DataFrame(table, columns=table_columns(table)).to_parquet(path, index=False)
+        except ImportError as e:
+            raise SystemExit(f'Parquet output needs pyarrow or fastparquet ({e}); use a .csv output instead')
+        return
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        f.write(batch_table_csv(table))
+
+
+def plot_folders(paths, root):
+    """Return {path: bundle folder below `root`} for the input `paths`."""
+    from .services.batch import bundle_stem
+    # folders mirror the inputs below their common directory, so a/run.csv and b/run.csv stay apart
+    base = os.path.commonpath([os.path.dirname(p) for p in paths]) if paths else ''
+    stems = set()
+    return {p: os.path.join(root, bundle_stem(os.path.relpath(p, base), stems)) for p in paths}
+
+
+def write_plots(fitter, folder):
+    """Write the fit, theta and Tafel CSVs and PNGs of a fitted file into `folder`."""
+    from .services import fitting_service
+    os.makedirs(folder, exist_ok=True)
+    files = dict(fitting_service.plots_csv(fitter))
+    for kind, png in fitting_service.plot_images(fitter).items():
+        files[f'{kind}.png'] = png
+    for name, content in files.items():
+        with open(os.path.join(folder, name), 'wb') as f:
+            f.write(content.encode('utf-8') if isinstance(content, str) else content)
+
+
+def cmd_fit(args):
+    from .services.batch import run_batch, MAX_FILES
+    paths = expand_paths(args.patterns)
+    if not paths:
+        print('No data files matched ' + ' '.join(args.patterns), file=sys.stderr)
+        return 2
+    form = {k: getattr(args, k) for k in FORM_FIELDS if getattr(args, k) is not None}
+    if args.configs:
+        with open(args.configs, encoding='utf-8') as f:
+            form['configs'] = json.load(f)
+    folders = plot_folders(paths, args.plots) if args.plots else {}
+    plot_errors = {}
+
+    def on_fit(name, fitter):
+        # also keeps run_batch from holding every file's tables for a batch zip
+        if name not in folders:
+            return
+        try:
+            write_plots(fitter, folders[name])
+        except Exception as e:
+            plot_errors[name] = str(e) or type(e).__name__
+
+    table = []
+    for start in range(0, len(paths), MAX_FILES):
+        # one-shot run: parse the files directly, no .npy copies left in the dataset store
+        for event in run_batch(form, paths=paths[start:start + MAX_FILES], n_jobs=args.jobs or None, on_fit=on_fit,
+                               datasets=False):
+            if event['event'] == 'file' and not args.quiet:
+                status = f"chisqr={event.get('chisqr')}" if event.get('success') else f"FAILED: {event.get('error')}"
+                print(f"{event['file']}: {status}", file=sys.stderr)
+            elif event['event'] == 'done':
+                table.extend(event['table'])
+    write_table(table, args.output)
+    for name, error in plot_errors.items():
+        print(f'{name}: plot bundle not written: {error}', file=sys.stderr)
+    failed = sum(1 for r in table if not r.get('success'))
+    if not args.quiet:
+        print(f'{len(table) - failed}/{len(table)} files fitted; results in {args.output}', file=sys.stderr)
+    return 1 if failed or plot_errors else 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'fit':
+        return cmd_fit(args)
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
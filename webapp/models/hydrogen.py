@@ -5,20 +5,297 @@ converts current units, computes current density, applies ohmic and
 reference corrections, and exposes fitting routines.
 """
 import os
+import time
+import random
 import numpy as np
-import pandas as pd
 from lmfit import Model, create_params
+from .kernels import HERKernel, PARAM_ORDER, evaluate_batch, tafel_slope, model_key
+from ..utils.parallel import process_pool, resolve_jobs
+from ..utils.parsers import load_columns, ParsedColumns
+from ..utils.datasets import load_dataset
 
 F = 96485.3
 
 
-def rnd():
-    import random
-    exp1 = random.randint(-15, -4)
-    significand = round(random.uniform(0.1, 9), 2)
+def rnd(rng=None):
+    rng = rng if rng is not None else random
+    exp1 = rng.randint(-15, -4)
+    significand = round(rng.uniform(0.1, 9), 2)
     return significand * 10 ** exp1
 
 
+def new_seed():
+    """Draw a fresh seed for the initial-guess generator."""
+    return random.SystemRandom().randrange(2 ** 32)
+
+
+# rate constants whose blank initial value is replaced by a random guess
+RANDOM_START_PARAMS = {
+    'simplified': ('k1', 'k1r', 'k2', 'k2r'),
+    'full': ('k1', 'k1r', 'k2', 'k3'),
+}
+# model_type argument -> name stored on a fitted instance
+MODEL_NAMES = {'simplified': 'HER_simplified_fitting', 'full': 'Hydrogen_Full_Fitting'}
+
+
+# optimizers that can use an analytic Jacobian (wired in as Dfun)
+GRADIENT_METHODS = ('leastsq', 'least_squares')
+# global optimizers: searched over log10(k) and bbv/bbh bounds, then polished locally
+GLOBAL_METHODS = ('differential_evolution', 'basinhopping', 'shgo')
+FIT_METHODS = ('powell', 'nelder') + GRADIENT_METHODS + GLOBAL_METHODS
+
+
+def her_simplified_jacobian(x, k1, k1r, k2, k2r, bbv, bbh, f1=38.92):
+    """Partial derivatives of the simplified (Volmer-Heyrovsky) current.
+
+    Returns a dict mapping k1, k1r, k2, k2r, bbv and bbh to d(current)/d(param)
+    arrays with the shape of `x`.
+    """
+    a = f1 * np.asarray(x, dtype=float)
+    e1 = np.exp(a)
+    G = np.exp((bbh - bbv) * a)
+    N = 2 * k1 * k2 * (1 - np.exp(2 * a)) * np.exp(-bbh * a)
+    D = k1 * G + k2 + e1 * (k1r * G + k2r)
+    v = N / D
+    # d(v)/dp = (N_p - v * D_p) / D ; current = -F * v
+    dG = a * G * (k1 + e1 * k1r)
+    parts = {
+        'k1': (N / k1 - v * G),
+        'k1r': (-v * e1 * G),
+        'k2': (N / k2 - v),
+        'k2r': (-v * e1),
+        'bbv': (v * dG),
+        'bbh': (-a * N - v * dG),
+    }
+    return {name: -F * dp / D for name, dp in parts.items()}
+
+
+def hydrogen_full_jacobian(x, k1, k1r, k2, k3, bbv, bbh, f1=38.92):
+    """Partial derivatives of the full (Volmer-Heyrovsky-Tafel) current.
+
+    k2r = k1*k2/k1r and k3r = k3*k1**2/k1r**2 are dependent parameters, so
+    their contribution is folded into the derivatives with respect to k1,
+    k1r, k2 and k3. Coverage derivatives follow from implicit
+    differentiation of the quadratic A*theta**2 + B*theta + C = 0 taken on
+    the same root as `HERKernel.full`.
+    """
+    a = f1 * np.asarray(x, dtype=float)
+    ev = np.exp(-bbv * a)
+    e1v = np.exp((1 - bbv) * a)
+    eh = np.exp(-bbh * a)
+    e1h = np.exp((1 - bbh) * a)
+
+    k2r = (k1 * k2) / k1r
+    k3r = (k3 * k1 ** 2) / (k1r ** 2)
+    k2r_d = {'k1': k2 / k1r, 'k1r': -k2r / k1r, 'k2': k1 / k1r}
+    k3r_d = {'k1': 2 * k3r / k1, 'k1r': -2 * k3r / k1r, 'k3': k1 ** 2 / k1r ** 2}
+
+    A = -2 * k3 + 2 * k3r
+    B = -ev * k1 - e1v * k1r - eh * k2 - e1h * k2r - 4 * k3r
+    C = ev * k1 + e1h * k2r + 2 * k3r
+    disc = B ** 2 - 4 * A * C
+    disc = np.where(disc < 0, 0.0, disc)
+    sq = np.sqrt(disc)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # same root as (-B - sq) / (2A), without the cancellation
+        theta = 2 * C / (sq - B)
+
+    zero = np.zeros_like(a)
+    dA = {'k1': 2 * k3r_d['k1'], 'k1r': 2 * k3r_d['k1r'], 'k2': 0.0, 'k3': -2 + 2 * k3r_d['k3'],
+          'bbv': 0.0, 'bbh': 0.0}
+    dB = {'k1': -ev - e1h * k2r_d['k1'] - 4 * k3r_d['k1'],
+          'k1r': -e1v - e1h * k2r_d['k1r'] - 4 * k3r_d['k1r'],
+          'k2': -eh - e1h * k2r_d['k2'],
+          'k3': -4 * k3r_d['k3'] + zero,
+          'bbv': a * (ev * k1 + e1v * k1r),
+          'bbh': a * (eh * k2 + e1h * k2r)}
+    dC = {'k1': ev + e1h * k2r_d['k1'] + 2 * k3r_d['k1'],
+          'k1r': e1h * k2r_d['k1r'] + 2 * k3r_d['k1r'],
+          'k2': e1h * k2r_d['k2'],
+          'k3': 2 * k3r_d['k3'] + zero,
+          'bbv': -a * ev * k1,
+          'bbh': -a * e1h * k2r}
+
+    # current = -F * (P*(1 - theta) + Q*theta)
+    P = k1 * ev + e1h * k2r
+    Q = e1v * k1r - k2 * eh
+    dP = {'k1': ev + e1h * k2r_d['k1'], 'k1r': e1h * k2r_d['k1r'], 'k2': e1h * k2r_d['k2'], 'k3': zero,
+          'bbv': -a * ev * k1, 'bbh': -a * e1h * k2r}
+    dQ = {'k1': zero, 'k1r': e1v, 'k2': -eh, 'k3': zero,
+          'bbv': -a * e1v * k1r, 'bbh': a * k2 * eh}
+
+    out = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for name in ('k1', 'k1r', 'k2', 'k3', 'bbv', 'bbh'):
+            # 2*A*theta + B = -sqrt(disc) on the chosen root
+            dtheta = np.where(sq > 0, (dA[name] * theta ** 2 + dB[name] * theta + dC[name]) / sq, 0.0)
+            out[name] = -F * (dP[name] * (1 - theta) + dQ[name] * theta + dtheta * (Q - P))
+    return out
+
+
+def _multistart_candidate(task):
+    """Process-pool worker: fit one starting point and return a plain summary."""
+    state, model_type, fitting_method, start = task
+    fitter = hydrogen_fitting.__new__(hydrogen_fitting)
+    fitter.__dict__.update(state)
+    try:
+        res = fitter.fit_data(model_type, fitting_method, seed=state.get('seed'), start=start)
+        return {
+            'start': start,
+            'params': {n: float(p.value) for n, p in res.params.items()},
+            'chisqr': float(res.chisqr), 'redchi': float(res.redchi),
+            'aic': float(res.aic), 'bic': float(res.bic),
+            'nfev': int(getattr(res, 'nfev', 0) or 0), 'success': bool(getattr(res, 'success', False)),
+        }
+    except Exception as e:
+        return {'start': start, 'params': None, 'chisqr': None, 'aic': None, 'error': str(e)}
+
+
+class _LogSpaceObjective:
+    """Picklable scaled sum-of-squares objective for the global optimizers.
+
+    The search vector holds log10(k) for rate constants and plain values for
+    bbv/bbh; parameters not in `names` are taken from `fixed`.
+    """
+
+    def __init__(self, x, y, model_type, names, fixed, f1=38.92):
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.model_type = str(model_type).lower()
+        self.names = list(names)
+        self.fixed = dict(fixed)
+        self.f1 = f1
+        scale = np.max(np.abs(self.y)) if self.y.size else 1.0
+        self.scale = scale if scale > 0 else 1.0
+        self._kernel = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_kernel'] = None
+        return state
+
+    def values(self, z):
+        v = dict(self.fixed)
+        for name, zi in zip(self.names, z):
+            v[name] = 10.0 ** zi if name.startswith('k') else float(zi)
+        return v
+
+    def __call__(self, z):
+        z = np.asarray(z, dtype=float)
+        if z.ndim == 2:
+            return self.batch(z)
+        if self._kernel is None:
+            self._kernel = HERKernel(self.x, self.f1)
+        current, _ = self._kernel.evaluate(self.model_type, self.values(z))
+        r = (self.y - current) / self.scale
+        ssr = float(np.dot(r, r))
+        return ssr if np.isfinite(ssr) else 1e300
+
+    def batch(self, z):
+        """Objective for a (n_names, S) population in one broadcast evaluation (scipy's vectorized layout)."""
+        key = model_key(self.model_type)
+        order = PARAM_ORDER[key]
+        P = np.empty((z.shape[1], len(order)))
+        for j, name in enumerate(order):
+            if name in self.names:
+                zi = z[self.names.index(name)]
+                P[:, j] = 10.0 ** zi if name.startswith('k') else zi
+            else:
+                P[:, j] = self.fixed[name]
+        current, _ = evaluate_batch(P, self.x, key, self.f1)
+        current -= self.y
+        current /= self.scale
+        ssr = np.einsum('ij,ij->i', current, current)
+        return np.where(np.isfinite(ssr), ssr, 1e300)
+
+
+def _rng_kw(func, seed):
+    # scipy >= 1.15 takes `rng`; older releases only `seed`
+    import inspect
+    names = inspect.signature(func).parameters
+    return {'rng': seed} if 'rng' in names else {'seed': seed}
+
+
+class ProgressReporter:
+    """Throttled bridge from optimizer callbacks to a user `iter_cb`.
+
+    `iter_cb(progress)` gets a dict with `stage` ('local', 'multistart' or
+    'global'), `iter`, `chisqr`, `params` and `elapsed` seconds, at most
+    once per `interval` seconds plus a final update per stage. Returning
+    True asks the fit to stop; the request is sticky, so a following stage
+    (the local polish after a global or multistart search) stops at once
+    and the best point found so far is kept.
+    """
+
+    def __init__(self, iter_cb, interval=0.25):
+        self.iter_cb = iter_cb
+        self.interval = float(interval or 0.0)
+        self.started = time.monotonic()
+        self._last = None
+        self.stopped = False
+
+    def __call__(self, stage, iteration, chisqr, params, force=False):
+        if self.stopped:
+            return True
+        now = time.monotonic()
+        if not force and self._last is not None and now - self._last < self.interval:
+            return False
+        self._last = now
+        # chisqr/params may be callables so skipped iterations cost nothing
+        chisqr = chisqr() if callable(chisqr) else chisqr
+        params = params() if callable(params) else params
+        progress = {
+            'stage': stage,
+            'iter': int(iteration),
+            'chisqr': float(chisqr) if chisqr is not None else None,
+            'params': {k: float(v) for k, v in (params or {}).items()},
+            'elapsed': now - self.started,
+        }
+        if self.iter_cb(progress):
+            self.stopped = True
+        return self.stopped
+
+    def lmfit_callback(self):
+        """Return an iter_cb for one lmfit fit.
+
+        lmfit re-evaluates the residual after an abort and raises if the
+        callback asks to stop again, so each callback signals the stop once.
+        """
+        signalled = []
+
+        def iter_cb(params, iteration, resid, *args, **kws):
+            if signalled:
+                return False
+            stop = self('local', iteration, lambda: float(np.nansum(np.square(resid))), params.valuesdict)
+            if stop:
+                signalled.append(True)
+            return stop
+        return iter_cb
+
+
+class FitSnapshot:
+    """Read-only stand-in for an lmfit ModelResult restored from a cached payload.
+
+    Exposes the attributes the service layer reads (`params`, `best_fit` and
+    fit statistics) plus the cached theta/Tafel arrays.
+    """
+
+    def __init__(self, payload):
+        from lmfit import Parameters
+        self.params = Parameters().loads(payload['params'])
+        self.method = payload.get('method')
+        self.best_fit = payload.get('best_fit')
+        self.theta = payload.get('theta')
+        self.tafel_slope = payload.get('tafel_slope')
+        self.seed = payload.get('seed')
+        stats = payload.get('stats') or {}
+        self.chisqr = stats.get('chisqr')
+        self.redchi = stats.get('redchi')
+        self.aic = stats.get('aic')
+        self.bic = stats.get('bic')
+        self.nfree = stats.get('nfree')
+
+
 class hydrogen_fitting:
     def __init__(self, file_path=None, area_electrode=None, ohmic_drop=0.0, ref_correction=None,
                  ref_potential=None, pH=None, temperature=None, gas_constant=None,
@@ -29,8 +306,10 @@ class hydrogen_fitting:
                  k2_initial=None, k2_min=1e-20, k2_max=1e-2, vary_k2=True,
                  k2r_initial=None, k2r_min=1e-20, k2r_max=1e-2, vary_k2r=True,
                  k3_initial=None, k3_min=1e-20, k3_max=1e-2, vary_k3=True,
-                 delimiter='auto', current_col=1, potential_col=2, current_units='A'):
+                 delimiter='auto', current_col=1, potential_col=2, current_units='A', columns=None):
         self.file_path = file_path
+        # ParsedColumns from the streaming upload parser; saves re-reading file_path
+        self._columns = columns
         self.area_electrode = area_electrode
         self.ohmic_drop = float(ohmic_drop) if ohmic_drop is not None else 0.0
         self.ref_correction = ref_correction
@@ -137,6 +416,9 @@ class hydrogen_fitting:
 
         self.result_model = None
         self.model_type = None
+        self.seed = None
+        self.multistart_results = None
+        self.global_search = None
 
         self._raw = None
         self._parsed = False
@@ -144,33 +426,45 @@ class hydrogen_fitting:
         self._load_data()
         self._process_variables()
 
+    @classmethod
+    def from_arrays(cls, potential, current, **kwargs):
+        """Build a fitter from in-memory potential and current arrays.
+
+        The arrays take the place of the two file columns (current in
+        `current_units`, potential in V), so nothing is written to or read
+        from disk; rows with a NaN are dropped and the ohmic, reference and
+        area corrections in `kwargs` are applied by `_process_variables`.
+        """
+        for key in ('file_path', 'columns', 'current_col', 'potential_col', 'delimiter'):
+            kwargs.pop(key, None)
+        return cls(columns=ParsedColumns.from_arrays(current, potential), current_col=1, potential_col=2, **kwargs)
+
+    @classmethod
+    def from_store(cls, path, **kwargs):
+        """Build a fitter from a dataset directory written by `save_dataset`.
+
+        The stored columns are memory-mapped, so no text is parsed and the
+        selected columns are not copied; `current_col`/`potential_col` pick
+        the pair as usual and the corrections in `kwargs` are applied by
+        `_process_variables`.
+        """
+        return cls(columns=load_dataset(path), **kwargs)
+
     def _load_data(self):
+        columns, self._columns = self._columns, None
+        if columns is not None:
+            arr = columns.select(self.current_col, self.potential_col)
+            self._raw = arr if arr.shape[0] >= 2 else None
+            self._parsed = self._raw is not None
+            return
         # Require a user-supplied file; no synthetic data generation.
         if not (self.file_path and os.path.exists(self.file_path)):
             self._parsed = False
             return
 
         try:
-            sep = None if (self.delimiter == 'auto' or not self.delimiter) else self.delimiter
-            df = pd.read_csv(self.file_path, sep=sep, engine='python', comment='#', header=None)
-            # select columns if available
-            # guard against non-integer column indices from form input
-            try:
-                max_idx = max(int(self.current_col), int(self.potential_col))
-            except Exception:
-                max_idx = 1
-            if df.shape[1] > max_idx:
-                cols = [int(self.current_col), int(self.potential_col)]
-                df2 = df.iloc[:, cols].apply(pd.to_numeric, errors='coerce')
-            elif df.shape[1] >= 2:
-                df2 = df.iloc[:, :2].apply(pd.to_numeric, errors='coerce')
-            else:
-                self._parsed = False
-                return
-
-            # drop rows with any NaN in the selected columns
-            df2 = df2.dropna(how='any')
-            arr = df2.values
+            # one sniffing + C-engine parser shared with the service layer
+            arr = load_columns(self.file_path, self.delimiter, self.current_col, self.potential_col)
             if arr.shape[0] < 2:
                 self._parsed = False
                 return
@@ -213,38 +507,65 @@ class hydrogen_fitting:
         # Note: area is intentionally NOT applied here so fitting uses raw current values only.
         self.potential = potential_raw - (current_A * float(self.ohmic_drop)) + float(self.ref_correction)
 
-    def fit_data(self, model_type='simplified', fitting_method='powell'):
+    def reprocess(self, **kwargs):
+        """Return a new fitter on the same raw columns with other corrections, bounds or initials.
+
+        Only `_process_variables` runs again; the data file is not re-read.
+        """
+        if self._raw is None:
+            raise ValueError("No data loaded. Check uploaded file path and delimiter selection.")
+        fitter = type(self).from_arrays(self._raw[:, 1], self._raw[:, 0], **kwargs)
+        fitter.file_path = self.file_path
+        return fitter
+
+    def warm_start(self, previous, model_type='simplified'):
+        """Return starting values taken from `previous`'s fit, or None.
+
+        Only a fit of the same raw data with the same model qualifies.
+        Parameters whose initial value the user changed since that fit keep
+        the new initial value instead.
+        """
+        if previous is None or getattr(previous, 'result_model', None) is None:
+            return None
+        if self._raw is None or previous._raw is None or previous.model_type != MODEL_NAMES.get(str(model_type).lower()):
+            return None
+        if previous._raw.shape != self._raw.shape or not np.array_equal(previous._raw, self._raw):
+            return None
+        values = previous.get_params_dict() or {}
+        start = {}
+        for name in RANDOM_START_PARAMS[str(model_type).lower()] + ('bbv', 'bbh'):
+            if getattr(self, f'{name}_initial', None) != getattr(previous, f'{name}_initial', None):
+                continue
+            v = values.get(name)
+            if isinstance(v, float) and np.isfinite(v):
+                start[name] = v
+        return start or None
+
+    def uses_random_start(self, model_type='simplified'):
+        """Return True if a fit of `model_type` draws any random initial value."""
+        names = RANDOM_START_PARAMS.get(str(model_type).lower(), ())
+        return any(getattr(self, f'{n}_initial', None) is None for n in names)
+
+    def _build_model(self, model_type):
+        """Return (lmfit Model, model function, analytic Jacobian) for `model_type`."""
         f1_val = self.f1
+        # one fused kernel per fit: f1*x and the scratch buffers are reused by every evaluation
+        kernel = HERKernel(self.potential, f1_val)
 
-        def Theta_Total_local(x, k1, k1r, k2, k2r, k3, k3r, bbv, bbh):
-            # calculate coverage theta for full model (vectorized)
-            k2r_calc = (k1 * k2) / k1r
-            k3r_calc = (k3 * k1 ** 2) / (k1r ** 2)
-            A1 = -2 * k3 + 2 * k3r_calc
-            B1 = (-np.e ** ((-bbv) * f1_val * x)) * k1 - np.e ** ((1 - bbv) * f1_val * x) * k1r - k2 / np.e ** (bbh * f1_val * x) - np.e ** ((1 - bbh) * f1_val * x) * k2r_calc - 4 * k3r_calc
-            C1 = k1 / np.e ** (bbv * f1_val * x) + np.e ** ((1 - bbh) * f1_val * x) * k2r_calc + 2 * k3r_calc
-            # guard against negative discriminant
-            disc = B1 ** 2 - (4 * A1 * C1)
-            disc = np.where(disc < 0, 0.0, disc)
-            theta = (-B1 - np.sqrt(disc)) / (2 * A1)
-            return theta
+        def _kernel_for(x):
+            if x is self.potential or x is kernel.x:
+                return kernel
+            x = np.asarray(x, dtype=float)
+            if x.shape == kernel.x.shape and np.array_equal(x, kernel.x):
+                return kernel
+            return HERKernel(x, f1_val)
 
         def HER_simplified_wrapper(x, k1, k1r, k2, k2r, bbv, bbh):
-            vtotal = 2 * (((k1 * k2 * (1 - np.e ** (2 * f1_val * x))) * np.e ** (-bbh * x * f1_val)) /
-                          (k1 * np.e ** ((bbh - bbv) * f1_val * x) + k2 + np.e ** (f1_val * x) *
-                           (k1r * np.e ** ((bbh - bbv) * f1_val * x) + k2r)))
-            return -F * vtotal
+            return _kernel_for(x).simplified_current(k1, k1r, k2, k2r, bbv, bbh)
 
         def Hydrogen_Full_wrapper(x, k1, k1r, k2, k2r, k3, k3r, bbv, bbh):
-            # full model current using Theta_Total_local
-            k2r_calc = (k1 * k2) / k1r
-            k3r_calc = (k3 * k1 ** 2) / (k1r ** 2)
-            theta = Theta_Total_local(x, k1, k1r, k2, k2r, k3, k3r, bbv, bbh)
-            term1 = (k1 * (1 - theta)) / np.e ** (bbv * f1_val * x)
-            term2 = np.e ** ((1 - bbh) * f1_val * x) * k2r_calc * (1 - theta)
-            term3 = np.e ** ((1 - bbv) * f1_val * x) * k1r * theta
-            term4 = (k2 * theta) / np.e ** (bbh * f1_val * x)
-            return -F * (term1 + term2 + term3 - term4)
+            # k2r/k3r are constrained expressions; the kernel derives them from k1, k1r, k2, k3
+            return _kernel_for(x).full_current(k1, k1r, k2, k3, bbv, bbh)
 
         # choose model
         if model_type.lower() == 'simplified':
@@ -257,30 +578,62 @@ class hydrogen_fitting:
             raise ValueError("model_type must be 'simplified' or 'full'")
 
         HER_model = Model(model_func, independent_vars=['x'])
-        # build parameter set depending on model
+
+        def jacobian(params, data, weights, x=None, **kws):
+            # analytic Jacobian of the residual (data - model) w.r.t. the varying parameters
+            v = params.valuesdict()
+            if self.model_type == 'HER_simplified_fitting':
+                parts = her_simplified_jacobian(x, v['k1'], v['k1r'], v['k2'], v['k2r'], v['bbv'], v['bbh'], f1_val)
+            else:
+                parts = hydrogen_full_jacobian(x, v['k1'], v['k1r'], v['k2'], v['k3'], v['bbv'], v['bbh'], f1_val)
+            names = [n for n, p in params.items() if p.vary and p.expr is None]
+            jac = -np.column_stack([parts[n] for n in names])
+            # nan_policy='omit' drops residual rows where the model is not finite; drop the same rows here
+            ok = np.isfinite(model_func(x, **v))
+            jac = np.nan_to_num(jac[ok], nan=0.0, posinf=0.0, neginf=0.0)
+            if weights is not None:
+                jac = jac * np.asarray(weights, dtype=float)[ok][:, None]
+            return jac
+
+        return HER_model, model_func, jacobian
+
+    def _build_params(self, rng, start=None):
+        """Return the lmfit Parameters for the current model type.
+
+        Starting values come from `start` (a name -> value dict) when given,
+        then from the user's initial values, then from `rnd(rng)`.
+        """
+        start = start or {}
+
+        def _initial(name, fallback):
+            if name in start and start[name] is not None:
+                return float(start[name])
+            v = getattr(self, f'{name}_initial', None)
+            return v if v is not None else fallback
+
         if self.model_type == 'HER_simplified_fitting':
-            rand_params = np.array([rnd() for _ in range(6)])
+            rand_params = np.array([rnd(rng) for _ in range(6)])
             # determine k initial/min/max/vary using user overrides when provided
-            k1_val = self.k1_initial if self.k1_initial is not None else rand_params[0]
-            k1r_val = self.k1r_initial if self.k1r_initial is not None else rand_params[1]
-            k2_val = self.k2_initial if self.k2_initial is not None else rand_params[2]
-            k2r_val = self.k2r_initial if self.k2r_initial is not None else rand_params[3]
+            k1_val = _initial('k1', rand_params[0])
+            k1r_val = _initial('k1r', rand_params[1])
+            k2_val = _initial('k2', rand_params[2])
+            k2r_val = _initial('k2r', rand_params[3])
 
             params = create_params(
                 k1=dict(value=k1_val, min=self.k1_min, max=self.k1_max, vary=self.vary_k1),
                 k1r=dict(value=k1r_val, min=self.k1r_min, max=self.k1r_max, vary=self.vary_k1r),
                 k2=dict(value=k2_val, min=self.k2_min, max=self.k2_max, vary=self.vary_k2),
                 k2r=dict(value=k2r_val, min=self.k2r_min, max=self.k2r_max, vary=self.vary_k2r),
-                bbv=dict(value=self.bbv_initial, min=self.bbv_min, max=self.bbv_max, vary=self.vary_bbv),
-                bbh=dict(value=self.bbh_initial, min=self.bbh_min, max=self.bbh_max, vary=self.vary_bbh)
+                bbv=dict(value=_initial('bbv', 0.5), min=self.bbv_min, max=self.bbv_max, vary=self.vary_bbv),
+                bbh=dict(value=_initial('bbh', 0.5), min=self.bbh_min, max=self.bbh_max, vary=self.vary_bbh)
             )
         else:
             # full model params
-            rand_params = np.array([rnd() for _ in range(8)])
-            k1_val = self.k1_initial if self.k1_initial is not None else rand_params[0]
-            k1r_val = self.k1r_initial if self.k1r_initial is not None else rand_params[1]
-            k2_val = self.k2_initial if self.k2_initial is not None else rand_params[2]
-            k3_val = self.k3_initial if self.k3_initial is not None else rand_params[3]
+            rand_params = np.array([rnd(rng) for _ in range(8)])
+            k1_val = _initial('k1', rand_params[0])
+            k1r_val = _initial('k1r', rand_params[1])
+            k2_val = _initial('k2', rand_params[2])
+            k3_val = _initial('k3', rand_params[3])
 
             params = create_params(
                 k1=dict(value=k1_val, min=self.k1_min, max=self.k1_max, vary=self.vary_k1),
@@ -289,17 +642,276 @@ class hydrogen_fitting:
                 k2r=dict(expr='(k1*k2)/k1r'),
                 k3=dict(value=k3_val, min=self.k3_min, max=self.k3_max, vary=self.vary_k3),
                 k3r=dict(expr='(k3*k1**2)/k1r**2'),
-                bbv=dict(value=self.bbv_initial, min=self.bbv_min, max=self.bbv_max, vary=self.vary_bbv),
-                bbh=dict(value=self.bbh_initial, min=self.bbh_min, max=self.bbh_max, vary=self.vary_bbh)
+                bbv=dict(value=_initial('bbv', 0.5), min=self.bbv_min, max=self.bbv_max, vary=self.vary_bbv),
+                bbh=dict(value=_initial('bbh', 0.5), min=self.bbh_min, max=self.bbh_max, vary=self.vary_bbh)
             )
 
         params._asteval.symtable['x'] = self.potential
+        return params
+
+    def fit_data(self, model_type='simplified', fitting_method='powell', seed=None,
+                 multistart=None, n_jobs=None, start=None, iter_cb=None, progress_interval=0.25):
+        """Fit the loaded data.
+
+        Blank rate-constant initial values are drawn from a generator seeded
+        with `seed` (a fresh seed is drawn when None); the seed used is kept
+        on `self.seed`, so the same data, config and seed reproduce the fit.
+
+        With `multistart=N` (N > 1) the fit is repeated from N starting points
+        spread over the log10 k bounds and the bbv/bbh bounds, on up to
+        `n_jobs` processes; the best candidate is kept and all candidates are
+        stored, ranked by chi-square then AIC, on `self.multistart_results`.
+        `start` maps parameter names to explicit starting values.
+
+        `iter_cb(progress)` is called at most every `progress_interval`
+        seconds with the iteration count, chi-square and parameter values
+        (see `ProgressReporter`); returning True stops the fit early and the
+        result is marked `aborted`. Such partial results are not cached.
+        """
+        if seed is None:
+            seed = new_seed()
+        self.seed = int(seed)
+        try:
+            multistart = int(multistart) if multistart else 0
+        except Exception:
+            multistart = 0
+        progress = iter_cb if isinstance(iter_cb, ProgressReporter) or iter_cb is None \
+            else ProgressReporter(iter_cb, progress_interval)
+        if multistart > 1:
+            return self._fit_multistart(model_type, fitting_method, multistart, n_jobs, progress)
+        if fitting_method in GLOBAL_METHODS:
+            return self._fit_global(model_type, fitting_method, n_jobs, progress)
+
+        rng = random.Random(self.seed)
+        HER_model, model_func, jacobian = self._build_model(model_type)
+        params = self._build_params(rng, start=start)
+
+        fit_kws = {'Dfun': jacobian} if fitting_method in GRADIENT_METHODS else None
 
         # perform fitting (weight omitted for simplicity)
-        self.result_model = HER_model.fit(self.current, params, x=self.potential, method=fitting_method, nan_policy='omit')
+        self.result_model = HER_model.fit(self.current, params, x=self.potential, method=fitting_method,
+                                          nan_policy='omit', fit_kws=fit_kws,
+                                          iter_cb=progress.lmfit_callback() if progress is not None else None)
+        if progress is not None:
+            res = self.result_model
+            progress('local', getattr(res, 'nfev', 0) or 0, getattr(res, 'chisqr', None),
+                     res.params.valuesdict, force=True)
 
         return self.result_model
 
+    def multistart_points(self, model_type, n, seed=None):
+        """Return `n` starting-point dicts from a Latin hypercube over the varying parameters.
+
+        Rate constants are sampled uniformly in log10 between their bounds,
+        bbv/bbh uniformly between theirs. Fixed parameters are left out.
+        """
+        from scipy.stats import qmc
+
+        names = [k for k in RANDOM_START_PARAMS[str(model_type).lower()] if getattr(self, f'vary_{k}', True)]
+        names += [b for b in ('bbv', 'bbh') if getattr(self, f'vary_{b}', True)]
+        if not names:
+            return [{} for _ in range(n)]
+        lo, hi = [], []
+        for name in names:
+            vmin, vmax = getattr(self, f'{name}_min'), getattr(self, f'{name}_max')
+            if name.startswith('k'):
+                vmin, vmax = np.log10(max(vmin, 1e-300)), np.log10(max(vmax, 1e-300))
+            lo.append(vmin)
+            hi.append(max(vmax, vmin))
+        unit = qmc.LatinHypercube(d=len(names), seed=seed).random(n)
+        lo, hi = np.asarray(lo), np.asarray(hi)
+        pts = lo + unit * (hi - lo)
+        out = []
+        for row in pts:
+            out.append({name: (10.0 ** v if name.startswith('k') else float(v)) for name, v in zip(names, row)})
+        return out
+
+    def _fit_multistart(self, model_type, fitting_method, n, n_jobs=None, progress=None):
+        starts = self.multistart_points(model_type, n, seed=self.seed)
+        state = self.__getstate__()
+        tasks = [(state, model_type, fitting_method, start) for start in starts]
+        jobs = resolve_jobs(n_jobs, len(tasks))
+        pool = process_pool(jobs) if jobs > 1 else None
+        candidates = []
+        best = None
+        try:
+            results = pool.map(_multistart_candidate, tasks) if pool is not None else map(_multistart_candidate, tasks)
+            for c in results:
+                candidates.append(c)
+                chi = c.get('chisqr')
+                if chi is not None and np.isfinite(chi) and (best is None or chi < best['chisqr']):
+                    best = c
+                if progress is not None and progress('multistart', len(candidates),
+                                                     best and best['chisqr'], best and best['params'],
+                                                     force=len(candidates) == len(tasks)):
+                    break
+        finally:
+            if pool is not None:
+                # after an early stop, drop the starting points that have not run yet
+                pool.shutdown(wait=True, cancel_futures=True)
+
+        def _rank(c):
+            chi = c.get('chisqr')
+            aic = c.get('aic')
+            bad = chi is None or not np.isfinite(chi)
+            return (bad, chi if not bad else 0.0, aic if aic is not None and np.isfinite(aic) else np.inf)
+
+        candidates.sort(key=_rank)
+        for i, c in enumerate(candidates):
+            c['rank'] = i + 1
+        self.multistart_results = candidates
+        # re-run the winner in this process (from its optimum) to get a full ModelResult
+        best = candidates[0]
+        return self.fit_data(model_type, fitting_method, seed=self.seed, start=best.get('params'), iter_cb=progress)
+
+    def _search_space(self, model_type):
+        """Return (names, lower, upper, fixed) of the global search space.
+
+        Varying rate constants are searched in log10 between their bounds
+        (1e-20 to 1e-2 by default), varying bbv/bbh between theirs; fixed
+        parameters keep their initial value.
+        """
+        model_type = str(model_type).lower()
+        if model_type not in RANDOM_START_PARAMS:
+            raise ValueError("model_type must be 'simplified' or 'full'")
+        names, lo, hi, fixed = [], [], [], {}
+        for name in RANDOM_START_PARAMS[model_type] + ('bbv', 'bbh'):
+            vmin, vmax = getattr(self, f'{name}_min'), getattr(self, f'{name}_max')
+            initial = getattr(self, f'{name}_initial', None)
+            if not getattr(self, f'vary_{name}', True):
+                fixed[name] = initial if initial is not None else (vmin * vmax) ** 0.5 if name.startswith('k') else 0.5
+                continue
+            if name.startswith('k'):
+                vmin, vmax = np.log10(max(vmin, 1e-300)), np.log10(max(vmax, 1e-300))
+            names.append(name)
+            lo.append(float(vmin))
+            hi.append(float(max(vmax, vmin)))
+        return names, lo, hi, fixed
+
+    def _fit_global(self, model_type, fitting_method, n_jobs=None, progress=None):
+        """Global search over the log-space bounds, then a local least_squares polish."""
+        from scipy import optimize
+
+        names, lo, hi, fixed = self._search_space(model_type)
+        objective = _LogSpaceObjective(self.potential, self.current, model_type, names, fixed, self.f1)
+        bounds = list(zip(lo, hi))
+        jobs = resolve_jobs(n_jobs)
+        pool = process_pool(jobs) if jobs > 1 and fitting_method != 'basinhopping' else None
+
+        def pool_map(func, iterable):
+            # one chunk per worker keeps pickling of the objective to a few calls per generation
+            items = list(iterable)
+            return list(pool.map(func, items, chunksize=max(1, -(-len(items) // jobs))))
+
+        steps = [0]
+
+        def report(xk, fun=None):
+            # the objective is scaled by max|y|; report the plain chi-square like lmfit does
+            steps[0] += 1
+            chisqr = (lambda: float(objective(xk)) * objective.scale ** 2) if fun is None else fun * objective.scale ** 2
+            return progress('global', steps[0], chisqr, lambda: objective.values(xk))
+
+        def stop_cb(intermediate_result):
+            return report(intermediate_result.x, intermediate_result.fun)
+        try:
+            if fitting_method == 'differential_evolution':
+                kws = dict(_rng_kw(optimize.differential_evolution, self.seed), polish=False, tol=1e-8)
+                if progress is not None:
+                    kws['callback'] = stop_cb
+                if pool is not None:
+                    # population members are evaluated in parallel on the worker pool
+                    kws.update(workers=pool_map, updating='deferred')
+                else:
+                    # single process: score the whole population in one batched kernel call
+                    kws.update(vectorized=True, updating='deferred')
+                res = optimize.differential_evolution(objective, bounds, **kws)
+            elif fitting_method == 'shgo':
+                kws = {'sampling_method': 'sobol'}
+                if pool is not None and 'workers' in __import__('inspect').signature(optimize.shgo).parameters:
+                    kws['workers'] = pool_map
+                if progress is not None:
+                    # shgo ignores the callback's return value, so it reports but cannot stop early
+                    kws['callback'] = lambda xk: report(xk)
+                res = optimize.shgo(objective, bounds, **kws)
+            else:
+                rng = np.random.default_rng(self.seed)
+                x0 = np.asarray(lo) + rng.random(len(lo)) * (np.asarray(hi) - np.asarray(lo))
+                res = optimize.basinhopping(objective, x0, niter=50, stepsize=0.5,
+                                            minimizer_kwargs={'method': 'L-BFGS-B', 'bounds': bounds},
+                                            callback=(lambda x, f, accept: report(x, f)) if progress is not None else None,
+                                            **_rng_kw(optimize.basinhopping, self.seed))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        best = objective.values(res.x)
+        self.global_search = {
+            'method': fitting_method,
+            'objective': float(res.fun),
+            'nfev': int(getattr(res, 'nfev', 0) or 0),
+            'start': best,
+        }
+        return self.fit_data(model_type, 'least_squares', seed=self.seed, start=best, iter_cb=progress)
+
+    def __getstate__(self):
+        # ModelResult holds local closures and is not picklable; workers refit anyway
+        state = self.__dict__.copy()
+        state['result_model'] = None
+        return state
+
+    FIT_CONFIG_FIELDS = (
+        'area_electrode', 'ohmic_drop', 'ref_correction', 'f1',
+        'bbv_initial', 'bbh_initial', 'vary_bbv', 'vary_bbh', 'bbv_min', 'bbv_max', 'bbh_min', 'bbh_max',
+        'k1_initial', 'k1_min', 'k1_max', 'vary_k1',
+        'k1r_initial', 'k1r_min', 'k1r_max', 'vary_k1r',
+        'k2_initial', 'k2_min', 'k2_max', 'vary_k2',
+        'k2r_initial', 'k2r_min', 'k2r_max', 'vary_k2r',
+        'k3_initial', 'k3_min', 'k3_max', 'vary_k3',
+    )
+
+    def fit_config(self):
+        """Return every input that influences a fit (bounds, initials, vary flags, corrections)."""
+        out = {}
+        for name in self.FIT_CONFIG_FIELDS:
+            v = getattr(self, name, None)
+            if isinstance(v, (np.floating, np.integer)):
+                v = v.item()
+            out[name] = v
+        return out
+
+    def result_payload(self):
+        """Return a plain, serializable snapshot of the current fit (params, stats, derived arrays)."""
+        if self.result_model is None:
+            return None
+        res = self.result_model
+        best_fit = getattr(res, 'best_fit', None)
+        payload = {
+            'model_type': self.model_type,
+            'method': getattr(res, 'method', None),
+            'seed': self.seed,
+            'candidates': self.multistart_results,
+            'global_search': self.global_search,
+            'params': res.params.dumps(),
+            'stats': self.get_stats(),
+            'best_fit': np.asarray(best_fit, dtype=float) if best_fit is not None else None,
+        }
+        try:
+            payload['theta'] = np.asarray(self.compute_theta(), dtype=float)
+        except Exception:
+            payload['theta'] = None
+        _, slope = self.compute_tafel_slope()
+        payload['tafel_slope'] = np.asarray(slope, dtype=float)
+        return payload
+
+    def restore_result(self, payload):
+        """Attach a fit previously captured with `result_payload` without refitting."""
+        self.model_type = payload.get('model_type')
+        self.seed = payload.get('seed')
+        self.multistart_results = payload.get('candidates')
+        self.global_search = payload.get('global_search')
+        self.result_model = FitSnapshot(payload)
+        return self.result_model
+
     def get_results(self):
         if self.result_model is None:
             return None
@@ -346,55 +958,46 @@ class hydrogen_fitting:
 
         f1_val = getattr(self, 'f1', 38.92)
         if x is None:
+            cached = getattr(self.result_model, 'theta', None)
+            if cached is not None:
+                return np.asarray(cached)
             x = np.asarray(self.potential)
         else:
             x = np.asarray(x, dtype=float)
 
-        # Helper: Theta_VH (simplified model) - exact copy from original her_model.py
-        def Theta_VH_local(x_arr, k1, k1r, k2, k2r, bbv, bbh, f1_val=f1_val):
-            theta = (k1/np.e**(bbv*f1_val*x_arr) + np.e**((1 - bbh)*f1_val*x_arr)*k2r) / \
-                    (k1/np.e**(bbv*f1_val*x_arr) + np.e**((1 - bbv)*f1_val*x_arr)*k1r + 
-                     k2/np.e**(bbh*f1_val*x_arr) + np.e**((1 - bbh)*f1_val*x_arr)*k2r)
-            return theta, 1 - theta
-
-        # Helper: Theta_Total (full model) - exact copy from original her_model.py
-        def Theta_Total_local(x_arr, k1, k1r, k2, k2r, k3, k3r, bbv, bbh, f1_val=f1_val):
-            k2r_calc = (k1*k2) / k1r if k1r != 0 else 0.0
-            k3r_calc = (k3*k1**2) / (k1r**2) if k1r != 0 else 0.0
-            A1 = -2*k3 + 2*k3r_calc
-            B1 = (-np.e**((-bbv)*f1_val*x_arr))*k1 - np.e**((1 - bbv)*f1_val*x_arr)*k1r - \
-                 k2/np.e**(bbh*f1_val*x_arr) - np.e**((1 - bbh)*f1_val*x_arr)*k2r_calc - 4*k3r_calc
-            C1 = k1/np.e**(bbv*f1_val*x_arr) + np.e**((1 - bbh)*f1_val*x_arr)*k2r_calc + 2*k3r_calc
-            # guard against negative discriminant
-            disc = B1**2 - (4*A1*C1)
-            disc = np.where(disc < 0, 0.0, disc)
-            theta = (-B1 - np.sqrt(disc)) / (2*A1)
-            return theta, 1 - theta
-
-        # Dispatch based on model type
+        # Dispatch based on model type; the fused kernel computes theta alongside the current
+        kernel = HERKernel(x, f1_val)
         if 'full' in model_type.lower():
-            k1 = _val('k1')
-            k1r = _val('k1r')
-            k2 = _val('k2')
-            k2r = _val('k2r')
-            k3 = _val('k3')
-            k3r = _val('k3r')
-            bbv = _val('bbv')
-            bbh = _val('bbh')
-            theta, _ = Theta_Total_local(x, k1, k1r, k2, k2r, k3, k3r, bbv, bbh, f1_val)
+            _, theta = kernel.full(_val('k1'), _val('k1r'), _val('k2'), _val('k3'), _val('bbv'), _val('bbh'))
             return theta
         elif 'simplified' in model_type.lower():
-            k1 = _val('k1')
-            k1r = _val('k1r')
-            k2 = _val('k2')
-            k2r = _val('k2r')
-            bbv = _val('bbv')
-            bbh = _val('bbh')
-            theta, _ = Theta_VH_local(x, k1, k1r, k2, k2r, bbv, bbh, f1_val)
+            _, theta = kernel.simplified(_val('k1'), _val('k1r'), _val('k2'), _val('k2r'), _val('bbv'), _val('bbh'))
             return theta
         else:
             raise ValueError('Theta available only for full or simplified model fits')
 
+    def evaluate(self, params=None, model_type=None):
+        """Evaluate the model on `self.potential` without fitting.
+
+        `params` overrides the fitted parameter values by name; missing ones
+        come from the last fit. A fresh kernel is bound per call (its scratch
+        buffers must not be shared between concurrent requests on one
+        session). Returns a dict with current, theta and the theoretical
+        Tafel slope (mV/decade).
+        """
+        key = model_key(model_type or self.model_type or 'simplified')
+        values = {}
+        if self.result_model is not None:
+            values.update({n: float(p.value) for n, p in self.result_model.params.items()})
+        values.update({k: float(v) for k, v in (params or {}).items() if k in PARAM_ORDER[key]})
+        missing = [n for n in PARAM_ORDER[key] if n not in values]
+        if missing:
+            raise ValueError(f"Missing parameters for the {key} model: {', '.join(missing)}")
+        kernel = HERKernel(self.potential, self.f1)
+        current, theta = kernel.evaluate(key, values)
+        return {'model_type': key, 'params': {n: values[n] for n in PARAM_ORDER[key]},
+                'current': current, 'theta': theta, 'tafel_slope': tafel_slope(kernel.x, current)}
+
     def compute_tafel_slope(self, x=None, use_fitted=True):
         """Compute local Tafel slope in mV/decade.
 
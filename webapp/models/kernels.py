@@ -0,0 +1,200 @@
+"""Fused evaluation kernels for the HER models.
+
+`HERKernel` binds a potential grid once (caching ``f1*x``) and evaluates
+current and coverage (theta) together in a single pass. Every exponential
+is computed once as ``exp(c*f1*x + log k)`` and shifted by the running
+maximum exponent (log-sum-exp style), so large overpotentials do not
+overflow intermediate terms. Scratch arrays are preallocated on the kernel
+and reused across optimizer iterations; only the returned arrays are new.
+
+Both models share the same four rate terms::
+
+    w1 = k1  * exp(-bbv*a)        w2 = k1r * exp((1-bbv)*a)
+    w3 = k2  * exp(-bbh*a)        w4 = k2r * exp((1-bbh)*a)
+
+with ``a = f1*x``. The simplified model uses them for the current and the
+Volmer-Heyrovsky coverage; the full model builds the coverage quadratic
+from them (with k2r = k1*k2/k1r and k3r = k3*k1**2/k1r**2).
+"""
+import math
+import numpy as np
+
+F = 96485.3
+
+
+# parameter columns of the batch API, per model
+PARAM_ORDER = {
+    'simplified': ('k1', 'k1r', 'k2', 'k2r', 'bbv', 'bbh'),
+    'full': ('k1', 'k1r', 'k2', 'k3', 'bbv', 'bbh'),
+}
+
+
+def _log(v):
+    # scalar log that maps k <= 0 to -inf/nan like np.log, without an errstate context per call
+    if np.ndim(v):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.log(v)
+    if v > 0:
+        return math.log(v)
+    return -math.inf if v == 0 else math.nan
+
+
+def model_key(model):
+    """Map a model name ('simplified', 'HER_simplified_fitting', 'full', ...) to a PARAM_ORDER key."""
+    model = str(model).lower()
+    return 'simplified' if model.startswith('simplified') or 'her_simplified' in model else 'full'
+
+
+class HERKernel:
+    """Current/theta evaluator bound to one potential grid.
+
+    With `rows=M` the kernel evaluates M parameter sets at once: parameters
+    are then (M, 1) column arrays and outputs have shape (M, N).
+    """
+
+    def __init__(self, x, f1=38.92, rows=None):
+        self.x = np.ascontiguousarray(x, dtype=float)
+        self.f1 = float(f1)
+        self.fx = self.f1 * self.x
+        # grid-only factor of the simplified current: e^{2a} - 1
+        self.expm1_2fx = np.expm1(2.0 * self.fx)
+        n = self.x.shape if rows is None else (int(rows),) + self.x.shape
+        self.shape = n
+        # scratch: four rate terms, the running max exponent and one work array
+        self._w = np.empty((4,) + n)
+        self._m = np.empty(n)
+        self._t = np.empty(n)
+        self._theta = np.empty(n)
+        self._c = np.empty(n)
+        self._negb = np.empty(n)
+
+    def _rate_terms(self, k1, k1r, k2, k2r, bbv, bbh):
+        """Fill self._w with exp(u_i - m) and self._m with m = max_i u_i."""
+        w, m, fx = self._w, self._m, self.fx
+        np.multiply(fx, -bbv, out=w[0]); w[0] += _log(k1)
+        np.multiply(fx, 1.0 - bbv, out=w[1]); w[1] += _log(k1r)
+        np.multiply(fx, -bbh, out=w[2]); w[2] += _log(k2)
+        np.multiply(fx, 1.0 - bbh, out=w[3]); w[3] += _log(k2r)
+        np.maximum(w[0], w[1], out=m)
+        np.maximum(m, w[2], out=m)
+        np.maximum(m, w[3], out=m)
+        # rows of -inf (zero rate constants) keep m finite through the other terms
+        np.nan_to_num(m, copy=False, neginf=0.0)
+        w -= m
+        np.exp(w, out=w)
+        return w, m
+
+    def simplified(self, k1, k1r, k2, k2r, bbv, bbh, out=None):
+        """Return (current, theta) of the Volmer-Heyrovsky model."""
+        current, theta = out if out is not None else (np.empty(self.shape), np.empty(self.shape))
+        with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+            w, m = self._rate_terms(k1, k1r, k2, k2r, bbv, bbh)
+            S = self._t
+            np.add(w[0], w[1], out=S); S += w[2]; S += w[3]
+            np.add(w[0], w[3], out=theta); theta /= S
+            # v = 2*k1*k2*(1 - e^{2a})*e^{-bbh a} / D with D = e^{bbh a} * e^{m} * S
+            np.multiply(self.fx, -2.0 * bbh, out=current)
+            current += _log(2.0 * k1 * k2)
+            current -= m
+            np.exp(current, out=current)
+            current /= S
+            current *= self.expm1_2fx
+            current *= F
+        return current, theta
+
+    def full(self, k1, k1r, k2, k3, bbv, bbh, out=None):
+        """Return (current, theta) of the Volmer-Heyrovsky-Tafel model."""
+        current, theta = out if out is not None else (np.empty(self.shape), np.empty(self.shape))
+        if np.ndim(k1r):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                k2r = np.where(k1r != 0, (k1 * k2) / k1r, 0.0)
+                k3r = np.where(k1r != 0, (k3 * k1 ** 2) / (k1r ** 2), 0.0)
+        else:
+            k2r = (k1 * k2) / k1r if k1r != 0 else 0.0
+            k3r = (k3 * k1 ** 2) / (k1r ** 2) if k1r != 0 else 0.0
+        with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+            w, m = self._rate_terms(k1, k1r, k2, k2r, bbv, bbh)
+            t, C, negB = self._t, self._c, self._negb
+            # scale the quadratic A*th^2 + B*th + C = 0 by e^{-m}; the roots are unchanged
+            np.negative(m, out=t); np.exp(t, out=t)            # t = e^{-m}
+            np.multiply(t, 2.0 * k3r, out=C); C += w[0]; C += w[3]
+            np.multiply(t, 4.0 * k3r, out=negB); negB += w[0]; negB += w[1]; negB += w[2]; negB += w[3]
+            # disc = negB^2 - 4*A*C with A = (2*k3r - 2*k3) * e^{-m}
+            disc = t
+            disc *= 4.0 * (2.0 * k3r - 2.0 * k3)
+            disc *= C
+            np.subtract(np.square(negB, out=theta), disc, out=disc)
+            np.maximum(disc, 0.0, out=disc)
+            # theta = (-B - sqrt(disc)) / (2A), written without the cancellation (and valid for A -> 0)
+            np.sqrt(disc, out=disc)
+            disc += negB
+            np.divide(C, disc, out=theta)
+            theta *= 2.0
+            # current = -F * e^{m} * [(w1 + w4)(1 - theta) + (w2 - w3) theta]
+            np.subtract(w[1], w[2], out=current)
+            current -= w[0]; current -= w[3]
+            current *= theta
+            current += w[0]; current += w[3]
+            np.exp(m, out=t)
+            current *= t
+            current *= -F
+        return current, theta
+
+    def simplified_current(self, k1, k1r, k2, k2r, bbv, bbh):
+        """Return a new current array; theta goes to a scratch buffer."""
+        return self.simplified(k1, k1r, k2, k2r, bbv, bbh, out=(np.empty(self.shape), self._theta))[0]
+
+    def full_current(self, k1, k1r, k2, k3, bbv, bbh):
+        """Return a new current array; theta goes to a scratch buffer."""
+        return self.full(k1, k1r, k2, k3, bbv, bbh, out=(np.empty(self.shape), self._theta))[0]
+
+    def evaluate(self, model, params, out=None):
+        """Evaluate `model` ('simplified' or 'full') for a dict of parameter values."""
+        p = params
+        if model_key(model) == 'simplified':
+            return self.simplified(p['k1'], p['k1r'], p['k2'], p['k2r'], p['bbv'], p['bbh'], out=out)
+        return self.full(p['k1'], p['k1r'], p['k2'], p['k3'], p['bbv'], p['bbh'], out=out)
+
+
+def tafel_slope(x, current, axis=-1):
+    """Local Tafel slope (mV/decade) of `current` along `axis` against potential `x`."""
+    x = np.asarray(x, dtype=float)
+    logI = np.log10(np.abs(current) + 1e-30)
+    dlogI = np.gradient(logI, axis=axis)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(dlogI == 0, np.nan, np.gradient(x) / dlogI)
+    return slope * 1000.0
+
+
+def evaluate_batch(params, x, model='simplified', f1=38.92, tafel=False, max_bytes=64 * 2 ** 20):
+    """Evaluate the HER model for many parameter sets on one potential grid.
+
+    params : (M, 6) array with columns in `PARAM_ORDER[model]` order
+             (k1, k1r, k2, k2r|k3, bbv, bbh), or a single (6,) vector.
+    x      : (N,) potential array.
+
+    Returns (current, theta) arrays of shape (M, N), plus the (M, N) Tafel
+    slope in mV/decade when `tafel` is True. Rows are processed in chunks
+    so the kernel's scratch space stays under roughly `max_bytes`.
+    """
+    model = model_key(model)
+    P = np.atleast_2d(np.asarray(params, dtype=float))
+    if P.shape[1] != len(PARAM_ORDER[model]):
+        raise ValueError(f'params must have {len(PARAM_ORDER[model])} columns: {PARAM_ORDER[model]}')
+    x = np.ascontiguousarray(x, dtype=float).ravel()
+    M, N = P.shape[0], x.shape[0]
+    current = np.empty((M, N))
+    theta = np.empty((M, N))
+    # the kernel keeps ~9 scratch rows of N float64 per parameter set
+    rows = int(max(1, min(M, max_bytes // max(1, 9 * 8 * N))))
+    kernel = None
+    for start in range(0, M, rows):
+        stop = min(M, start + rows)
+        if kernel is None or kernel.shape[0] != stop - start:
+            kernel = HERKernel(x, f1, rows=stop - start)
+        cols = [P[start:stop, i:i + 1] for i in range(P.shape[1])]
+        fn = kernel.simplified if model == 'simplified' else kernel.full
+        fn(*cols, out=(current[start:stop], theta[start:stop]))
+    if tafel:
+        return current, theta, tafel_slope(x, current, axis=1)
+    return current, theta
@@ -0,0 +1,411 @@
+"""Fit many data files in one request.
+
+`run_batch` takes uploaded files (zip archives are expanded into their
+members) or paths on disk, with one fit configuration shared by all files
+plus optional per-file overrides. Every file is parsed in the calling
+process, so the upload and dataset stores dedupe repeated files and a bad
+file is reported at once; cached results are returned straight away and
+the remaining fits run on a process pool. One row per file is yielded as
+soon as its fit finishes.
+
+The finished batch is kept in `BATCHES`: the consolidated table
+(`batch_table_csv`) together with every fitted file's fit, theta and
+Tafel tables, from which `batch_zip` streams its CSVs the way
+`webapp.services.export` streams a single fit. `BATCHES` is bounded by
+the bytes of those tables (`THEHER_BATCH_MAX_BYTES`, default 256 MB)
+as well as by count; the newest batch is always kept. Batch fits are not
+put in the shared `SESSIONS` store, which holds far fewer entries than a
+batch has files: the zip would lose the early files and the batch would
+evict other users' sessions. `run_batch(on_fit=...)` hands each fitted
+file to the caller instead (the command-line runner writes its plot
+bundles that way).
+
+`THEHER_BATCH_MAX_FILES` caps the files per batch (default 200).
+Zip members are streamed into the upload store rather than memory;
+`THEHER_BATCH_MAX_MEMBER_MB` (default 256) and `THEHER_BATCH_MAX_TOTAL_MB`
+(default 1024) cap their uncompressed size.
+"""
+import io
+import os
+import csv
+import json
+import time
+import uuid
+import zipfile
+import traceback
+from concurrent.futures import as_completed
+
+from ..utils.parallel import process_pool, resolve_jobs
+from .session_store import SessionStore, value_nbytes
+from .upload_store import UPLOADS
+from .export import CHUNK_ROWS, _StreamBuffer, _csv_member
+from . import fitting_service
+
+STAT_COLUMNS = ('chisqr', 'redchi', 'aic', 'bic', 'nfree')
+
+
+def _env_number(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except Exception:
+        return default
+
+
+MAX_FILES = int(_env_number('THEHER_BATCH_MAX_FILES', 200))
+# uncompressed size caps for zip members, per member and per batch
+MAX_MEMBER_BYTES = int(_env_number('THEHER_BATCH_MAX_MEMBER_MB', 256) * 2 ** 20)
+MAX_TOTAL_BYTES = int(_env_number('THEHER_BATCH_MAX_TOTAL_MB', 1024) * 2 ** 20)
+# finished batches (batch id -> {'table': rows, 'bundles': {file: export tables or error}})
+# for the table and zip downloads
+BATCHES = SessionStore(max_entries=16, ttl=_env_number('THEHER_SESSION_TTL', 1800.0),
+                       max_bytes=_env_number('THEHER_BATCH_MAX_BYTES', 256 * 2 ** 20),
+                       # entry -> bundles -> file -> table -> (columns, arrays) -> array
+                       sizer=lambda entry: value_nbytes(entry, depth=6))
+
+
+class _LimitedReader:
+    """Read a zip member, failing once more than `limit` bytes came out (declared sizes can lie)."""
+
+    def __init__(self, fp, limit, name):
+        self.fp = fp
+        self.limit = limit
+        self.name = name
+        self.size = 0
+
+    def read(self, n=-1):
+        block = self.fp.read(n)
+        self.size += len(block)
+        if self.size > self.limit:
+            raise ValueError(f'{self.name} is larger than {self.limit // 2 ** 20} MB uncompressed')
+        return block
+
+
+def _is_zip(upload):
+    name = str(getattr(upload, 'name', '') or '')
+    if name.lower().endswith('.zip'):
+        return True
+    try:
+        pos = upload.tell()
+        head = upload.read(4)
+        upload.seek(pos)
+        return head == b'PK\x03\x04'
+    except Exception:
+        return False
+
+
+def expand_uploads(uploads, store=None):
+    """Return [(name, source)] with zip archives replaced by their data members.
+
+    `source` is the upload itself, or for a zip member the path it was
+    streamed to in the upload store, so a member is never held in memory
+    whole. Members over `MAX_MEMBER_BYTES` and archives expanding to more
+    than `MAX_TOTAL_BYTES` are refused.
+    """
+    store = UPLOADS if store is None else store
+    items = []
+    total = 0
+    for upload in uploads:
+        if not _is_zip(upload):
+            items.append((os.path.basename(str(getattr(upload, 'name', '') or f'file{len(items) + 1}')), upload))
+            continue
+        with zipfile.ZipFile(upload) as z:
+            members = [info for info in z.infolist()
+                       # skip folders and macOS/hidden metadata entries
+                       if not (info.is_dir() or not os.path.basename(info.filename)
+                               or os.path.basename(info.filename).startswith('.')
+                               or info.filename.startswith('__MACOSX/'))]
+            if len(items) + len(members) > MAX_FILES:
+                raise ValueError(f'Too many files in one batch ({len(items) + len(members)} > {MAX_FILES})')
+            for info in members:
+                if info.file_size > MAX_MEMBER_BYTES:
+                    raise ValueError(f'{info.filename} is larger than {MAX_MEMBER_BYTES // 2 ** 20} MB uncompressed')
+                total += info.file_size
+                if total > MAX_TOTAL_BYTES:
+                    raise ValueError(f'Archive expands to more than {MAX_TOTAL_BYTES // 2 ** 20} MB')
+                with z.open(info) as fp:
+                    path, _ = store.save(_LimitedReader(fp, MAX_MEMBER_BYTES, info.filename))
+                items.append((info.filename, path))
+    if len(items) > MAX_FILES:
+        raise ValueError(f'Too many files in one batch ({len(items)} > {MAX_FILES})')
+    return items
+
+
+def _unique(items):
+    # two uploads called data.csv get distinct table rows: data.csv, data.csv#2
+    seen = {}
+    out = []
+    for name, upload in items:
+        seen[name] = seen.get(name, 0) + 1
+        out.append((name if seen[name] == 1 else f'{name}#{seen[name]}', upload))
+    return out
+
+
+def _as_dict(form):
+    if form is None:
+        return {}
+    if hasattr(form, 'dict'):
+        return form.dict()
+    return dict(form)
+
+
+def file_configs(form):
+    """Return the per-file overrides from the `configs` JSON field ({file name: {field: value}})."""
+    raw = fitting_service._form_get(form, 'configs')
+    if not raw:
+        return {}
+    configs = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+    if not isinstance(configs, dict):
+        raise ValueError('configs must map file names to form fields')
+    return configs
+
+
+def _file_form(shared, override):
+    form = dict(shared)
+    form.pop('configs', None)
+    for k, v in (override or {}).items():
+        if isinstance(v, bool):
+            form[k] = 'true' if v else 'false'
+        elif v is not None:
+            form[k] = str(v)
+    return form
+
+
+def _fit_task(task):
+    """Process-pool worker: fit one file and return the plain result payload."""
+    name, fitter, model_type, fitting_method, seed, multistart = task
+    try:
+        fitter.fit_data(model_type=model_type, fitting_method=fitting_method, seed=seed, multistart=multistart)
+        return name, 'ok', fitter.result_payload()
+    except Exception as e:
+        return name, 'error', f'{e}\n{traceback.format_exc()}'
+
+
+def table_row(name, summary):
+    """Flatten a /fit summary into one row of the consolidated table."""
+    row = {'file': name, 'success': bool(summary.get('success')), 'model_type': summary.get('model_type'), 'cached': summary.get('cached'),
+           'n_points': summary.get('n_points'), 'error': summary.get('error')}
+    row.update(summary.get('parameters') or {})
+    for k in STAT_COLUMNS:
+        row[k] = (summary.get('stats') or {}).get(k)
+    return row
+
+
+def _finish(name, fitter, on_fit=None):
+    row = table_row(name, fitting_service.fit_summary(None, fitter))
+    if on_fit is not None:
+        on_fit(name, fitter)
+    return row
+
+
+def _bundle_keeper(bundles):
+    """Return an `on_fit` callback keeping each file's export tables (or why they failed) in `bundles`."""
+    def keep(name, fitter):
+        try:
+            bundles[name] = fitting_service.export_tables(fitter)
+        except Exception as e:
+            traceback.print_exc()
+            bundles[name] = str(e) or type(e).__name__
+    return keep
+
+
+def _failed(name, error):
+    return {'file': name, 'success': False, 'error': str(error)}
+
+
+def plan_fit(name, fitter, cfg, cache, on_fit=None):
+    """Return (row, None) for a cached result, else (None, pending) for `fit_pending`.
+
+    `on_fit(name, fitter)` is called with the fitted file, here for a cached
+    result and in `fit_pending` otherwise.
+    """
+    model_type = cfg.get('model_type', 'simplified')
+    fitting_method = cfg.get('fitting_method', 'powell')
+    key, seed, multistart = fitting_service.fit_plan(fitter, model_type, fitting_method,
+                                                     fitting_service._to_seed(cfg.get('seed')),
+                                                     fitting_service._to_seed(cfg.get('multistart')), cache)
+    payload = cache.get(key) if key is not None else None
+    if payload is not None:
+        fitter.restore_result(payload)
+        fitter.cache_hit = True
+        return _finish(name, fitter, on_fit), None
+    return None, (fitter, key, (name, fitter, model_type, fitting_method, seed, multistart))
+
+
+def fit_pending(todo, n_jobs=None, cache=None, on_fit=None):
+    """Fit the `plan_fit` entries of `todo` ({name: pending}) and yield (name, row) as each finishes.
+
+    Runs on a process pool of `resolve_jobs(n_jobs)` workers, or inline when
+    that is one.
+    """
+    if not todo:
+        return
+    cache = fitting_service.RESULT_CACHE if cache is None else cache
+    jobs = resolve_jobs(n_jobs, len(todo))
+    tasks = [t for _, _, t in todo.values()]
+    pool = process_pool(jobs) if jobs > 1 else None
+    try:
+        results = (f.result() for f in as_completed([pool.submit(_fit_task, t) for t in tasks])) \
+            if pool is not None else map(_fit_task, tasks)
+        for name, kind, value in results:
+            fitter, key, _ = todo[name]
+            if kind != 'ok':
+                yield name, _failed(name, value.split('\n', 1)[0])
+                continue
+            try:
+                fitter.restore_result(value)
+                fitter.cache_hit = False
+                if key is not None:
+                    cache.set(key, value)
+                yield name, _finish(name, fitter, on_fit)
+            except Exception as e:
+                yield name, _failed(name, e)
+    finally:
+        if pool is not None:
+            # the client went away: drop the fits that have not started
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def run_batch(form, uploads=None, paths=None, n_jobs=None, cache=None, on_fit=None, datasets=True):
+    """Fit every file and yield events: `start`, one `file` row per file as it finishes, then `done`.
+
+    The `done` event carries the batch id and the full table in file order.
+    Each fitted file's export tables are kept with the batch for `batch_zip`,
+    unless `on_fit(name, fitter)` is given: it is then called with every
+    fitted file before its `file` event and nothing is kept. `datasets=False`
+    parses every file directly instead of going through the dataset store.
+    """
+    started = time.perf_counter()
+    cache = fitting_service.RESULT_CACHE if cache is None else cache
+    shared = _as_dict(form)
+    configs = file_configs(form)
+    items = _unique(expand_uploads(uploads or []) + [(p, p) for p in (paths or [])])
+    if not items:
+        raise ValueError('No data files in the batch')
+    batch_id = uuid.uuid4().hex
+    yield {'event': 'start', 'batch_id': batch_id, 'files': [name for name, _ in items]}
+
+    bundles = {}
+    if on_fit is None:
+        on_fit = _bundle_keeper(bundles)
+    rows = {}
+    todo = {}
+    # zip members stay in the upload store until every file is parsed, whatever other requests sweep
+    with UPLOADS.lease(*(source for _, source in items if isinstance(source, str))):
+        for name, source in items:
+            cfg = _file_form(shared, configs.get(name) or configs.get(os.path.basename(name)))
+            try:
+                # paths on disk and stored zip members are read by path, uploads through the upload store
+                if isinstance(source, str):
+                    cfg['file_path'] = source
+                fitter = fitting_service.build_fitter_from_request(
+                    cfg, None if isinstance(source, str) else {'datafile': source}, datasets=datasets)
+                row, pending = plan_fit(name, fitter, cfg, cache, on_fit)
+                if pending is not None:
+                    todo[name] = pending
+                    continue
+                rows[name] = row
+            except Exception as e:
+                rows[name] = _failed(name, e)
+            yield dict(rows[name], event='file')
+
+    for name, row in fit_pending(todo, n_jobs, cache, on_fit):
+        rows[name] = row
+        yield dict(row, event='file')
+
+    table = [rows[name] for name, _ in items if name in rows]
+    BATCHES.put({'table': table, 'bundles': bundles}, batch_id)
+    yield {'event': 'done', 'batch_id': batch_id, 'n_files': len(table),
+           'n_failed': sum(1 for r in table if not r.get('success')), 'table': table,
+           'elapsed_ms': (time.perf_counter() - started) * 1000.0}
+
+
+def fit_files(paths, form=None, n_jobs=None):
+    """Python API: fit the data files at `paths` and return the consolidated table (a list of rows)."""
+    for event in run_batch(form or {}, paths=list(paths), n_jobs=n_jobs):
+        if event['event'] == 'done':
+            return event['table']
+    return []
+
+
+def stream_batch(form, uploads, n_jobs=None):
+    """`run_batch` as NDJSON lines (one JSON object per line) for a streaming response."""
+    try:
+        for event in run_batch(form, uploads, n_jobs=n_jobs):
+            yield json.dumps(event, default=str) + '\n'
+    except Exception as e:
+        yield json.dumps({'event': 'error', 'success': False, 'error': str(e)}) + '\n'
+
+
+def table_columns(table):
+    cols = ['file', 'success', 'model_type', 'n_points']
+    for row in table:
+        for k in row:
+            if k not in cols and k not in STAT_COLUMNS and k not in ('cached', 'error'):
+                cols.append(k)
+    return cols + list(STAT_COLUMNS) + ['cached', 'error']
+
+
+def batch_table_csv(table):
+    """Return the consolidated table as CSV text (one row per file)."""
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=table_columns(table), extrasaction='ignore')
+    writer.writeheader()
+    for row in table:
+        writer.writerow(row)
+    return buf.getvalue()
+
+
+def bundle_stem(name, taken):
+    """Folder name for a table row: 'data.csv' -> 'data', 'data.csv#2' -> 'data_2', unique within `taken`."""
+    base, _, n = name.partition('#')
+    stem = os.path.splitext(base)[0] + (f'_{n}' if n else '')
+    candidate, i = stem, 1
+    # 'data.csv' and 'data.txt' would share a stem
+    while candidate in taken:
+        i += 1
+        candidate = f'{stem}_{i}'
+    taken.add(candidate)
+    return candidate
+
+
+def batch_table(batch_id):
+    """Return the consolidated table (list of rows) of a finished batch, or None if unknown."""
+    entry = BATCHES.get(batch_id)
+    return None if entry is None else entry['table']
+
+
+def batch_zip(batch_id, chunk_rows=CHUNK_ROWS):
+    """Return a generator of ZIP bytes with the table plus each file's fit, theta and Tafel CSVs; None if unknown.
+
+    Members are written one after the other into a write-only buffer and
+    yielded as they are compressed, so the archive is never held whole. A
+    fitted file whose tables could not be built gets an `ERROR.txt` in its
+    folder instead, so no successful row goes missing silently.
+    """
+    entry = BATCHES.get(batch_id)
+    if entry is None:
+        return None
+    return (chunk for chunk in _iter_batch_zip(entry['table'], entry['bundles'], chunk_rows) if chunk)
+
+
+def _iter_batch_zip(table, bundles, chunk_rows):
+    buf = _StreamBuffer()
+    with zipfile.ZipFile(buf, 'w', compression=zipfile.ZIP_DEFLATED) as z:
+        z.writestr('batch_results.csv', batch_table_csv(table))
+        yield buf.drain()
+        stems = set()
+        for row in table:
+            if not row.get('success'):
+                continue
+            stem = bundle_stem(row['file'], stems)
+            tables = bundles.get(row['file'])
+            try:
+                if not isinstance(tables, dict):
+                    raise ValueError(tables or 'plot tables were not kept for this file')
+                for name, (columns, arrays) in tables.items():
+                    yield from _csv_member(z, buf, f'{stem}/{name}.csv', columns, arrays, chunk_rows)
+            except Exception as e:
+                z.writestr(f'{stem}/ERROR.txt', f'No fit, theta or Tafel tables for {row["file"]}: {e}\n')
+                yield buf.drain()
+    # the central directory is written on close
+    yield buf.drain()
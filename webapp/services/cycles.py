@@ -0,0 +1,145 @@
+"""Per-cycle fits of multi-sweep data files.
+
+`fit_segments` splits the request's data (same form as /fit) into sweeps
+with `webapp.utils.segments`, builds one fitter per kept segment from its
+raw columns (so the ohmic, reference and area corrections are applied as
+for a whole file) and fits them in parallel through the batch helpers.
+The file is parsed once into blocks, which the dataset store keeps for
+later requests on the same bytes. Segment fits only live in the response:
+they are not put in the shared session store, where a file with many
+cycles would evict other sessions.
+The response lists the parameters and stats per segment in file order plus
+`drift`, each parameter as a series over the segments, to follow activity
+across an accelerated durability test.
+
+Extra form fields: `branch` ('cathodic' (default), 'anodic' or 'all'),
+`min_points` (shortest segment fitted, default 5), `reversal_tol`
+(hysteresis in V, default 1% of the potential span) and `jobs`.
+"""
+import os
+import time
+import traceback
+import numpy as np
+
+from ..models.hydrogen import hydrogen_fitting
+from ..models.kernels import PARAM_ORDER
+from ..utils.datasets import file_digest
+from ..utils.parsers import ParsedColumns
+from ..utils.segments import CATHODIC, ANODIC, parse_blocks, split_blocks, segments
+from . import fitting_service
+from .dataset_store import DATASETS
+from .session_store import SESSIONS
+from .upload_store import UPLOADS
+from .batch import plan_fit, fit_pending, _as_dict, _failed
+
+# sweep direction labels; 0 is a run that never moved by more than the reversal tolerance
+DIRECTIONS = {CATHODIC: 'cathodic', ANODIC: 'anodic', 0: 'flat'}
+# parameters (either model) and fit quality followed across segments
+DRIFT_FIELDS = tuple(dict.fromkeys(PARAM_ORDER['simplified'] + PARAM_ORDER['full'])) + ('chisqr', 'redchi')
+
+
+def _to_float(v, default=None):
+    try:
+        return float(v) if v not in (None, '') else default
+    except Exception:
+        return default
+
+
+def _column(v, default):
+    # form columns are 1-based, as in hydrogen_fitting
+    try:
+        return int(v) - 1
+    except Exception:
+        return default
+
+
+def stored_blocks(path, delimiter, cols, digest=None):
+    """Return the numeric blocks of `path`, parsing it only when the dataset store does not have them."""
+    key = None
+    if DATASETS is not None:
+        try:
+            key = DATASETS.key_for(digest or file_digest(path), delimiter, cols, kind='blocks')
+            hit = DATASETS.get(key)
+            if hit is not None:
+                return split_blocks(hit)
+        except Exception:
+            traceback.print_exc()
+            key = None
+    parsed = parse_blocks(path, delimiter, *cols)
+    if key is not None:
+        try:
+            DATASETS.put(key, parsed, {'source': os.path.basename(path)})
+        except Exception:
+            # the store is an accelerator only
+            traceback.print_exc()
+    return split_blocks(parsed)
+
+
+def request_blocks(form, files, params):
+    """Return the [current, potential] blocks of a /fit-style request, parsing its file at most once."""
+    arrays = fitting_service._form_arrays(form)
+    if arrays is not None:
+        # inline arrays: no text separators, only sweep reversals
+        return [ParsedColumns.from_arrays(arrays[1], arrays[0]).select(0, 1)]
+    uploaded = files.get('datafile') if files is not None else None
+    path, digest = fitting_service._save_uploaded_file(uploaded) if uploaded else (None, None)
+    if not path and fitting_service._form_get(form, 'file_path'):
+        path = os.path.abspath(fitting_service._form_get(form, 'file_path'))
+    if path and os.path.exists(path):
+        cols = (_column(params.get('current_col'), 0), _column(params.get('potential_col'), 1))
+        with UPLOADS.lease(path):
+            return stored_blocks(path, params.get('delimiter'), cols, digest)
+    previous = None if uploaded else SESSIONS.get(fitting_service._form_get(form, 'warm_start'))
+    if previous is not None and previous._raw is not None:
+        # refit of a stored session: its raw columns, no parsing
+        return [np.asarray(previous._raw)]
+    raise ValueError('No data file provided')
+
+
+def split_request(form, files):
+    """Return (segments, fit params) for a /fit-style request."""
+    params = fitting_service.form_fit_params(form)
+    blocks = request_blocks(form, files, params)
+    segs = segments(blocks, branch=fitting_service._form_get(form, 'branch') or 'cathodic',
+                    min_points=int(_to_float(fitting_service._form_get(form, 'min_points'), 5)),
+                    tol=_to_float(fitting_service._form_get(form, 'reversal_tol')))
+    return segs, params
+
+
+def fit_segments(form, files, n_jobs=None, cache=None):
+    try:
+        started = time.perf_counter()
+        cache = fitting_service.RESULT_CACHE if cache is None else cache
+        segs, params = split_request(form, files)
+        if not segs:
+            return {'success': False, 'error': 'No sweep segment with enough points in the data'}
+        cfg = _as_dict(form)
+        rows, todo = {}, {}
+        for i, seg in enumerate(segs):
+            name = f'segment{i + 1}'
+            try:
+                fitter = hydrogen_fitting.from_arrays(seg['data'][:, 1], seg['data'][:, 0], **params)
+                row, pending = plan_fit(name, fitter, cfg, cache)
+                if pending is not None:
+                    todo[name] = pending
+                else:
+                    rows[name] = row
+            except Exception as e:
+                rows[name] = _failed(name, e)
+        for name, row in fit_pending(todo, n_jobs or fitting_service._form_get(form, 'jobs'), cache):
+            rows[name] = row
+
+        table = []
+        for i, seg in enumerate(segs):
+            row = dict(rows[f'segment{i + 1}'], segment=i + 1, block=seg['block'] + 1,
+                       direction=DIRECTIONS[seg['direction']],
+                       start=seg['start'], stop=seg['stop'],
+                       potential_start=float(seg['data'][0, 1]), potential_end=float(seg['data'][-1, 1]))
+            row.pop('file', None)
+            table.append(row)
+        names = [k for k in DRIFT_FIELDS if any(k in r for r in table)]
+        drift = {k: [r.get(k) for r in table] for k in names}
+        return {'success': True, 'n_segments': len(table), 'segments': table, 'drift': drift,
+                'elapsed_ms': (time.perf_counter() - started) * 1000.0}
+    except Exception as e:
+        return {'success': False, 'error': str(e), 'traceback': traceback.format_exc()}
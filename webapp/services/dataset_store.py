@@ -0,0 +1,95 @@
+"""Content-addressed store of parsed datasets in binary form.
+
+Each data file is parsed once; its numeric columns are saved with
+`webapp.utils.datasets.save_dataset` under a key made of the file's sha256
+and the delimiter setting. Later requests for the same bytes memory-map
+`columns.npy` instead of parsing the text again. Streamed uploads that kept
+only the chosen column pair are stored under a key that also names the
+pair.
+
+Configured with `THEHER_DATASET_DIR` (default `webapp/uploads/datasets`);
+`THEHER_DATASET_STORE=off` disables it. The upload store's quota and
+age sweep covers this store too and runs after writes here as well.
+"""
+import os
+import hashlib
+import threading
+
+from ..utils.datasets import save_dataset, load_dataset, META_FILE
+from ..utils.parsers import normalize_delimiter
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+class DatasetStore:
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        # the UploadStore enforcing the disk quota over both stores (set by it), if any
+        self.quota = None
+
+    @staticmethod
+    def key_for(digest, delimiter='auto', columns=None, kind=None):
+        sep = normalize_delimiter(delimiter)
+        tag = 'auto' if sep is None else hashlib.sha1(sep.encode('utf-8')).hexdigest()[:8]
+        key = f'{digest}-{tag}'
+        if columns is not None:
+            key += '-c' + '_'.join(str(int(c)) for c in columns)
+        if kind:
+            # other parses of the same file, e.g. 'blocks' for webapp.utils.segments
+            key += f'-{kind}'
+        return key
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def __contains__(self, key):
+        return os.path.exists(os.path.join(self.path(key), META_FILE))
+
+    def get(self, key):
+        """Return the memory-mapped ParsedColumns for `key`, or None."""
+        path = self.path(key)
+        try:
+            # recency for the upload store's LRU sweep; touched first, so a sweep running
+            # meanwhile sees a fresh entry and leaves it alone
+            os.utime(path)
+        except OSError:
+            pass
+        try:
+            parsed = load_dataset(path)
+        except (OSError, ValueError):
+            parsed = None
+        with self._lock:
+            if parsed is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return parsed
+
+    def put(self, key, parsed, meta=None):
+        path = save_dataset(self.path(key), parsed, meta)
+        with self._lock:
+            self.stored += 1
+        if self.quota is not None:
+            try:
+                self.quota.added(parsed.data.nbytes, keep=path)
+            except Exception:
+                pass
+        return path
+
+    def stats(self):
+        with self._lock:
+            return {'root': self.root, 'hits': self.hits, 'misses': self.misses, 'stored': self.stored}
+
+
+def _build_default_store():
+    if os.environ.get('THEHER_DATASET_STORE', 'on').lower() in ('off', 'none', '0', 'false'):
+        return None
+    root = os.environ.get('THEHER_DATASET_DIR') or os.path.join(BASE_DIR, 'uploads', 'datasets')
+    return DatasetStore(root)
+
+
+DATASETS = _build_default_store()
@@ -0,0 +1,124 @@
+"""Streaming export bundles of one fit.
+
+`export_request` fits once (or reuses `session_id`), then `iter_zip`
+writes the archive member by member into a write-only buffer. It yields
+the compressed bytes as they are produced, so the view can hand the
+generator to a StreamingHttpResponse. The archive never sits in memory
+whole, and the first bytes leave before the last table is formatted.
+zipfile writes data descriptors when the output is not seekable, so
+member sizes need not be known up front.
+
+CSV tables are formatted by `fitting_service.csv_rows` (shortest
+round-trip repr of each value) in blocks of `CHUNK_ROWS` rows.
+`formats` adds to the bundle:
+- `npz`: every curve in one compressed NumPy archive;
+- `parquet`: one file per table; needs pyarrow or fastparquet;
+- `png` and `svg`: the three plots, via webapp.services.rendering.
+
+A `summary.json` with the fitted parameters and statistics is always
+included.
+"""
+import io
+import json
+import zipfile
+import numpy as np
+
+from . import fitting_service
+
+EXPORT_FORMATS = ('csv', 'npz', 'parquet', 'png', 'svg')
+CHUNK_ROWS = 65536
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Write-only sink that hands its bytes to the generator on `drain`."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def export_formats(form):
+    """Return the formats requested in `formats` (comma-separated or repeated; default csv)."""
+    raw = form.getlist('formats') if hasattr(form, 'getlist') else fitting_service._form_get(form, 'formats')
+    if isinstance(raw, (list, tuple)):
+        raw = ','.join(raw)
+    raw = raw or 'csv'
+    formats = [f.strip().lower() for f in str(raw).split(',') if f.strip()]
+    unknown = [f for f in formats if f not in EXPORT_FORMATS]
+    if unknown:
+        raise ValueError(f'Unknown export format(s) {unknown}; expected some of {EXPORT_FORMATS}')
+    if 'parquet' in formats:
+        import pandas as pd
+        try:
+            pd.io.parquet.get_engine('auto')
+        except ImportError as e:
+            raise ValueError('Parquet export needs pyarrow or fastparquet installed') from e
+    return list(dict.fromkeys(formats))
+
+
+def _csv_member(z, buf, name, columns, arrays, chunk_rows):
+    data = np.column_stack(arrays)
+    with z.open(name, 'w') as member:
+        member.write((','.join(columns) + '\n').encode('ascii'))
+        for start in range(0, data.shape[0], chunk_rows):
+            member.write(fitting_service.csv_rows(data[start:start + chunk_rows]).encode('ascii'))
+            yield buf.drain()
+
+
+def _parquet_bytes(columns, arrays):
+    import pandas as pd
+    out = io.BytesIO()
+    pd.DataFrame(dict(zip(columns, arrays))).to_parquet(out, index=False)
+    return out.getvalue()
+
+
+def iter_zip(fitter, session_id=None, formats=('csv',), chunk_rows=CHUNK_ROWS):
+    """Yield the bytes of a ZIP bundle of one fitted session, member by member."""
+    buf = _StreamBuffer()
+    tables = fitting_service.export_tables(fitter)
+    with zipfile.ZipFile(buf, 'w', compression=zipfile.ZIP_DEFLATED) as z:
+        summary = fitting_service.fit_summary(session_id, fitter)
+        z.writestr('summary.json', json.dumps(summary, indent=2, default=str))
+        yield buf.drain()
+        if 'csv' in formats:
+            for name, (columns, arrays) in tables.items():
+                yield from _csv_member(z, buf, f'{name}.csv', columns, arrays, chunk_rows)
+        if 'npz' in formats:
+            curves = fitting_service.analysis_curves(fitter)
+            with z.open('curves.npz', 'w') as member:
+                np.savez_compressed(member, **{k: v for k, v in curves.items() if v is not None})
+            yield buf.drain()
+        if 'parquet' in formats:
+            for name, (columns, arrays) in tables.items():
+                z.writestr(f'{name}.parquet', _parquet_bytes(columns, arrays))
+                yield buf.drain()
+        for fmt in ('png', 'svg'):
+            if fmt in formats:
+                for kind, image in fitting_service.plot_images(fitter, fmt=fmt).items():
+                    z.writestr(f'{kind}.{fmt}', image)
+                    yield buf.drain()
+    # the central directory is written on close
+    yield buf.drain()
+
+
+def export_request(form, files):
+    """Validate `formats`, fit once and return (file name, byte chunk generator) for the export.
+
+    Errors in the form or the fit are raised here, before any bytes are
+    streamed.
+    """
+    formats = export_formats(form)
+    session_id, fitter = fitting_service.fit_from_request(form, files)
+    return 'plots.zip', (chunk for chunk in iter_zip(fitter, session_id, formats) if chunk)
@@ -1,12 +1,25 @@
 import os
 import io
 import re
+import json
+import base64
+import time
+import uuid
+import queue
+import threading
 import traceback
 import numpy as np
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-from ..models.hydrogen import hydrogen_fitting
+import pandas as pd
+from ..models.hydrogen import hydrogen_fitting, new_seed, GLOBAL_METHODS
+from .session_store import SESSIONS
+from .result_cache import RESULT_CACHE, fit_cache_key
+from .dataset_store import DATASETS
+from .upload_store import UPLOADS
+from . import rendering
+from ..utils.parsers import normalize_delimiter, parse_columns
+from ..utils.datasets import file_digest
+from ..utils.decimate import decimate, METHODS as DECIMATION_METHODS
+from ..utils.payloads import _finite_list, encode_arrays, pack_arrays, data_format, BINARY_CONTENT_TYPE
 
 def secure_filename(filename):
     """Sanitize filename to prevent directory traversal attacks."""
@@ -19,79 +32,20 @@ def secure_filename(filename):
         filename = '_' + filename
     return filename or 'unnamed'
 
-UPLOAD_DIR = os.path.join(os.path.dirname(__file__), '..', 'uploads')
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
 
 def _save_uploaded_file(file_storage):
+    """Store an upload in the content-addressed upload store; returns (path, sha256) or (None, None)."""
     if not file_storage:
-        return None
-    # Support both Flask's FileStorage and Django's UploadedFile
-    filename = getattr(file_storage, 'filename', None) or getattr(file_storage, 'name', None) or ''
-    filename = secure_filename(filename)
-    if not filename:
-        return None
-    path = os.path.join(UPLOAD_DIR, filename)
-
-    # If the object supports a .save(path) method (Flask FileStorage), use it.
+        return None, None
     try:
-        save_fn = getattr(file_storage, 'save', None)
-        if callable(save_fn):
-            # Some frameworks accept a path, others expect a file-like object.
-            try:
-                file_storage.save(path)
-                return path
-            except TypeError:
-                # Maybe expects a file object
-                with open(path, 'wb') as f:
-                    save_fn(f)
-                return path
+        return UPLOADS.save(file_storage, digest=getattr(file_storage, 'content_digest', None))
     except Exception:
-        pass
+        traceback.print_exc()
+        return None, None
 
-    # Fallback: write bytes from .read() or iterate .chunks() (Django UploadedFile)
-    try:
-        # Django UploadedFile provides chunks() for potentially large uploads
-        if hasattr(file_storage, 'chunks'):
-            with open(path, 'wb') as destination:
-                for chunk in file_storage.chunks():
-                    destination.write(chunk)
-            return path
-        # file-like object with read()
-        data = None
-        if hasattr(file_storage, 'read'):
-            data = file_storage.read()
-        elif isinstance(file_storage, (bytes, bytearray)):
-            data = file_storage
-        if data is not None:
-            # If data is text, encode to bytes
-            if isinstance(data, str):
-                data = data.encode('utf-8')
-            with open(path, 'wb') as f:
-                f.write(data)
-            return path
-    except Exception:
-        pass
-
-    return None
-
-
-def build_fitter_from_request(form, files):
-    # Save uploaded file (if any) and assemble kwargs for hydrogen_fitting
-    uploaded = files.get('datafile') if files is not None else None
-    # Accept any file-like uploaded object (Flask FileStorage, Django UploadedFile, or plain file)
-    saved_path = _save_uploaded_file(uploaded) if uploaded else None
-    # Debug: log upload info for Django/Flask environments
-    try:
-        print(f"[fitting_service] uploaded object: {type(uploaded)} filename={getattr(uploaded, 'name', getattr(uploaded, 'filename', None))} saved_path={saved_path}")
-    except Exception:
-        pass
-    # allow file_path override
-    if (not saved_path) and form.get('file_path'):
-        fp = os.path.abspath(form.get('file_path'))
-        if os.path.exists(fp):
-            saved_path = fp
 
+def form_fit_params(form):
+    """Return the hydrogen_fitting keyword arguments (except the data source) for a /fit form."""
     # collect params with defensive numeric coercion
     def _to_float(v, default=None):
         try:
@@ -100,7 +54,6 @@ def build_fitter_from_request(form, files):
             return default
 
     params = dict(
-        file_path=saved_path,
         area_electrode=form.get('area_electrode'),
         ohmic_drop=_to_float(form.get('ohmic_drop'), 0.0),
         ref_correction=_to_float(form.get('ref_correction'), None),
@@ -164,22 +117,426 @@ def build_fitter_from_request(form, files):
                 params['delimiter'] = ';'
     except Exception:
         pass
+    return params
+
+
+def build_fitter_from_request(form, files, datasets=True):
+    # Save uploaded file (if any) and assemble kwargs for hydrogen_fitting;
+    # datasets=False parses the file directly, without reading or writing the dataset store (one-shot runs)
+    arrays = _form_arrays(form)
+    uploaded = files.get('datafile') if files is not None and arrays is None else None
+    if arrays is None and not uploaded and not form.get('file_path'):
+        previous = SESSIONS.get(_form_get(form, 'warm_start'))
+        if previous is not None:
+            # refit of a stored session with new corrections/bounds: reuse its raw columns, no parsing
+            return previous.reprocess(**form_fit_params(form))
+    # Accept any file-like uploaded object (Flask FileStorage, Django UploadedFile, or plain file)
+    saved_path, digest = _save_uploaded_file(uploaded) if uploaded else (None, None)
+    # Debug: log upload info for Django/Flask environments
+    try:
+        print(f"[fitting_service] uploaded object: {type(uploaded)} filename={getattr(uploaded, 'name', getattr(uploaded, 'filename', None))} saved_path={saved_path}")
+    except Exception:
+        pass
+    # allow file_path override
+    if (not saved_path) and arrays is None and form.get('file_path'):
+        fp = os.path.abspath(form.get('file_path'))
+        if os.path.exists(fp):
+            saved_path = fp
 
-    print(f"[fitting_service] using file_path={params.get('file_path')} delimiter={params.get('delimiter')}")
+    params = form_fit_params(form)
+    params['file_path'] = saved_path
 
-    fitter = hydrogen_fitting(**params)
+    if arrays is not None:
+        # in-memory potential/current from the array API: no file to save or parse
+        return hydrogen_fitting.from_arrays(arrays[0], arrays[1], **params)
+
+    # uploads parsed while they were received (StreamingParseUploadHandler) skip the second read
+    parsed = getattr(uploaded, 'parsed_columns', None) if uploaded else None
+    if parsed is not None:
+        wanted = normalize_delimiter(params.get('delimiter'))
+        if wanted is not None and wanted != parsed.fmt.sep:
+            parsed = None
+    # a sweep started by another request must not delete the file while it is parsed
+    with UPLOADS.lease(saved_path):
+        columns = _stored_columns(saved_path, params, parsed, digest) if datasets else parsed
+        if columns is not None:
+            params['columns'] = columns
+
+        print(f"[fitting_service] using file_path={params.get('file_path')} delimiter={params.get('delimiter')}")
+
+        fitter = hydrogen_fitting(**params)
     return fitter
 
 
+def _stored_columns(path, params, parsed=None, digest=None):
+    """Return ParsedColumns for `path` from the dataset store, storing a new parse on a miss."""
+    if DATASETS is None or not path:
+        return parsed
+    try:
+        pair = (int(params.get('current_col', 1)) - 1, int(params.get('potential_col', 2)) - 1)
+    except Exception:
+        pair = (0, 1)
+    delimiter = params.get('delimiter')
+    try:
+        digest = digest or file_digest(path)
+        full_key = DATASETS.key_for(digest, delimiter)
+        pair_key = DATASETS.key_for(digest, delimiter, pair)
+        for key in (full_key, pair_key):
+            hit = DATASETS.get(key)
+            if hit is not None:
+                return hit
+        if parsed is None:
+            parsed = parse_columns(path, delimiter)
+        DATASETS.put(full_key if parsed.complete else pair_key, parsed, {'source': os.path.basename(path)})
+    except Exception:
+        # the store is an accelerator only; hydrogen_fitting can still parse the file itself
+        traceback.print_exc()
+    return parsed
+
+
+def _form_arrays(form):
+    """Return (potential, current) when the request carries the data inline, else None."""
+    potential, current = _form_get(form, 'potential'), _form_get(form, 'current')
+    if potential is None or current is None or isinstance(potential, str) or isinstance(current, str):
+        return None
+    return potential, current
+
+
+def array_form(body, content_type=None, query=None):
+    """Build a /fit form dict from an array API request body.
+
+    - `application/json`: an object with `potential` and `current` lists plus
+      any /fit form field (numbers and booleans are accepted as well as strings).
+    - `.npy` bytes: an (N, 2) array of (potential, current) rows.
+    - `.npz` bytes: `potential` and `current` arrays.
+    - any other binary body: raw interleaved (potential, current) pairs of
+      `dtype` (query field, default little-endian float64).
+
+    Form fields for binary bodies come from `query` (the URL query string).
+    """
+    form = {k: v for k, v in (query or {}).items()}
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if content_type == 'application/json':
+        data = json.loads(body or b'{}')
+        if not isinstance(data, dict):
+            raise ValueError('JSON body must be an object with potential and current arrays')
+        for k, v in data.items():
+            if k in ('potential', 'current'):
+                form[k] = v
+            elif isinstance(v, bool):
+                form[k] = 'true' if v else 'false'
+            elif v is not None:
+                form[k] = str(v)
+    elif body[:6] == b'\x93NUMPY':
+        arr = np.load(io.BytesIO(body), allow_pickle=False)
+        if arr.ndim != 2 or arr.shape[1] != 2:
+            raise ValueError(f'.npy body must be an (N, 2) array of potential, current; got shape {arr.shape}')
+        form['potential'], form['current'] = arr[:, 0], arr[:, 1]
+    elif body[:2] == b'PK':
+        with np.load(io.BytesIO(body), allow_pickle=False) as z:
+            form['potential'], form['current'] = z['potential'], z['current']
+    else:
+        dtype = np.dtype(form.get('dtype') or '<f8')
+        if dtype.kind != 'f' or len(body) % (2 * dtype.itemsize):
+            raise ValueError(f'Binary body must hold (potential, current) pairs of a float dtype, got {dtype}')
+        arr = np.frombuffer(body, dtype=dtype).reshape(-1, 2)
+        form['potential'], form['current'] = arr[:, 0], arr[:, 1]
+    if _form_arrays(form) is None:
+        raise ValueError('Request must include potential and current arrays')
+    return form
+
+
+def _form_get(form, key, default=None):
+    try:
+        return form.get(key, default) if form is not None else default
+    except Exception:
+        return default
+
+
+def fit_from_request(form, files):
+    """Return (session_id, fitter) for a request, fitting at most once.
+
+    When the form carries a known `session_id` the stored fitter (with its
+    `ModelResult` and corrected arrays) is returned as-is. Otherwise the data
+    are parsed and fitted and the fitter is stored under a new session id.
+    An unknown or expired id falls back to a refit when data are supplied.
+    """
+    sid = _form_get(form, 'session_id')
+    if sid:
+        fitter = SESSIONS.get(sid)
+        if fitter is not None:
+            return sid, fitter
+        has_data = (bool(files and files.get('datafile')) or bool(_form_get(form, 'file_path'))
+                    or _form_arrays(form) is not None)
+        if not has_data:
+            raise ValueError('Unknown or expired session_id; run the fit again')
+
+    fitter = build_fitter_from_request(form, files)
+    fit_form(fitter, form)
+    sid = SESSIONS.put(fitter)
+    return sid, fitter
+
+
+def warm_start_plan(fitter, form, model_type):
+    """Return (fitting_method, start) for the form, applying its `warm_start` session if any."""
+    fitting_method = _form_get(form, 'fitting_method', 'powell')
+    previous_id = _form_get(form, 'warm_start')
+    start = fitter.warm_start(SESSIONS.get(previous_id), model_type) if previous_id else None
+    if start and fitting_method in GLOBAL_METHODS:
+        fitting_method = 'least_squares'
+    fitter.warm_started = {'session_id': previous_id, 'fitting_method': fitting_method} if start else None
+    return fitting_method, start
+
+
+def fit_form(fitter, form, iter_cb=None):
+    """Fit `fitter` with the form's model, method and seed; returns True on a cache hit.
+
+    With `warm_start=<session id>` of an earlier fit of the same data and
+    model, the fit starts from that fit's best parameters. A warm start is a
+    local refinement, so global methods run as least_squares and multistart
+    is skipped; `fitter.warm_started` records what was done.
+    """
+    model_type = _form_get(form, 'model_type', 'simplified')
+    fitting_method, start = warm_start_plan(fitter, form, model_type)
+    return fit_with_cache(fitter, model_type=model_type, fitting_method=fitting_method,
+                          seed=_to_seed(_form_get(form, 'seed')),
+                          multistart=_to_seed(_form_get(form, 'multistart')), iter_cb=iter_cb, start=start)
+
+
+def _to_seed(v):
+    try:
+        return int(v) if v not in (None, '') else None
+    except Exception:
+        return None
+
+
+def fit_plan(fitter, model_type='simplified', fitting_method='powell', seed=None, multistart=None, cache=None,
+             start=None):
+    """Return (cache_key, seed, multistart) for a fit of `fitter`.
+
+    A missing seed for a random start draws a fresh one and skips the
+    cache, so running a fit again really tries another start; only a
+    user-supplied seed (or a fit with no random start) replays a cached
+    result. The key is None when caching is off or the fitter has no raw
+    data to hash. Warm-start values (`start`) are part of the key; they
+    replace a multistart.
+    """
+    cache = RESULT_CACHE if cache is None else cache
+    multistart = multistart if multistart and multistart > 1 and not start else None
+    random_start = fitter.uses_random_start(model_type) or bool(multistart)
+    raw = getattr(fitter, '_raw', None)
+    if seed is None and random_start:
+        return None, new_seed(), multistart
+    if raw is None:
+        return None, seed, multistart
+    config = dict(fitter.fit_config(), model_type=str(model_type).lower(), fitting_method=fitting_method,
+                  seed=seed if random_start else None, multistart=multistart)
+    if start:
+        config['start'] = dict(sorted(start.items()))
+    key = fit_cache_key(raw, config) if cache is not None else None
+    return key, seed, multistart
+
+
+def fit_with_cache(fitter, model_type='simplified', fitting_method='powell', seed=None, multistart=None,
+                   cache=None, iter_cb=None, start=None):
+    """Fit `fitter` unless an identical fit (same data + config + seed) is cached.
+
+    Returns True on a cache hit. The outcome is also recorded on
+    `fitter.cache_hit` so responses can report it. `iter_cb` is passed to
+    `fit_data`; fits it stopped early are not cached. `start` maps
+    parameter names to starting values (warm start).
+    """
+    cache = RESULT_CACHE if cache is None else cache
+    key, seed, multistart = fit_plan(fitter, model_type, fitting_method, seed, multistart, cache, start)
+    if key is not None:
+        payload = cache.get(key)
+        if payload is not None:
+            fitter.restore_result(payload)
+            fitter.cache_hit = True
+            return True
+    fitter.fit_data(model_type=model_type, fitting_method=fitting_method, seed=seed, multistart=multistart,
+                    iter_cb=iter_cb, start=start)
+    fitter.cache_hit = False
+    if key is not None and not getattr(fitter.result_model, 'aborted', False):
+        try:
+            cache.set(key, fitter.result_payload())
+        except Exception:
+            traceback.print_exc()
+    return False
+
+
+def cache_stats():
+    """Return hit/miss counters of the active result cache."""
+    if RESULT_CACHE is None:
+        return {'backend': None}
+    return RESULT_CACHE.stats()
+
+
+def _fitted_curve(fitter):
+    result_model = getattr(fitter, 'result_model', None)
+    try:
+        fitted = getattr(result_model, 'best_fit', None)
+        if fitted is None and result_model is not None:
+            fitted = result_model.eval(x=fitter.potential)
+    except Exception:
+        fitted = None
+    return fitted
+
+
+def _tafel_slope(fitter):
+    """Return (x, slope_mV_per_dec) from the fitted curve (or raw current)."""
+    fitted = _fitted_curve(fitter)
+    x = np.asarray(fitter.potential)
+    I = np.asarray(fitted) if fitted is not None else np.asarray(fitter.current)
+    eps = 1e-30
+    logI = np.log10(np.abs(I) + eps)
+    dx = np.gradient(x)
+    dlogI = np.gradient(logI)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope_V_per_decade = np.where(dlogI == 0, np.nan, dx / dlogI)
+    return x, slope_V_per_decade * 1000.0
+
+
+def evaluate_params(data):
+    """Evaluate the model for a parameter dict without running the optimizer.
+
+    `data` is a dict (JSON body or form) holding either a `session_id` from
+    a previous fit, whose corrected potential grid and fitted values are
+    reused, or a raw `potential` list (and optional `f1`). Parameter values
+    (k1, k1r, k2, k2r|k3, bbv, bbh) override the fitted ones by name.
+    """
+    t0 = time.perf_counter()
+    try:
+        names = ('k1', 'k1r', 'k2', 'k2r', 'k3', 'bbv', 'bbh')
+        params = dict(data.get('params') or {})
+        params.update({k: data[k] for k in names if data.get(k) not in (None, '')})
+        model_type = data.get('model_type') or None
+        sid = data.get('session_id')
+        if sid:
+            fitter = SESSIONS.get(sid)
+            if fitter is None:
+                raise ValueError('Unknown or expired session_id; run the fit again')
+        elif data.get('potential') is not None:
+            # stateless preview on a client-supplied grid (the legacy /api/calculate payload)
+            fitter = hydrogen_fitting.__new__(hydrogen_fitting)
+            fitter.potential = np.asarray(data['potential'], dtype=float)
+            fitter.f1 = float(data.get('f1') or 38.92)
+            fitter.result_model = None
+            fitter.model_type = model_type or ('full' if 'k3' in params else 'simplified')
+        else:
+            raise ValueError('session_id or potential is required')
+        out = fitter.evaluate(params, model_type=model_type)
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+    x = np.asarray(fitter.potential)
+    return {
+        'success': True,
+        'session_id': sid or None,
+        'model_type': out['model_type'],
+        'params': out['params'],
+        'predictions': {
+            'potential': x.tolist(),
+            'current': _finite_list(out['current']),
+            'theta': _finite_list(out['theta']),
+            'theta_inv': _finite_list(1.0 - out['theta']),
+            'tafel_theo_pot': x.tolist(),
+            'tafel_theo_slope': _finite_list(out['tafel_slope']),
+        },
+        'elapsed_ms': (time.perf_counter() - t0) * 1000.0,
+    }
+
+
 def run_fit(form, files):
     try:
-        fitter = build_fitter_from_request(form, files)
-        fitter.fit_data(model_type=form.get('model_type', 'simplified'), fitting_method=form.get('fitting_method', 'powell'))
-        res = fitter.get_results() or {}
+        session_id, fitter = fit_from_request(form, files)
+        return fit_summary(session_id, fitter)
     except Exception as e:
         tb = traceback.format_exc()
         return {'success': False, 'error': str(e), 'traceback': tb}
 
+
+_STREAM_STOPS = {}
+_STREAM_LOCK = threading.Lock()
+
+
+def _sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, default=float)}\n\n'
+
+
+def stop_stream(stream_id):
+    """Ask a running streamed fit to stop; returns False if the id is unknown."""
+    with _STREAM_LOCK:
+        stop = _STREAM_STOPS.get(stream_id)
+    if stop is None:
+        return False
+    stop.set()
+    return True
+
+
+def stream_fit(form, files, interval=0.25):
+    """Fit like `run_fit`, yielding server-sent events while the optimizer runs.
+
+    Events: `start` (stream_id, used to stop the fit), `progress` (iter,
+    chisqr, params; at most every `interval` seconds), then `result` with the
+    /fit payload (the /analyze payload with `analyze=1`) or `error`. The fit stops early when `stop_stream` is called
+    or the client goes away; the partial result is reported as `aborted`.
+    """
+    try:
+        fitter = build_fitter_from_request(form, files)
+    except Exception as e:
+        yield _sse('error', {'success': False, 'error': str(e)})
+        return
+    stream_id = uuid.uuid4().hex
+    stop = threading.Event()
+    events = queue.Queue()
+    with _STREAM_LOCK:
+        _STREAM_STOPS[stream_id] = stop
+
+    def on_progress(progress):
+        events.put(('progress', progress))
+        return stop.is_set()
+
+    def run():
+        try:
+            fit_form(fitter, form, iter_cb=on_progress)
+            sid = SESSIONS.put(fitter)
+            if _wants(form, 'analyze'):
+                # events are JSON text, so a binary request gets base64 curves
+                encoding, dtype = data_format(form)
+                max_points, method = display_options(form)
+                events.put(('result', analysis_payload(sid, fitter, images=_wants(form, 'images'),
+                                                       encoding='base64' if encoding == 'binary' else encoding,
+                                                       dtype=dtype, max_points=max_points, method=method)))
+            else:
+                events.put(('result', fit_summary(sid, fitter)))
+        except Exception as e:
+            events.put(('error', {'success': False, 'error': str(e), 'traceback': traceback.format_exc()}))
+
+    worker = threading.Thread(target=run, name=f'theher-fit-{stream_id[:8]}', daemon=True)
+    worker.start()
+    try:
+        yield _sse('start', {'stream_id': stream_id})
+        while True:
+            try:
+                event, data = events.get(timeout=15)
+            except queue.Empty:
+                # SSE comment line keeps proxies from closing an idle connection
+                yield ': keep-alive\n\n'
+                continue
+            yield _sse(event, data)
+            if event != 'progress':
+                break
+    finally:
+        # also reached when the client disconnects and the response is closed
+        stop.set()
+        with _STREAM_LOCK:
+            _STREAM_STOPS.pop(stream_id, None)
+
+
+def fit_summary(session_id, fitter):
+    """Return the JSON-ready /fit response for a fitted session."""
+    res = fitter.get_results() or {}
     params = {}
     if 'parameters' in res and res['parameters'] is not None:
         for name, p in res['parameters'].items():
@@ -190,6 +547,13 @@ def run_fit(form, files):
 
     return {
         'success': True,
+        'session_id': session_id,
+        'cached': bool(getattr(fitter, 'cache_hit', False)),
+        'aborted': bool(getattr(fitter.result_model, 'aborted', False)),
+        'warm_start': getattr(fitter, 'warm_started', None),
+        'seed': getattr(fitter, 'seed', None),
+        'candidates': getattr(fitter, 'multistart_results', None),
+        'global_search': getattr(fitter, 'global_search', None),
         'model_type': res.get('model_type'),
         'parameters': params,
         'n_points': int(getattr(fitter, '_raw', getattr(fitter, 'current', [])).shape[0]) if getattr(fitter, '_raw', None) is not None else (len(getattr(fitter, 'current', [])) if hasattr(fitter, 'current') else 0),
@@ -204,32 +568,21 @@ def run_fit(form, files):
 
 
 def render_plot(form, files):
-    fitter = build_fitter_from_request(form, files)
-    fitter.fit_data(model_type=form.get('model_type', 'simplified'), fitting_method=form.get('fitting_method', 'powell'))
+    _, fitter = fit_from_request(form, files)
+    return fit_png(fitter)
 
-    result_model = getattr(fitter, 'result_model', None)
-    try:
-        fitted = getattr(result_model, 'best_fit', None)
-        if fitted is None and result_model is not None:
-            fitted = result_model.eval(x=fitter.potential)
-    except Exception:
-        fitted = None
 
-    fig, ax = plt.subplots(figsize=(6, 4))
-    ax.plot(fitter.potential, fitter.current, 'k.', label='data')
-    if fitted is not None:
-        ax.plot(fitter.potential, fitted, 'r-', label='fit')
-    ax.set_xlabel('Potential (V)')
-    ax.set_ylabel('Current (A)')
-    ax.legend()
-    ax.grid(True)
+def fit_png(fitter):
+    """PNG bytes of the measured and fitted current."""
+    return rendering.render('fit', _fit_series(fitter))
+
 
-    buf = io.BytesIO()
-    fig.tight_layout()
-    fig.savefig(buf, format='png')
-    plt.close(fig)
-    buf.seek(0)
-    return buf.getvalue()
+def _fit_series(fitter):
+    fitted = _fitted_curve(fitter)
+    series = [(fitter.potential, fitter.current)]
+    if fitted is not None:
+        series.append((fitter.potential, fitted))
+    return series
 
 
 def _compute_theta(fitter, x=None):
@@ -243,142 +596,253 @@ def _compute_theta(fitter, x=None):
 
 
 def render_theta_plot(form, files):
-    fitter = build_fitter_from_request(form, files)
-    fitter.fit_data(model_type=form.get('model_type', 'simplified'), fitting_method=form.get('fitting_method', 'powell'))
-    theta = _compute_theta(fitter)
-    x = np.asarray(fitter.potential)
+    _, fitter = fit_from_request(form, files)
+    return theta_png(fitter)
+
+
+def theta_png(fitter):
+    """PNG bytes of the coverage (theta) curve."""
+    return rendering.render('theta', _theta_series(fitter))
+
+
+def _theta_series(fitter):
+    return [(np.asarray(fitter.potential), _compute_theta(fitter))]
+
+
+def _theta_arrays(fitter):
+    return {'x': np.asarray(fitter.potential, dtype=float), 'y': np.asarray(_compute_theta(fitter), dtype=float)}
+
+
+def _tafel_arrays(fitter):
+    x, slope_mV_per_dec = _tafel_slope(fitter)
+    return {'x': x, 'slope': slope_mV_per_dec, 'slope_abs': np.abs(slope_mV_per_dec)}
+
+
+def _plot_arrays(fitter):
+    fitted = _fitted_curve(fitter)
+    y = fitted if fitted is not None else fitter.current
+    return {'x': np.asarray(fitter.potential, dtype=float), 'y': np.asarray(y, dtype=float)}
 
-    fig, ax = plt.subplots(figsize=(6, 4))
-    ax.plot(x, theta, 'b-', label='coverage (theta)')
-    ax.set_xlabel('Potential (V)')
-    ax.set_ylabel('Theta (coverage)')
-    ax.set_title('Hydrogen Coverage vs Potential')
-    ax.legend()
-    ax.grid(True)
 
-    buf = io.BytesIO()
-    fig.tight_layout()
-    fig.savefig(buf, format='png')
-    plt.close(fig)
-    buf.seek(0)
-    return buf.getvalue()
+def _theta_data(fitter):
+    return {k: v.tolist() for k, v in _theta_arrays(fitter).items()}
+
+
+def _tafel_data(fitter):
+    return {k: v.tolist() for k, v in _tafel_arrays(fitter).items()}
+
+
+def _plot_data(fitter):
+    return {k: v.tolist() for k, v in _plot_arrays(fitter).items()}
+
+
+PLOT_ARRAYS = {'fit': _plot_arrays, 'theta': _theta_arrays, 'tafel': _tafel_arrays}
+
+
+def encode_plot_data(arrays, encoding='list', dtype='float64', meta=None):
+    """Return (body, content_type) for plot arrays: a JSON-ready dict, or bytes for `binary`."""
+    if encoding == 'binary':
+        return pack_arrays(arrays, dtype, meta), BINARY_CONTENT_TYPE
+    out = dict(meta or {})
+    out.update(encode_arrays(arrays, encoding, dtype))
+    if encoding != 'list':
+        out['encoding'] = encoding
+    return out, 'application/json'
+
+
+def render_data(form, files, kind, accept=''):
+    """Data-only response for the /plot, /plot_theta and /plot_tafel endpoints.
+
+    `encoding` (list, base64 or binary, or the Accept header) and `dtype`
+    (float64 or float32) pick the format; see webapp/utils/payloads.py.
+    `max_points` and `decimate` reduce the curve for display
+    (`display_options`). Returns (body, content_type) like `encode_plot_data`.
+    """
+    encoding, dtype = data_format(form, accept)
+    max_points, method = display_options(form)
+    session_id, fitter = fit_from_request(form, files)
+    arrays, n = decimate(PLOT_ARRAYS[kind](fitter), 'x', max_points, method)
+    meta = {'session_id': session_id}
+    if arrays['x'].shape[0] < n:
+        meta['decimation'] = {'method': method, 'max_points': max_points, 'n_points': n}
+    return encode_plot_data(arrays, encoding, dtype, meta)
+
+
+def display_options(form):
+    """(max_points, method) of the display stage: `max_points` (0 = full resolution) and `decimate`.
+
+    Display payloads are reduced to about `max_points` per curve with
+    `decimate` = lttb (default) or minmax; exports never are.
+    """
+    raw = _form_get(form, 'max_points')
+    try:
+        max_points = max(0, int(float(raw))) if raw not in (None, '') else 0
+    except (TypeError, ValueError):
+        raise ValueError(f'max_points must be an integer, got {raw!r}')
+    method = str(_form_get(form, 'decimate') or 'lttb').lower()
+    if method not in DECIMATION_METHODS:
+        raise ValueError(f'Unknown decimation method {method!r}; expected one of {DECIMATION_METHODS}')
+    return max_points, method
 
 
 def render_theta_data(form, files):
     """Return theta plot data as JSON-serializable dict (x and theta arrays)."""
-    fitter = build_fitter_from_request(form, files)
-    fitter.fit_data(model_type=form.get('model_type', 'simplified'), fitting_method=form.get('fitting_method', 'powell'))
-    theta = _compute_theta(fitter)
-    x = np.asarray(fitter.potential)
-    return {'x': x.tolist(), 'y': np.asarray(theta).tolist()}
+    _, fitter = fit_from_request(form, files)
+    return _theta_data(fitter)
 
 
 def render_tafel_data(form, files):
     """Return tafel slope data as JSON-serializable dict (x, slope, slope_abs)."""
-    fitter = build_fitter_from_request(form, files)
-    fitter.fit_data(model_type=form.get('model_type', 'simplified'), fitting_method=form.get('fitting_method', 'powell'))
-    result_model = getattr(fitter, 'result_model', None)
-    try:
-        fitted = getattr(result_model, 'best_fit', None)
-        if fitted is None and result_model is not None:
-            fitted = result_model.eval(x=fitter.potential)
-    except Exception:
-        fitted = None
-
-    x = np.asarray(fitter.potential)
-    I = np.asarray(fitted) if fitted is not None else np.asarray(fitter.current)
-    eps = 1e-30
-    logI = np.log10(np.abs(I) + eps)
-    dx = np.gradient(x)
-    dlogI = np.gradient(logI)
-    with np.errstate(divide='ignore', invalid='ignore'):
-        slope_V_per_decade = np.where(dlogI == 0, np.nan, dx / dlogI)
-    slope_mV_per_dec = slope_V_per_decade * 1000.0
-    return {'x': x.tolist(), 'slope': slope_mV_per_dec.tolist(), 'slope_abs': np.abs(slope_mV_per_dec).tolist()}
+    _, fitter = fit_from_request(form, files)
+    return _tafel_data(fitter)
 
 
 def render_plot_data(form, files):
     """Return fit plot numeric data as dict: x (potential) and y (fitted current)."""
-    fitter = build_fitter_from_request(form, files)
-    fitter.fit_data(model_type=form.get('model_type', 'simplified'), fitting_method=form.get('fitting_method', 'powell'))
-    result_model = getattr(fitter, 'result_model', None)
-    try:
-        fitted = getattr(result_model, 'best_fit', None)
-        if fitted is None and result_model is not None:
-            fitted = result_model.eval(x=fitter.potential)
-    except Exception:
-        fitted = None
+    _, fitter = fit_from_request(form, files)
+    return _plot_data(fitter)
 
-    x = np.asarray(fitter.potential)
-    y = np.asarray(fitted) if fitted is not None else np.asarray(fitter.current)
-    return {'x': x.tolist(), 'y': y.tolist()}
 
+def csv_rows(data):
+    """Return CSV lines for the rows of 2-D `data`.
+
+    Values are written as their shortest round-trip repr ('0.1', not
+    '0.10000000000000001'), as the exports always printed them, and read
+    back exactly.
+    """
+    return pd.DataFrame(data).to_csv(header=False, index=False, na_rep='nan', lineterminator='\n')
 
-def render_plots_zip(form, files):
-    """Return a ZIP (bytes) containing CSV files for plot, theta, and tafel data."""
-    plot = render_plot_data(form, files)
-    theta = render_theta_data(form, files)
-    tafel = render_tafel_data(form, files)
 
-    import zipfile
+def export_tables(fitter):
+    """Return {table name: (column names, arrays)} of the fit plot, theta and Tafel data, at full resolution."""
+    plot = _plot_arrays(fitter)
+    theta = _theta_arrays(fitter)
+    tafel = _tafel_arrays(fitter)
+    return {
+        'fit_plot': (('Potential', 'Fitted_current'), (plot['x'], plot['y'])),
+        'theta': (('Potential', 'Hydrogen_Coverage'), (theta['x'], theta['y'])),
+        # signed slope, unlike the plot
+        'tafel': (('Average_Potential', 'Tafel_Slope'), (tafel['x'], tafel['slope'])),
+    }
 
-    buf = io.BytesIO()
-    with zipfile.ZipFile(buf, 'w', compression=zipfile.ZIP_DEFLATED) as z:
-        # fit plot CSV
-        csv_plot = 'Potential,Fitted_current\n' + '\n'.join(f"{plot['x'][i]},{plot['y'][i]}" for i in range(len(plot['x'])))
-        z.writestr('fit_plot.csv', csv_plot)
 
-        # theta CSV
-        csv_theta = 'Potential,Hydrogen_Coverage\n' + '\n'.join(f"{theta['x'][i]},{theta['y'][i]}" for i in range(len(theta['x'])))
-        z.writestr('theta.csv', csv_theta)
+def plots_csv(fitter):
+    """Return {file name: CSV text} for the fit plot, theta and Tafel data of a fitted session."""
+    return tables_csv(export_tables(fitter))
 
-        # tafel CSV (use signed slope)
-        csv_tafel = 'Average_Potential,Tafel_Slope\n' + '\n'.join(f"{tafel['x'][i]},{tafel['slope'][i]}" for i in range(len(tafel['x'])))
-        z.writestr('tafel.csv', csv_tafel)
 
-    buf.seek(0)
-    return buf.getvalue()
+def tables_csv(tables):
+    """Return {file name: CSV text} for the `export_tables` output `tables`."""
+    out = {}
+    for name, (columns, arrays) in tables.items():
+        out[f'{name}.csv'] = ','.join(columns) + '\n' + csv_rows(np.column_stack(arrays))
+    return out
+
+
+def render_plots_zip(form, files):
+    """Return a ZIP (bytes) containing CSV files for plot, theta, and tafel data."""
+    from .export import export_request
+
+    _, chunks = export_request(form, files)
+    return b''.join(chunks)
 
 
 def render_tafel_plot(form, files):
-    fitter = build_fitter_from_request(form, files)
-    fitter.fit_data(model_type=form.get('model_type', 'simplified'), fitting_method=form.get('fitting_method', 'powell'))
-    result_model = getattr(fitter, 'result_model', None)
-    if result_model is None:
-        raise ValueError('No fit available to compute Tafel slope')
+    _, fitter = fit_from_request(form, files)
+    return tafel_png(fitter)
 
-    try:
-        fitted = getattr(result_model, 'best_fit', None)
-        if fitted is None:
-            fitted = result_model.eval(x=fitter.potential)
-    except Exception:
-        fitted = None
 
-    x = np.asarray(fitter.potential)
-    I = np.asarray(fitted) if fitted is not None else np.asarray(fitter.current)
-    eps = 1e-30
-    logI = np.log10(np.abs(I) + eps)
-    dx = np.gradient(x)
-    dlogI = np.gradient(logI)
-    with np.errstate(divide='ignore', invalid='ignore'):
-        slope_V_per_decade = np.where(dlogI == 0, np.nan, dx / dlogI)
+def tafel_png(fitter):
+    """PNG bytes of the absolute local Tafel slope."""
+    return rendering.render('tafel', _tafel_series(fitter))
 
-    slope_mV_per_dec = slope_V_per_decade * 1000.0
 
+def _tafel_series(fitter):
+    if getattr(fitter, 'result_model', None) is None:
+        raise ValueError('No fit available to compute Tafel slope')
+    x, slope_mV_per_dec = _tafel_slope(fitter)
     # plot absolute slope values to display positive slopes
-    slope_mV_per_dec_plot = np.abs(slope_mV_per_dec)
-
-    fig, ax = plt.subplots(figsize=(6, 4))
-    ax.plot(x, slope_mV_per_dec_plot, 'g-', label='Tafel slope (mV/dec)')
-    ax.set_xlabel('Potential (V)')
-    ax.set_ylabel('Tafel slope (mV/dec)')
-    ax.set_title('Tafel Slope vs Potential (average)')
-    ax.legend()
-    ax.grid(True)
-
-    buf = io.BytesIO()
-    fig.tight_layout()
-    fig.savefig(buf, format='png')
-    plt.close(fig)
-    buf.seek(0)
-    return buf.getvalue()
+    return [(x, np.abs(slope_mV_per_dec))]
+
+
+def plot_images(fitter, kinds=('fit', 'theta', 'tafel'), fmt='png'):
+    """Return {kind: image bytes} for the fit, theta and Tafel panels, rendered concurrently."""
+    series = {'fit': _fit_series, 'theta': _theta_series, 'tafel': _tafel_series}
+    return rendering.render_panels({k: (k, series[k](fitter)) for k in kinds}, fmt=fmt)
+
+
+def analysis_payload(session_id, fitter, images=False, encoding='list', dtype='float64', max_points=0,
+                     method='lttb'):
+    """Return the /fit summary plus every curve derived from the same fit.
+
+    `curves` holds the measured and fitted current, theta and the local
+    Tafel slope on the corrected potential grid, as JSON lists (non-finite
+    values as null) or, with `encoding='base64'`, as base64 `dtype` buffers.
+    With `max_points` the curves are decimated for display and
+    `decimation` says so. With `images` the three plots are added as base64
+    PNGs.
+    """
+    out = fit_summary(session_id, fitter)
+    curves = analysis_curves(fitter, max_points, method)
+    out['curves'] = encode_arrays(curves, encoding, dtype)
+    if encoding != 'list':
+        out['encoding'] = encoding
+    out.update(_decimation_info(curves, fitter, max_points, method))
+    if images:
+        out['images'] = {name: base64.b64encode(png).decode('ascii') for name, png in plot_images(fitter).items()}
+    return out
+
+
+def analysis_curves(fitter, max_points=0, method='lttb'):
+    """{name: array} of every curve in the /analyze payload (`fitted` is None without a fit).
+
+    With `max_points` the potential grid and the Tafel grid are each
+    decimated with one shared index set, so the curves stay aligned.
+    """
+    fitted = _fitted_curve(fitter)
+    tafel_x, slope = _tafel_slope(fitter)
+    grid, _ = decimate({
+        'potential': np.asarray(fitter.potential, dtype=float),
+        'current': np.asarray(fitter.current, dtype=float),
+        'fitted': np.asarray(fitted, dtype=float) if fitted is not None else None,
+        'theta': np.asarray(_compute_theta(fitter), dtype=float),
+    }, 'potential', max_points, method)
+    tafel, _ = decimate({'tafel_potential': tafel_x, 'tafel_slope': slope}, 'tafel_potential', max_points, method)
+    return dict(grid, **tafel)
+
+
+def _decimation_info(curves, fitter, max_points, method):
+    n_display = curves['potential'].shape[0]
+    if not max_points or n_display >= np.asarray(fitter.potential).shape[0]:
+        return {}
+    return {'decimation': {'method': method, 'max_points': max_points, 'n_display': n_display}}
+
+
+def _wants(form, key):
+    return str(_form_get(form, key, '') or '').lower() in ('1', 'true', 'yes', 'on', 'png')
+
+
+def analyze(form, files, accept=''):
+    """Parse once, fit once (or reuse `session_id`) and return `analysis_payload`.
+
+    Set `images=1` to embed the fit, theta and Tafel plots as base64 PNGs.
+    `max_points`/`decimate` reduce the curves for display and
+    `encoding`/`dtype` choose their format (see `render_data`); for
+    `binary` the result is the packed curves as bytes, with the rest of the
+    payload in the container's `meta`.
+    """
+    try:
+        encoding, dtype = data_format(form, accept)
+        max_points, method = display_options(form)
+        session_id, fitter = fit_from_request(form, files)
+        if encoding == 'binary':
+            curves = analysis_curves(fitter, max_points, method)
+            meta = dict(fit_summary(session_id, fitter), encoding='binary')
+            meta.update(_decimation_info(curves, fitter, max_points, method))
+            if _wants(form, 'images'):
+                meta['images'] = {name: base64.b64encode(png).decode('ascii') for name, png in plot_images(fitter).items()}
+            return pack_arrays(curves, dtype, meta)
+        return analysis_payload(session_id, fitter, images=_wants(form, 'images'), encoding=encoding, dtype=dtype,
+                                max_points=max_points, method=method)
+    except Exception as e:
+        return {'success': False, 'error': str(e), 'traceback': traceback.format_exc()}
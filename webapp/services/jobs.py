@@ -0,0 +1,411 @@
+"""Background fit jobs run on a bounded set of local worker processes.
+
+`submit` parses the data in the calling (request) thread, so bad input is
+reported immediately, then queues the optimizer run and returns a job id.
+A dispatcher thread starts at most `max_workers` job processes at a time,
+each in its own process group so a job over its time budget or cancelled
+by the user can be terminated together with the multistart/global pool it
+started. A job's fit gets `cpu_count() // max_workers` pool workers, so
+concurrent jobs do not oversubscribe the cores. Finished results are rehydrated into a
+`hydrogen_fitting` via `restore_result`, stored in `SESSIONS` (so plot,
+theta and export requests can use the returned session id) and written to
+the result cache.
+
+No broker is involved: the queue lives in the web process, like the
+session store, so with several gunicorn workers a job id is only known to
+the worker that accepted it.
+
+Configuration: `THEHER_JOB_WORKERS` (concurrent fits, default 2),
+`THEHER_JOB_QUEUE_MAX` (queued + running jobs, default 16),
+`THEHER_JOB_TIMEOUT` (seconds per job, default 600) and
+`THEHER_JOB_KEEP` (finished jobs kept for polling, default 256).
+"""
+import os
+import time
+import uuid
+import atexit
+import signal
+import threading
+import traceback
+from collections import OrderedDict, deque
+
+from ..utils.parallel import cpu_count, mp_context
+from .session_store import SESSIONS
+from . import fitting_service
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED, TIMEOUT = 'queued', 'running', 'done', 'failed', 'cancelled', 'timeout'
+FINISHED = (DONE, FAILED, CANCELLED, TIMEOUT)
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+def _job_worker(fitter, model_type, fitting_method, seed, multistart, start, n_jobs, conn):
+    # runs in the job process: lead a new process group (inherited by any pool
+    # the fit starts, so `_reap` can stop them all), fit and send back the payload
+    if hasattr(os, 'setsid'):
+        try:
+            os.setsid()
+        except OSError:
+            pass
+    try:
+        fitter.fit_data(model_type=model_type, fitting_method=fitting_method, seed=seed, multistart=multistart,
+                        start=start, n_jobs=n_jobs)
+        conn.send(('ok', fitter.result_payload()))
+    except Exception as e:
+        conn.send(('error', f'{e}\n{traceback.format_exc()}'))
+    finally:
+        conn.close()
+
+
+def _kill_group(process, sig):
+    # signal the job process and its pool workers; False if there is no process group to signal
+    if not hasattr(os, 'killpg'):
+        return False
+    try:
+        if os.getpgid(process.pid) != process.pid:
+            return False
+    except OSError:
+        # leader already reaped: its pool workers may still hold the group
+        pass
+    try:
+        os.killpg(process.pid, sig)
+    except OSError:
+        return False
+    return True
+
+
+def _reap(process, conn):
+    # stop (if still running) and wait for a job process group; blocks, so never called with the lock held
+    if process is not None:
+        if not _kill_group(process, signal.SIGTERM) and process.is_alive():
+            process.terminate()
+        process.join(5)
+        if process.is_alive():
+            process.kill()
+            process.join(1)
+        _kill_group(process, getattr(signal, 'SIGKILL', signal.SIGTERM))
+    if conn is not None:
+        conn.close()
+
+
+class Job:
+    def __init__(self, fitter, model_type, fitting_method, seed, multistart, cache_key, start=None):
+        self.id = uuid.uuid4().hex
+        self.fitter = fitter
+        self.model_type = model_type
+        self.fitting_method = fitting_method
+        self.seed = seed
+        self.multistart = multistart
+        self.cache_key = cache_key
+        self.start = start
+        self.state = QUEUED
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.error = None
+        self.session_id = None
+        self.result = None
+        self.process = None
+        self.conn = None
+
+    def status(self, position=None):
+        end = self.finished or time.time()
+        out = {
+            'job_id': self.id,
+            'state': self.state,
+            'model_type': self.model_type,
+            'fitting_method': self.fitting_method,
+            'seed': self.seed,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'elapsed': (end - self.started) if self.started else None,
+            'session_id': self.session_id,
+            'error': self.error,
+        }
+        if position is not None:
+            out['queue_position'] = position
+        return out
+
+
+class JobQueue:
+    """Bounded queue of fit jobs.
+
+    `_cond` only guards the job bookkeeping. Starting, polling and reaping
+    worker processes, storing sessions and building result summaries happen
+    outside it on a snapshot, and the lock is taken again only to publish
+    the new state; a job cancelled in between is recognised by its state.
+    Only the dispatcher thread touches worker processes and pipes; `cancel`
+    hands them to it through `_reaping`, so status requests never wait on a
+    process.
+    """
+
+    def __init__(self, max_workers=2, max_queued=16, timeout=600.0, keep=256, cache=None):
+        self.max_workers = max(1, int(max_workers))
+        self.max_queued = max(1, int(max_queued))
+        self.timeout = float(timeout) if timeout else None
+        self.keep = max(1, int(keep))
+        self.cache = cache
+        # pool workers per job, so `max_workers` concurrent fits share the cores
+        self.fit_jobs = max(1, cpu_count() // self.max_workers)
+        self._jobs = OrderedDict()
+        self._pending = deque()
+        self._running = []
+        # (process, conn) of stopped jobs, for the dispatcher to terminate and join
+        self._reaping = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    # -- public API -------------------------------------------------------
+
+    def submit(self, fitter, model_type='simplified', fitting_method='powell', seed=None, multistart=None,
+               start=None):
+        """Queue a fit of an already-parsed `fitter` and return its Job.
+
+        `start` holds warm-start parameter values (see `fitting_service.fit_form`).
+        A cached result completes the job at once without starting a process.
+        Raises QueueFull when `max_queued` jobs are already waiting or running.
+        """
+        cache = fitting_service.RESULT_CACHE if self.cache is None else self.cache
+        key, seed, multistart = fitting_service.fit_plan(fitter, model_type, fitting_method, seed, multistart, cache,
+                                                         start)
+        job = Job(fitter, model_type, fitting_method, seed, multistart, key, start)
+        payload = cache.get(key) if key is not None else None
+        if payload is not None:
+            job.session_id, job.result = self._store(job, fitter, payload, cached=True)
+            job.started = time.time()
+            with self._cond:
+                self._remember(job)
+                self._finish(job, DONE)
+            return job
+        with self._cond:
+            if len(self._pending) + len(self._running) >= self.max_queued:
+                raise QueueFull(f'Too many fit jobs in progress ({self.max_queued}); try again later')
+            self._remember(job)
+            self._pending.append(job)
+            self._ensure_dispatcher()
+            self._cond.notify_all()
+        return job
+
+    def get(self, job_id):
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            position = self._pending.index(job) if job.state == QUEUED and job in self._pending else None
+            return job.status(position)
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns its status (None if unknown)."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.state == QUEUED:
+                self._pending.remove(job)
+                self._finish(job, CANCELLED)
+            elif job.state == RUNNING:
+                self._reaping.append(self._detach(job, CANCELLED))
+            self._cond.notify_all()
+            return job.status()
+
+    def stats(self):
+        with self._cond:
+            states = {}
+            for job in self._jobs.values():
+                states[job.state] = states.get(job.state, 0) + 1
+            return {'queued': len(self._pending), 'running': len(self._running), 'max_workers': self.max_workers,
+                    'fit_jobs': self.fit_jobs, 'max_queued': self.max_queued, 'timeout': self.timeout,
+                    'states': states}
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            for job in list(self._running):
+                self._reaping.append(self._detach(job, CANCELLED))
+            while self._pending:
+                self._finish(self._pending.popleft(), CANCELLED)
+            self._cond.notify_all()
+            thread = self._thread
+            reap = []
+            if thread is None or not thread.is_alive():
+                reap, self._reaping = self._reaping, []
+        # a live dispatcher reaps the workers itself before it exits
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(10)
+        for handles in reap:
+            _reap(*handles)
+
+    # -- bookkeeping (called with self._cond held) --------------------------
+
+    def _remember(self, job):
+        self._jobs[job.id] = job
+        # forget the oldest finished jobs beyond `keep`
+        for old_id in [j.id for j in self._jobs.values() if j.state in FINISHED][:max(0, len(self._jobs) - self.keep)]:
+            self._jobs.pop(old_id, None)
+
+    def _ensure_dispatcher(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._dispatch, name='theher-jobs', daemon=True)
+            self._thread.start()
+
+    def _detach(self, job, state, error=None):
+        """Finish a running job; returns its (process, conn) to be reaped outside the lock."""
+        handles = (job.process, job.conn)
+        self._running.remove(job)
+        self._finish(job, state, error)
+        return handles
+
+    def _finish(self, job, state, error=None):
+        job.state = state
+        job.error = error
+        job.finished = time.time()
+        job.process = None
+        job.conn = None
+        # a finished fit now lives in the session store; a failed one is dropped
+        job.fitter = None
+
+    # -- blocking work (called without the lock) -----------------------------
+
+    def _store(self, job, fitter, payload, cached=False):
+        """Rehydrate `fitter`, cache the payload and keep the session; returns (session id, summary)."""
+        fitter.restore_result(payload)
+        fitter.cache_hit = cached
+        if not cached and job.cache_key is not None:
+            cache = fitting_service.RESULT_CACHE if self.cache is None else self.cache
+            try:
+                cache.set(job.cache_key, payload)
+            except Exception:
+                traceback.print_exc()
+        session_id = SESSIONS.put(fitter)
+        return session_id, fitting_service.fit_summary(session_id, fitter)
+
+    def _launch(self, job, fitter):
+        try:
+            ctx = mp_context()
+            parent, child = ctx.Pipe(duplex=False)
+            process = ctx.Process(target=_job_worker, args=(fitter, job.model_type, job.fitting_method, job.seed,
+                                                            job.multistart, job.start, self.fit_jobs, child))
+            process.start()
+            child.close()
+        except Exception as e:
+            with self._cond:
+                if job.state == RUNNING:
+                    self._detach(job, FAILED, str(e))
+            return
+        with self._cond:
+            if job.state == RUNNING:
+                job.process, job.conn = process, parent
+                return
+        # cancelled while the process was starting
+        _reap(process, parent)
+
+    def _check(self, job, process, conn):
+        """Return (state, payload or error) once the job's worker is done, else None."""
+        try:
+            if conn.poll():
+                kind, value = conn.recv()
+                process.join(5)
+                return (DONE, value) if kind == 'ok' else (FAILED, value)
+        except (EOFError, OSError):
+            pass
+        if not process.is_alive():
+            return FAILED, f'Worker exited with code {process.exitcode}'
+        if self.timeout is not None and time.time() - job.started > self.timeout:
+            return TIMEOUT, f'Fit exceeded the {self.timeout:g} s time budget'
+        return None
+
+    def _settle(self, job, fitter, state, value):
+        session_id = summary = error = None
+        if state == DONE:
+            try:
+                session_id, summary = self._store(job, fitter, value)
+            except Exception as e:
+                state, error = FAILED, str(e)
+        else:
+            error = value
+        with self._cond:
+            if job.state != RUNNING:
+                # cancelled meanwhile; its process is already queued for reaping
+                return
+            job.session_id, job.result = session_id, summary
+            handles = self._detach(job, state, error)
+        _reap(*handles)
+
+    def _dispatch(self):
+        while True:
+            starting, polling = [], []
+            with self._cond:
+                reap, self._reaping = self._reaping, []
+                closed = self._closed
+                if not closed:
+                    while self._pending and len(self._running) < self.max_workers:
+                        job = self._pending.popleft()
+                        job.state = RUNNING
+                        job.started = time.time()
+                        self._running.append(job)
+                        starting.append((job, job.fitter))
+                    polling = [(job, job.fitter, job.process, job.conn) for job in self._running
+                               if job.process is not None]
+            for handles in reap:
+                _reap(*handles)
+            if closed:
+                return
+            for job, fitter in starting:
+                self._launch(job, fitter)
+            for job, fitter, process, conn in polling:
+                outcome = self._check(job, process, conn)
+                if outcome is not None:
+                    self._settle(job, fitter, *outcome)
+            with self._cond:
+                if self._closed or self._reaping:
+                    continue
+                if not self._running and not self._pending:
+                    self._cond.wait()
+                else:
+                    self._cond.wait(0.05)
+
+
+def _env_number(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except Exception:
+        return default
+
+
+JOBS = JobQueue(max_workers=int(_env_number('THEHER_JOB_WORKERS', 2)),
+                max_queued=int(_env_number('THEHER_JOB_QUEUE_MAX', 16)),
+                timeout=_env_number('THEHER_JOB_TIMEOUT', 600.0),
+                keep=int(_env_number('THEHER_JOB_KEEP', 256)))
+atexit.register(JOBS.shutdown)
+
+
+def submit_fit(form, files, queue=None):
+    """Parse the request's data now and queue the fit; returns the job status dict."""
+    queue = JOBS if queue is None else queue
+    fitter = fitting_service.build_fitter_from_request(form, files)
+    model_type = fitting_service._form_get(form, 'model_type', 'simplified')
+    fitting_method, start = fitting_service.warm_start_plan(fitter, form, model_type)
+    job = queue.submit(fitter, model_type=model_type, fitting_method=fitting_method,
+                       seed=fitting_service._to_seed(fitting_service._form_get(form, 'seed')),
+                       multistart=fitting_service._to_seed(fitting_service._form_get(form, 'multistart')),
+                       start=start)
+    return queue.status(job.id)
+
+
+def job_result(job_id, queue=None):
+    """Return the /fit-style result of a finished job, or its status while it is not done."""
+    queue = JOBS if queue is None else queue
+    job = queue.get(job_id)
+    if job is None:
+        return None
+    if job.state != DONE:
+        return dict(queue.status(job_id), success=False)
+    return dict(job.result, job_id=job.id, state=job.state)
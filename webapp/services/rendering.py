@@ -0,0 +1,221 @@
+"""Plot rendering on matplotlib's object-oriented Figure/Agg API.
+
+No pyplot: every figure is a `Figure` bound to its own `FigureCanvasAgg`,
+so there is no global figure registry and no backend switching, and
+threads never share a figure. Each thread keeps one figure template per
+(plot kind, size, dpi) with its axes, labels, legend and line artists
+already built; a render only swaps the line data, rescales the axes and
+prints the canvas.
+
+Rendered bytes are cached by (hash of the plotted arrays, kind, size,
+dpi, format) in a bounded LRU (`THEHER_RENDER_CACHE_MB`, default 32), so
+re-opening or exporting the same result does not draw again.
+Lines longer than `THEHER_RENDER_MAX_POINTS` (default 4000, 0 = off) are
+reduced with min-max decimation before hashing and drawing: at 600 px
+wide that keeps the drawn envelope, and a 500k-point sweep costs what a
+4000-point one does.
+
+`render_panels` draws the fit, theta and Tafel panels concurrently on a
+small thread pool (`THEHER_RENDER_WORKERS`, default 3; 0 renders in the
+calling thread).
+"""
+import io
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from ..utils.decimate import minmax_indices
+
+DEFAULT_SIZE = (6.0, 4.0)
+DEFAULT_DPI = 100
+FORMATS = ('png', 'svg', 'pdf')
+
+# per kind: axis labels, title and one (style, label) per line
+PLOTS = {
+    'fit': {'xlabel': 'Potential (V)', 'ylabel': 'Current (A)', 'title': None,
+            'lines': (('k.', 'data'), ('r-', 'fit'))},
+    'theta': {'xlabel': 'Potential (V)', 'ylabel': 'Theta (coverage)', 'title': 'Hydrogen Coverage vs Potential',
+              'lines': (('b-', 'coverage (theta)'),)},
+    'tafel': {'xlabel': 'Potential (V)', 'ylabel': 'Tafel slope (mV/dec)', 'title': 'Tafel Slope vs Potential (average)',
+              'lines': (('g-', 'Tafel slope (mV/dec)'),)},
+}
+
+
+class _Template:
+    """A figure with its artists built once; `draw` only updates line data."""
+
+    def __init__(self, kind, size, dpi):
+        spec = PLOTS[kind]
+        self.figure = Figure(figsize=size, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot(1, 1, 1)
+        self.lines = [self.ax.plot([], [], style, label=label)[0] for style, label in spec['lines']]
+        self.ax.set_xlabel(spec['xlabel'])
+        self.ax.set_ylabel(spec['ylabel'])
+        if spec['title']:
+            self.ax.set_title(spec['title'])
+        self.ax.grid(True)
+        self._shown = None
+        # fixed margins instead of tight_layout on every render
+        self.figure.subplots_adjust(left=0.16, right=0.97, bottom=0.13, top=0.9 if spec['title'] else 0.96)
+
+    def draw(self, series, fmt='png'):
+        for line, (x, y) in zip(self.lines, series):
+            line.set_data(x, y)
+            line.set_visible(True)
+        for line in self.lines[len(series):]:
+            line.set_data([], [])
+            line.set_visible(False)
+        if self._shown != len(series):
+            # the legend only lists the lines in use (a fit plot without a fit has no 'fit' entry)
+            self.ax.legend(handles=self.lines[:len(series)], loc='best')
+            self._shown = len(series)
+        self.ax.relim(visible_only=True)
+        self.ax.autoscale_view()
+        buf = io.BytesIO()
+        if fmt == 'png':
+            self.canvas.print_png(buf)
+        else:
+            self.figure.savefig(buf, format=fmt)
+        return buf.getvalue()
+
+
+_local = threading.local()
+
+
+def _template(kind, size, dpi):
+    templates = getattr(_local, 'templates', None)
+    if templates is None:
+        templates = _local.templates = {}
+    key = (kind, tuple(size), dpi)
+    tpl = templates.get(key)
+    if tpl is None:
+        tpl = templates[key] = _Template(kind, tuple(size), dpi)
+    return tpl
+
+
+class RenderCache:
+    """LRU of rendered bytes bounded by total size."""
+
+    def __init__(self, max_bytes=32 * 2 ** 20):
+        self.max_bytes = int(max_bytes)
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            blob = self._data.get(key)
+            if blob is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return blob
+
+    def set(self, key, blob):
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._data[key] = blob
+            self._bytes += len(blob)
+            while self._bytes > self.max_bytes:
+                _, dropped = self._data.popitem(last=False)
+                self._bytes -= len(dropped)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._data), 'bytes': self._bytes, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+def _env_number(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except Exception:
+        return default
+
+
+RENDER_CACHE = RenderCache(_env_number('THEHER_RENDER_CACHE_MB', 32) * 2 ** 20)
+RENDER_WORKERS = int(_env_number('THEHER_RENDER_WORKERS', 3))
+RENDER_MAX_POINTS = int(_env_number('THEHER_RENDER_MAX_POINTS', 4000))
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def series_hash(series):
+    """Digest of the plotted arrays (shape + float64 bytes of every x, y)."""
+    h = hashlib.sha1()
+    for x, y in series:
+        for a in (x, y):
+            a = np.ascontiguousarray(a, dtype=np.float64)
+            h.update(str(a.shape).encode('ascii'))
+            h.update(a.tobytes())
+    return h.hexdigest()
+
+
+def thin(series, max_points=None):
+    """Min-max decimate every (x, y) line of `series` to about `max_points` points."""
+    max_points = RENDER_MAX_POINTS if max_points is None else max_points
+    if not max_points:
+        return series
+    out = []
+    for x, y in series:
+        if np.asarray(y).shape[0] > max_points:
+            idx = minmax_indices(y, max_points)
+            x, y = np.asarray(x)[idx], np.asarray(y)[idx]
+        out.append((x, y))
+    return out
+
+
+def render(kind, series, size=DEFAULT_SIZE, dpi=DEFAULT_DPI, fmt='png', cache=None, max_points=None):
+    """Return the `fmt` bytes of plot `kind` for `series`, a list of (x, y) pairs (one per line).
+
+    `max_points` overrides `RENDER_MAX_POINTS` (0 draws every point).
+    """
+    if kind not in PLOTS:
+        raise ValueError(f'Unknown plot kind {kind!r}; expected one of {tuple(PLOTS)}')
+    if fmt not in FORMATS:
+        raise ValueError(f'Unsupported image format {fmt!r}; expected one of {FORMATS}')
+    series = thin(series, max_points)
+    cache = RENDER_CACHE if cache is None else cache
+    key = (series_hash(series), kind, tuple(float(s) for s in size), int(dpi), fmt)
+    blob = cache.get(key) if cache is not None else None
+    if blob is None:
+        blob = _template(kind, size, int(dpi)).draw(series, fmt)
+        if cache is not None:
+            cache.set(key, blob)
+    return blob
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix='theher-render')
+        return _pool
+
+
+def render_panels(jobs, size=DEFAULT_SIZE, dpi=DEFAULT_DPI, fmt='png', workers=None):
+    """Render {name: (kind, series)} and return {name: bytes}, concurrently when workers allow."""
+    workers = RENDER_WORKERS if workers is None else workers
+    if workers <= 0 or len(jobs) < 2:
+        return {name: render(kind, series, size, dpi, fmt) for name, (kind, series) in jobs.items()}
+    futures = {name: _executor().submit(render, kind, series, size, dpi, fmt) for name, (kind, series) in jobs.items()}
+    return {name: f.result() for name, f in futures.items()}
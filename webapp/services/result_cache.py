@@ -0,0 +1,216 @@
+"""Content-addressed cache of fit results.
+
+Results are keyed by a hash of the parsed data arrays plus every fit input
+(model type, method, bounds, initial values, vary flags and corrections), so
+refitting the same file with the same settings is a lookup instead of a
+Powell/Nelder run. Payloads are the plain dicts produced by
+`hydrogen_fitting.result_payload()`.
+
+Two backends share the same interface (`get`, `set`, `stats`, `clear`):
+
+- `MemoryResultCache`: in-process LRU, bounded by entry count and by the
+  encoded (npz) size of its payloads.
+- `SQLiteResultCache`: a table in a SQLite file (the project's `db.sqlite3`
+  by default) so results survive gunicorn restarts and are shared by workers.
+
+The active backend is chosen with `THEHER_RESULT_CACHE` (`memory`, `sqlite`
+or `off`) and `THEHER_RESULT_CACHE_PATH`; `THEHER_RESULT_CACHE_MAX_BYTES`
+(default 256 MB) is the memory backend's byte budget.
+"""
+import io
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+
+def dataset_hash(arr):
+    """Return a sha256 hex digest of a numeric array (shape + float64 bytes)."""
+    a = np.ascontiguousarray(np.asarray(arr, dtype=np.float64))
+    h = hashlib.sha256()
+    h.update(str(a.shape).encode('ascii'))
+    h.update(a.tobytes())
+    return h.hexdigest()
+
+
+def fit_cache_key(arr, config):
+    """Return the cache key for data `arr` fitted with the `config` dict."""
+    cfg = json.dumps(config, sort_keys=True, default=repr)
+    return hashlib.sha256((dataset_hash(arr) + '|' + cfg).encode('utf-8')).hexdigest()
+
+
+def encode_payload(payload):
+    """Serialize a payload dict to bytes (arrays as .npy entries, the rest as JSON); no pickle."""
+    arrays = {}
+    meta = {}
+    for k, v in payload.items():
+        if isinstance(v, np.ndarray):
+            arrays[k] = v
+        else:
+            meta[k] = v
+    arrays['__meta__'] = np.frombuffer(json.dumps(meta, default=float).encode('utf-8'), dtype=np.uint8)
+    buf = io.BytesIO()
+    np.savez(buf, **arrays)
+    return buf.getvalue()
+
+
+def decode_payload(blob):
+    with np.load(io.BytesIO(blob), allow_pickle=False) as z:
+        out = json.loads(bytes(z['__meta__']).decode('utf-8'))
+        for k in z.files:
+            if k != '__meta__':
+                out[k] = z[k]
+    return out
+
+
+class _Counters:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'sets': self.sets,
+                'hit_rate': (self.hits / total) if total else None}
+
+
+class MemoryResultCache:
+    backend = 'memory'
+
+    def __init__(self, max_entries=128, max_bytes=None):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = int(max_bytes) if max_bytes else None
+        self.nbytes = 0
+        # key -> (payload, encoded size)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = _Counters()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self._counters.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._counters.hits += 1
+            return dict(item[0])
+
+    def set(self, key, payload):
+        """Store `payload`; the newest entry is kept even when it alone exceeds `max_bytes`."""
+        # measured as the SQLite backend would store it
+        size = len(encode_payload(payload)) if self.max_bytes else 0
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            self._data[key] = (dict(payload), size)
+            self.nbytes += size
+            self._counters.sets += 1
+            while len(self._data) > self.max_entries or (
+                    self.max_bytes and self.nbytes > self.max_bytes and len(self._data) > 1):
+                _, (_, dropped) = self._data.popitem(last=False)
+                self.nbytes -= dropped
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            out = self._counters.as_dict()
+            out.update(backend=self.backend, entries=len(self._data), max_entries=self.max_entries,
+                       bytes=self.nbytes, max_bytes=self.max_bytes)
+            return out
+
+
+class SQLiteResultCache:
+    backend = 'sqlite'
+    table = 'her_fit_cache'
+
+    def __init__(self, path, max_entries=1000):
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self._counters = _Counters()
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(f'CREATE TABLE IF NOT EXISTS {self.table} ('
+                         'key TEXT PRIMARY KEY, payload BLOB NOT NULL, '
+                         'created REAL NOT NULL, last_used REAL NOT NULL)')
+
+    def _connect(self):
+        # one short-lived connection per call keeps this safe across threads and forks
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, key):
+        try:
+            with self._connect() as conn:
+                row = conn.execute(f'SELECT payload FROM {self.table} WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    conn.execute(f'UPDATE {self.table} SET last_used = ? WHERE key = ?', (time.time(), key))
+        except sqlite3.Error:
+            row = None
+        with self._lock:
+            if row is None:
+                self._counters.misses += 1
+                return None
+            self._counters.hits += 1
+        return decode_payload(row[0])
+
+    def set(self, key, payload):
+        blob = encode_payload(payload)
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(f'INSERT OR REPLACE INTO {self.table} (key, payload, created, last_used) '
+                             'VALUES (?, ?, ?, ?)', (key, sqlite3.Binary(blob), now, now))
+                # evict least recently used rows beyond the configured size
+                conn.execute(f'DELETE FROM {self.table} WHERE key NOT IN '
+                             f'(SELECT key FROM {self.table} ORDER BY last_used DESC LIMIT ?)',
+                             (self.max_entries,))
+        except sqlite3.Error:
+            return
+        with self._lock:
+            self._counters.sets += 1
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute(f'DELETE FROM {self.table}')
+
+    def stats(self):
+        try:
+            with self._connect() as conn:
+                entries = conn.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        with self._lock:
+            out = self._counters.as_dict()
+        out.update(backend=self.backend, entries=entries, max_entries=self.max_entries, path=self.path)
+        return out
+
+
+def _build_default_cache():
+    kind = os.environ.get('THEHER_RESULT_CACHE', 'memory').lower()
+    size = int(os.environ.get('THEHER_RESULT_CACHE_MAX', 0) or 0)
+    if kind in ('off', 'none', '0', 'false'):
+        return None
+    if kind == 'sqlite':
+        path = os.environ.get('THEHER_RESULT_CACHE_PATH') or os.path.join(BASE_DIR, 'db.sqlite3')
+        return SQLiteResultCache(path, max_entries=size or 1000)
+    try:
+        max_bytes = float(os.environ.get('THEHER_RESULT_CACHE_MAX_BYTES', 256 * 2 ** 20))
+    except ValueError:
+        max_bytes = 256 * 2 ** 20
+    return MemoryResultCache(max_entries=size or 128, max_bytes=max_bytes)
+
+
+RESULT_CACHE = _build_default_cache()
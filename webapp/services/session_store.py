@@ -0,0 +1,143 @@
+"""Bounded in-process store for fitted analysis sessions.
+
+A session holds a fitted `hydrogen_fitting` instance (its `ModelResult` and
+corrected arrays) so that plot, theta, Tafel and export requests can reuse
+one fit instead of re-running the optimizer. Entries are evicted in LRU
+order once `max_entries` is reached or their arrays add up to more than
+`max_bytes`, and expire after `ttl` seconds of inactivity, so memory stays
+flat under load.
+
+The store is per process: with several gunicorn workers a session id is
+only known to the worker that created it, and callers fall back to a refit
+when the id is missing.
+"""
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+def value_nbytes(value, depth=4, _seen=None):
+    """Approximate in-memory size of the NumPy arrays reachable from `value`.
+
+    Follows dicts, lists, tuples and object attributes up to `depth` levels.
+    Arrays sharing a buffer are counted once, and memory-mapped arrays not
+    at all (their pages belong to the OS cache, not to the process).
+    """
+    seen = set() if _seen is None else _seen
+    if isinstance(value, np.ndarray):
+        owner = value
+        while isinstance(owner.base, np.ndarray):
+            owner = owner.base
+        if isinstance(owner, np.memmap) or id(owner) in seen:
+            return 0
+        seen.add(id(owner))
+        return int(owner.nbytes)
+    if depth <= 0 or value is None or isinstance(value, (str, bytes, int, float, bool)):
+        return 0
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, dict):
+        items = value.values()
+    elif isinstance(value, (list, tuple)):
+        items = value
+    elif hasattr(value, '__dict__'):
+        items = vars(value).values()
+    else:
+        return 0
+    return sum(value_nbytes(v, depth - 1, seen) for v in items)
+
+
+class SessionStore:
+    def __init__(self, max_entries=32, ttl=1800.0, max_bytes=None, sizer=value_nbytes):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl) if ttl else None
+        self.max_bytes = int(max_bytes) if max_bytes else None
+        # value -> bytes it holds, for the max_bytes budget
+        self.sizer = sizer
+        self.nbytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expired(self, stamp, now):
+        return self.ttl is not None and (now - stamp) > self.ttl
+
+    def _pop_oldest(self):
+        _, (_, _, size) = self._data.popitem(last=False)
+        self.nbytes -= size
+
+    def _purge(self, now):
+        # entries are kept in access order, so expired ones sit at the front
+        while self._data:
+            sid, (stamp, _, _) = next(iter(self._data.items()))
+            if not self._expired(stamp, now):
+                break
+            self._pop_oldest()
+
+    def put(self, value, session_id=None):
+        """Store `value` and return its session id (a new one if not given).
+
+        The newest entry is kept even when it alone exceeds `max_bytes`.
+        """
+        sid = session_id or uuid.uuid4().hex
+        size = self.sizer(value) if self.max_bytes else 0
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            old = self._data.pop(sid, None)
+            if old is not None:
+                self.nbytes -= old[2]
+            self._data[sid] = (now, value, size)
+            self.nbytes += size
+            while len(self._data) > self.max_entries or (
+                    self.max_bytes and self.nbytes > self.max_bytes and len(self._data) > 1):
+                self._pop_oldest()
+        return sid
+
+    def get(self, session_id):
+        """Return the stored value or None if unknown/expired; refreshes its LRU slot."""
+        if not session_id:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            item = self._data.get(session_id)
+            if item is None:
+                return None
+            self._data[session_id] = (now, item[1], item[2])
+            self._data.move_to_end(session_id)
+            return item[1]
+
+    def discard(self, session_id):
+        with self._lock:
+            item = self._data.pop(session_id, None)
+            if item is not None:
+                self.nbytes -= item[2]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        with self._lock:
+            self._purge(time.monotonic())
+            return len(self._data)
+
+    def __contains__(self, session_id):
+        return self.get(session_id) is not None
+
+
+def _env_number(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except Exception:
+        return default
+
+
+SESSIONS = SessionStore(max_entries=int(_env_number('THEHER_SESSION_MAX', 32)),
+                        ttl=_env_number('THEHER_SESSION_TTL', 1800.0),
+                        max_bytes=_env_number('THEHER_SESSION_MAX_BYTES', 512 * 2 ** 20))
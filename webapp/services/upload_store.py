@@ -0,0 +1,255 @@
+"""Content-addressed store for uploaded data files.
+
+Uploads are written to `<root>/<sha[:2]>/<sha256>` through a temp file in
+the same directory and `os.replace`, so a reader never sees a partial file
+and two users uploading different `data.csv` files can no longer overwrite
+each other mid-fit. Identical bytes are stored once; a repeat upload only
+refreshes the file's mtime, and its parsed binary form in the dataset store
+(keyed by the same digest) is reused.
+
+An opportunistic sweep after saves (here and in the dataset store, which
+reports its writes through `added`) keeps the uploads plus the dataset store
+under a disk quota by deleting the least recently used entries, and drops
+entries unused for longer than `max_age`. The files shipped in
+`webapp/uploads` itself are never touched.
+
+A sweep started by one request must not delete what another request has
+just saved and is about to parse or memory-map. Users hold a `lease` on the
+paths they work with (a refcount, per process), and no entry used within
+the last `min_age` seconds is evicted, which also covers other worker
+processes. Leasing an entry or reading a stored dataset touches its mtime,
+so the LRU order follows real use.
+
+Configured with `THEHER_UPLOAD_DIR` (default `webapp/uploads/store`),
+`THEHER_UPLOAD_QUOTA_MB` (default 512, 0 disables the quota),
+`THEHER_UPLOAD_MAX_AGE` (seconds, default 7 days, 0 disables) and
+`THEHER_UPLOAD_MIN_AGE` (seconds, default 300).
+"""
+import os
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from .dataset_store import DATASETS
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _iter_chunks(file_storage, chunk=1 << 20):
+    # Django UploadedFile, file-like objects and raw bytes/str
+    if hasattr(file_storage, 'chunks'):
+        yield from file_storage.chunks()
+    elif hasattr(file_storage, 'read'):
+        for block in iter(lambda: file_storage.read(chunk), b''):
+            if not block:
+                break
+            yield block.encode('utf-8') if isinstance(block, str) else block
+    elif isinstance(file_storage, str):
+        yield file_storage.encode('utf-8')
+    elif isinstance(file_storage, (bytes, bytearray)):
+        yield bytes(file_storage)
+    else:
+        raise TypeError(f'Cannot read upload of type {type(file_storage).__name__}')
+
+
+def _entry_size(path):
+    if os.path.isdir(path):
+        total = 0
+        for dirpath, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, name))
+                except OSError:
+                    pass
+        return total
+    return os.path.getsize(path)
+
+
+class UploadStore:
+    def __init__(self, root, quota_bytes=512 * 2 ** 20, max_age=7 * 86400.0, datasets=None,
+                 sweep_interval=60.0, min_age=300.0):
+        self.root = os.path.abspath(root)
+        self.quota_bytes = int(quota_bytes or 0)
+        self.max_age = float(max_age) if max_age else None
+        self.min_age = float(min_age or 0.0)
+        self.datasets = datasets
+        if datasets is not None:
+            # datasets written by fits from file paths count against the same quota
+            datasets.quota = self
+        self.sweep_interval = float(sweep_interval)
+        self._lock = threading.Lock()
+        # path -> number of holders; leased entries are never evicted
+        self._leases = {}
+        self._last_sweep = 0.0
+        self._added = 0
+        self.saved = 0
+        self.deduped = 0
+        self.evicted = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def save(self, file_storage, digest=None):
+        """Store an upload and return (path, sha256 digest).
+
+        With a known `digest` (the streaming upload handler computes it) an
+        already-stored file is reused without reading the upload again.
+        """
+        if digest and os.path.exists(self.path(digest)):
+            return self._touch(digest), digest
+        tmp = os.path.join(self.root, f'.tmp-{uuid.uuid4().hex}')
+        h = hashlib.sha256()
+        size = 0
+        try:
+            with open(tmp, 'wb') as f:
+                for block in _iter_chunks(file_storage):
+                    h.update(block)
+                    f.write(block)
+                    size += len(block)
+            digest = h.hexdigest()
+            path = self.path(digest)
+            if os.path.exists(path):
+                return self._touch(digest), digest
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        with self._lock:
+            self.saved += 1
+        self.added(size, keep=path)
+        return path, digest
+
+    def added(self, size, keep=None):
+        """Account for `size` new bytes under the quota (at `keep`, spared) and sweep if due."""
+        with self._lock:
+            self._added += int(size)
+        return self.maybe_sweep(keep=keep)
+
+    def _touch(self, digest):
+        path = self.touch(self.path(digest))
+        with self._lock:
+            self.deduped += 1
+        return path
+
+    @staticmethod
+    def touch(path):
+        """Mark `path` (an upload or dataset directory) as just used; returns it."""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    @contextmanager
+    def lease(self, *paths):
+        """Keep `paths` from being evicted while the block runs; they are touched as a use.
+
+        Falsy paths are ignored, and paths outside the store are harmless.
+        """
+        paths = [os.path.abspath(p) for p in paths if p]
+        with self._lock:
+            for p in paths:
+                self._leases[p] = self._leases.get(p, 0) + 1
+        for p in paths:
+            self.touch(p)
+        try:
+            yield
+        finally:
+            with self._lock:
+                for p in paths:
+                    n = self._leases.get(p, 0) - 1
+                    if n > 0:
+                        self._leases[p] = n
+                    else:
+                        self._leases.pop(p, None)
+
+    def _entries(self):
+        """(mtime, size, path) of every stored upload and dataset directory."""
+        out = []
+        roots = [(self.root, False)]
+        if self.datasets is not None:
+            roots.append((self.datasets.root, True))
+        for root, dirs in roots:
+            if not os.path.isdir(root):
+                continue
+            for shard in os.scandir(root):
+                if not shard.is_dir() or shard.name.startswith('.'):
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.name.startswith('.') or entry.is_dir() != dirs:
+                        continue
+                    try:
+                        out.append((entry.stat().st_mtime, _entry_size(entry.path), entry.path))
+                    except OSError:
+                        pass
+        return out
+
+    def maybe_sweep(self, keep=None):
+        """Sweep when the interval has passed or a tenth of the quota was added since the last sweep."""
+        now = time.time()
+        with self._lock:
+            due = (now - self._last_sweep >= self.sweep_interval
+                   or (self.quota_bytes and self._added * 10 >= self.quota_bytes))
+            if not due:
+                return 0
+            self._last_sweep = now
+            self._added = 0
+        try:
+            return self.sweep(keep=keep)
+        except Exception:
+            return 0
+
+    def sweep(self, keep=None):
+        """Evict expired entries, then least recently used ones until under quota; returns the count.
+
+        Leased entries, `keep` and entries used within `min_age` seconds stay.
+        """
+        entries = sorted(self._entries())
+        now = time.time()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            expired = self.max_age is not None and now - mtime > self.max_age
+            over = bool(self.quota_bytes) and total > self.quota_bytes
+            if not (expired or over) or path == keep or now - mtime < self.min_age:
+                continue
+            # leases and touches may have come in since the listing: check again under the lock
+            with self._lock:
+                try:
+                    if self._leases.get(path) or os.stat(path).st_mtime != mtime:
+                        continue
+                    if os.path.isdir(path):
+                        shutil.rmtree(path)
+                    else:
+                        os.remove(path)
+                except OSError:
+                    continue
+            total -= size
+            removed += 1
+        with self._lock:
+            self.evicted += removed
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {'root': self.root, 'quota_bytes': self.quota_bytes, 'max_age': self.max_age,
+                    'min_age': self.min_age, 'leased': len(self._leases), 'saved': self.saved, 'deduped': self.deduped, 'evicted': self.evicted}
+
+
+def _env_number(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except Exception:
+        return default
+
+
+UPLOADS = UploadStore(os.environ.get('THEHER_UPLOAD_DIR') or os.path.join(BASE_DIR, 'uploads', 'store'),
+                      quota_bytes=_env_number('THEHER_UPLOAD_QUOTA_MB', 512) * 2 ** 20,
+                      max_age=_env_number('THEHER_UPLOAD_MAX_AGE', 7 * 86400.0),
+                      min_age=_env_number('THEHER_UPLOAD_MIN_AGE', 300.0),
+                      datasets=DATASETS)
@@ -0,0 +1,95 @@
+"""Binary on-disk form of a parsed data file.
+
+A dataset is a directory holding `columns.npy` (the file's numeric
+columns, float64, column-major) and `meta.json` (the sniffed format, the
+column indices kept and free-form metadata). `load_dataset` memory-maps the
+array read-only, so reloading costs no parsing and no copy, and every
+process that maps the same file shares its pages through the OS page cache.
+
+The raw columns are stored, not the corrected potential/current: the ohmic
+drop, reference and area corrections come from the request and are applied
+by `hydrogen_fitting._process_variables` on every load.
+"""
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import numpy as np
+
+from .parsers import ParsedColumns, ParseFormat
+
+FORMAT_VERSION = 1
+ARRAY_FILE = 'columns.npy'
+META_FILE = 'meta.json'
+
+
+def file_digest(source, chunk=1 << 20):
+    """sha256 hex digest of a path or binary file object (read in 1 MB chunks)."""
+    h = hashlib.sha256()
+    if hasattr(source, 'read'):
+        pos = source.tell() if hasattr(source, 'tell') else None
+        for block in iter(lambda: source.read(chunk), b''):
+            h.update(block)
+        if pos is not None:
+            source.seek(pos)
+    else:
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(chunk), b''):
+                h.update(block)
+    return h.hexdigest()
+
+
+def save_dataset(path, parsed, meta=None):
+    """Write `parsed` (ParsedColumns) to the dataset directory `path` atomically.
+
+    The files are written to a sibling temp directory that is then renamed
+    into place, so readers never see a half-written dataset. An existing
+    dataset at `path` is left as is.
+    """
+    if os.path.exists(os.path.join(path, META_FILE)):
+        return path
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp = os.path.join(parent, f'.tmp-{uuid.uuid4().hex}')
+    os.makedirs(tmp)
+    try:
+        np.save(os.path.join(tmp, ARRAY_FILE), np.asfortranarray(parsed.data, dtype=np.float64))
+        fmt = parsed.fmt
+        info = {
+            'version': FORMAT_VERSION,
+            'rows': int(parsed.data.shape[0]),
+            'columns': list(parsed.columns),
+            'format': {'sep': fmt.sep, 'skiprows': fmt.skiprows, 'decimal': fmt.decimal,
+                       'n_columns': fmt.n_columns, 'encoding': fmt.encoding},
+            'meta': meta or {},
+        }
+        with open(os.path.join(tmp, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(info, f)
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            # another process stored the same dataset first
+            if not os.path.exists(os.path.join(path, META_FILE)):
+                raise
+    finally:
+        if os.path.exists(tmp):
+            shutil.rmtree(tmp, ignore_errors=True)
+    return path
+
+
+def load_meta(path):
+    with open(os.path.join(path, META_FILE), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_dataset(path, mmap=True):
+    """Return the ParsedColumns stored in `path`, memory-mapped read-only when `mmap`."""
+    info = load_meta(path)
+    if info.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported dataset version {info.get('version')!r} in {path}")
+    data = np.load(os.path.join(path, ARRAY_FILE), mmap_mode='r' if mmap else None, allow_pickle=False)
+    fmt = ParseFormat(**info['format'])
+    parsed = ParsedColumns(data, fmt, info['columns'])
+    parsed.meta = info.get('meta', {})
+    return parsed
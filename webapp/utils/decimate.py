@@ -0,0 +1,110 @@
+"""Visual-preserving downsampling of curves for display.
+
+A plot a few hundred pixels wide cannot show 500k points, so display
+payloads and server-rendered images are reduced to at most `max_points`
+before they leave the server. Exports never go through this stage.
+
+- `minmax`: splits x into buckets and keeps the minimum and maximum of
+  every bucket. The drawn envelope is exact at bucket resolution, so noise
+  and spikes stay visible. This is the default for raster images.
+- `lttb` (largest-triangle-three-buckets): keeps, per bucket, the point
+  forming the largest triangle with the previous pick and the next
+  bucket's mean. The result has fewer points for the same look on smooth
+  curves, which suits interactive charts.
+
+Several series on one x grid (measured, fitted and theta on the potential
+grid) get one shared index set, the union of each series' picks, so they
+stay aligned. Non-finite values are skipped when choosing points.
+"""
+import numpy as np
+
+METHODS = ('lttb', 'minmax')
+
+
+def _edges(n, n_buckets):
+    return np.unique(np.linspace(0, n, n_buckets + 1).astype(np.int64))
+
+
+def minmax_indices(y, n_out):
+    """Indices of the min and max of `y` in n_out // 2 buckets (plus the end points)."""
+    y = np.asarray(y, dtype=float)
+    n = y.shape[0]
+    if n <= n_out:
+        return np.arange(n)
+    edges = _edges(n, max(1, n_out // 2))
+    bucket = np.repeat(np.arange(edges.shape[0] - 1), np.diff(edges))
+    picks = [np.array([0, n - 1])]
+    with np.errstate(invalid='ignore'):
+        for reduce in (np.fmin, np.fmax):
+            # fmin/fmax skip NaN; all-NaN buckets give NaN and match nothing
+            best = reduce.reduceat(y, edges[:-1])
+            hits = np.flatnonzero(y == best[bucket])
+            _, first = np.unique(bucket[hits], return_index=True)
+            picks.append(hits[first])
+    return np.unique(np.concatenate(picks))
+
+
+def lttb_indices(x, y, n_out):
+    """Indices chosen by largest-triangle-three-buckets (first and last always kept)."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    finite = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    n = finite.shape[0]
+    if n <= max(n_out, 2):
+        return finite
+    xs, ys = x[finite], y[finite]
+    n_out = max(n_out, 3)
+    # the inner points are split into n_out - 2 buckets; the first and last points are fixed
+    edges = 1 + _edges(n - 2, n_out - 2)
+    # mean of every bucket, used as the third vertex for the bucket before it
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(xs, edges[:-1]) / counts
+    mean_y = np.add.reduceat(ys, edges[:-1]) / counts
+    out = np.empty(edges.shape[0] + 1, dtype=np.int64)
+    out[0] = 0
+    prev = 0
+    for b in range(edges.shape[0] - 1):
+        lo, hi = edges[b], edges[b + 1]
+        if b + 1 < edges.shape[0] - 1:
+            cx, cy = mean_x[b + 1], mean_y[b + 1]
+        else:
+            cx, cy = xs[-1], ys[-1]
+        ax, ay = xs[prev], ys[prev]
+        # twice the triangle area; the constant factor does not change the argmax
+        area = np.abs((ax - cx) * (ys[lo:hi] - ay) - (ax - xs[lo:hi]) * (cy - ay))
+        prev = lo + int(np.argmax(area))
+        out[b + 1] = prev
+    out[-1] = n - 1
+    return finite[out]
+
+
+def decimate_indices(x, ys, max_points, method='lttb'):
+    """Return sorted indices that keep every series in `ys` within about `max_points` points.
+
+    Returns None when no reduction is needed (`max_points` falsy or the
+    data already small enough).
+    """
+    if method not in METHODS:
+        raise ValueError(f'Unknown decimation method {method!r}; expected one of {METHODS}')
+    n = np.asarray(x).shape[0]
+    ys = [y for y in ys if y is not None]
+    if not max_points or n <= max_points or not ys:
+        return None
+    # each series gets an equal share of the budget; the union is what gets sent
+    share = max(4, int(max_points) // len(ys))
+    picks = [lttb_indices(x, y, share) if method == 'lttb' else minmax_indices(y, share) for y in ys]
+    return np.unique(np.concatenate(picks))
+
+
+def decimate(arrays, x_key, max_points, method='lttb'):
+    """Apply one shared index set to {name: array or None} on the grid `arrays[x_key]`.
+
+    Returns (arrays, n_before); `arrays` is the input unchanged when no
+    reduction was needed.
+    """
+    x = arrays[x_key]
+    n = np.asarray(x).shape[0]
+    idx = decimate_indices(x, [v for k, v in arrays.items() if k != x_key], max_points, method)
+    if idx is None:
+        return arrays, n
+    return {k: (np.asarray(v)[idx] if v is not None else None) for k, v in arrays.items()}, n
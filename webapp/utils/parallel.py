@@ -0,0 +1,44 @@
+"""Process-pool helpers shared by the fitting code.
+
+Workers are started with the `fork` method on Linux (cheap: the parent has
+already imported numpy/lmfit) and `spawn` elsewhere. Override with
+`THEHER_MP_START_METHOD`. `THEHER_FIT_JOBS` caps the default worker count.
+"""
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except Exception:
+        return os.cpu_count() or 1
+
+
+def resolve_jobs(n_jobs=None, n_tasks=None):
+    """Return the worker count for `n_jobs` (None/0/-1 = all cores), capped by `n_tasks`."""
+    try:
+        jobs = int(n_jobs) if n_jobs not in (None, '') else 0
+    except Exception:
+        jobs = 0
+    if jobs <= 0:
+        try:
+            jobs = int(os.environ.get('THEHER_FIT_JOBS', 0)) or cpu_count()
+        except Exception:
+            jobs = cpu_count()
+    if n_tasks is not None:
+        jobs = min(jobs, max(1, int(n_tasks)))
+    return max(1, jobs)
+
+
+def mp_context():
+    method = os.environ.get('THEHER_MP_START_METHOD')
+    if not method:
+        method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() and os.name == 'posix' else 'spawn'
+    return multiprocessing.get_context(method)
+
+
+def process_pool(n_jobs=None):
+    """Return a ProcessPoolExecutor with `resolve_jobs(n_jobs)` workers."""
+    return ProcessPoolExecutor(max_workers=resolve_jobs(n_jobs), mp_context=mp_context())
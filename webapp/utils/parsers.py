@@ -1,46 +1,508 @@
+"""Parsing of potentiostat exports into float64 (current, potential) columns.
+
+One code path serves the model (`hydrogen_fitting._load_data`) and the
+service layer. `sniff_format` looks at the head of the file once to find
+the delimiter (csv.Sniffer, checked against the numeric rows), the number
+of header lines to skip and the decimal mark. The body is then read by the
+pandas C engine with `usecols`, so only the two needed columns are
+materialised, and converted to float64 in one vectorized step. Rows that
+are not numeric in either column (units lines, footers) are dropped.
+
+Large inputs are read in chunks of `CHUNK_ROWS` rows straight into a
+growable float64 `ColumnBuffer`, so peak memory stays near the size of the
+kept columns instead of several times the file. `StreamingColumnParser`
+runs the same chunked reader on a background thread fed with bytes as they
+arrive (e.g. from an upload handler), so parsing overlaps the upload.
+"""
+import io
 import os
+import re
+import csv
+import queue
+import threading
 import pandas as pd
 import numpy as np
 
-def detect_separator(path, sample_lines=5):
-    # Try common separators by sampling the file
-    try:
-        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-            sample = ''.join([next(f) for _ in range(sample_lines)])
-    except Exception:
+SNIFF_BYTES = 64 * 1024
+CHUNK_ROWS = 250_000
+# files above this size are parsed chunk by chunk
+CHUNKED_BYTES = 16 * 2 ** 20
+DELIMITERS = (',', '\t', ';', ' ')
+WHITESPACE = r'\s+'
+
+_NUMBER = {
+    '.': re.compile(r'^[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?$'),
+    ',': re.compile(r'^[+-]?(\d+(,\d*)?|,\d+)([eE][+-]?\d+)?$'),
+}
+
+
+class ParseFormat:
+    """What `sniff_format` found out about a file."""
+
+    def __init__(self, sep, skiprows=0, decimal='.', n_columns=0, encoding='utf-8'):
+        self.sep = sep
+        self.skiprows = skiprows
+        self.decimal = decimal
+        self.n_columns = n_columns
+        self.encoding = encoding
+
+    def __repr__(self):
+        return (f'ParseFormat(sep={self.sep!r}, skiprows={self.skiprows}, decimal={self.decimal!r}, '
+                f'n_columns={self.n_columns})')
+
+
+def normalize_delimiter(delimiter):
+    """Map UI values ('auto', '\\t', 'tab', ...) to a separator, or None for auto-detection."""
+    if delimiter is None or delimiter in ('', 'auto', 'auto-detect'):
         return None
+    aliases = {'\\t': '\t', 'tab': '\t', 'comma': ',', 'semicolon': ';', 'space': WHITESPACE,
+               ' ': WHITESPACE, 'whitespace': WHITESPACE}
+    return aliases.get(delimiter, delimiter)
+
+
+def _split(line, sep):
+    return line.split() if sep == WHITESPACE else [f.strip().strip('"') for f in line.split(sep)]
+
+
+def _numeric_fields(line, sep, decimal):
+    # (non-empty fields, numeric fields); empty fields come from trailing separators
+    fields = [f for f in _split(line, sep) if f]
+    number = _NUMBER[decimal]
+    return len(fields), sum(1 for f in fields if number.match(f))
+
+
+def _read_head(source):
+    if isinstance(source, (bytes, bytearray)):
+        raw = bytes(source[:SNIFF_BYTES])
+    elif hasattr(source, 'read'):
+        pos = source.tell() if hasattr(source, 'tell') else None
+        raw = source.read(SNIFF_BYTES)
+        if pos is not None:
+            source.seek(pos)
+    else:
+        with open(source, 'rb') as f:
+            raw = f.read(SNIFF_BYTES)
+    if isinstance(raw, str):
+        return raw, 'utf-8'
+    encoding = 'utf-8-sig' if raw.startswith(b'\xef\xbb\xbf') else 'utf-8'
+    text = raw.decode(encoding, errors='ignore')
+    # the sample may end mid-line
+    if len(raw) == SNIFF_BYTES and '\n' in text:
+        text = text[:text.rindex('\n')]
+    return text, encoding
+
+
+def sniff_format(source, delimiter='auto'):
+    """Return a ParseFormat for a path, bytes or binary file object.
+
+    The delimiter is taken from `delimiter` when given, otherwise from
+    csv.Sniffer; either way it is validated against the numeric body
+    (whitespace is tried last). Header lines are those before the first run
+    of rows with at least two numeric fields.
+    """
+    text, encoding = _read_head(source)
+    lines = [ln for ln in text.splitlines() if ln.strip() and not ln.lstrip().startswith('#')]
+    if not lines:
+        raise ValueError('File is empty')
+
+    def score(sep, decimal, strict):
+        # rows that split into a consistent number of >= 2 numeric fields (all numeric when strict)
+        counts = [_numeric_fields(ln, sep, decimal) for ln in lines]
+        body = [i for i, (n, k) in enumerate(counts) if k >= 2 and (k == n or not strict)]
+        if not body:
+            return 0, 0, 0
+        widths = [counts[i][0] for i in body]
+        width = max(set(widths), key=widths.count)
+        good = sum(1 for w in widths if w == width)
+        return good, body[0], width
+
+    candidates = []
+    given = normalize_delimiter(delimiter)
+    if given is not None:
+        candidates.append(given)
+    else:
+        try:
+            sniffed = csv.Sniffer().sniff('\n'.join(lines[-50:]), delimiters=''.join(DELIMITERS)).delimiter
+            candidates.append(WHITESPACE if sniffed == ' ' else sniffed)
+        except csv.Error:
+            pass
+        candidates += [d for d in (',', '\t', ';', WHITESPACE) if d not in candidates]
 
-    candidates = [',', '\t', ';', ' ']
     best = None
-    best_count = 0
-    for c in candidates:
-        count = sample.count(c)
-        if count > best_count:
-            best_count = count
-            best = c
-    return best
+    # all-numeric rows decide first (so '-0,95;-0,01' is not read as comma separated);
+    # the relaxed pass admits exports with an extra text column
+    for strict in (True, False):
+        for sep in candidates:
+            for decimal in ('.', ',') if sep != ',' else ('.',):
+                good, first, width = score(sep, decimal, strict)
+                if good and (best is None or good > best[0]):
+                    best = (good, sep, decimal, first, width)
+            if given is not None:
+                break
+        if best is not None:
+            break
+    if best is None:
+        raise ValueError('No numeric rows found')
+    _, sep, decimal, first, width = best
 
+    # map the header index among non-comment lines back to a physical line number
+    physical = 0
+    seen = 0
+    for ln in text.splitlines():
+        if ln.strip() and not ln.lstrip().startswith('#'):
+            if seen == first:
+                break
+            seen += 1
+        physical += 1
+    return ParseFormat(sep, skiprows=physical, decimal=decimal, n_columns=width, encoding=encoding)
 
-def parse_data_file(path, delimiter='auto', current_col=1, potential_col=2, skiprows=0):
-    """Parse an uploaded data file and return (potential, current) as numpy arrays.
 
-    Columns are 1-based by default (UI-friendly). Returns (potential, current).
+def _select_columns(n_columns, current_col, potential_col):
+    """0-based (current, potential) indices, falling back to the first two columns like before."""
+    try:
+        cols = [int(current_col), int(potential_col)]
+    except Exception:
+        cols = [0, 1]
+    if min(cols) < 0 or max(cols) >= max(n_columns, 2) or cols[0] == cols[1]:
+        cols = [0, 1]
+    return cols
+
+
+def read_csv_kwargs(fmt, cols):
+    """pandas.read_csv keyword arguments for the C engine."""
+    kws = dict(sep=fmt.sep, header=None, skiprows=fmt.skiprows, usecols=cols, comment='#',
+               engine='c', decimal=fmt.decimal, skip_blank_lines=True, on_bad_lines='skip',
+               encoding=fmt.encoding, quotechar='"')
+    return kws
+
+
+def to_float_columns(df, cols, how='any'):
+    """Return a float64 array of `cols` without non-numeric rows.
+
+    `how='any'` drops a row when any column is not numeric, `how='all'`
+    only when none is.
+    """
+    if all(df[c].dtype.kind == 'f' for c in cols):
+        arr = df[cols].to_numpy(dtype=np.float64)
+    else:
+        arr = np.column_stack([pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=np.float64) for c in cols])
+    bad = np.isnan(arr).any(axis=1) if how == 'any' else np.isnan(arr).all(axis=1)
+    return arr[~bad]
+
+
+def _coerce_block(df, cols, decimal, how='any'):
+    if decimal == ',':
+        # text columns still hold decimal commas that to_numeric would reject
+        for c in cols:
+            if df[c].dtype.kind != 'f':
+                df[c] = df[c].astype(str).str.replace(',', '.', regex=False)
+    return to_float_columns(df, cols, how)
+
+
+def load_columns(source, delimiter='auto', current_col=0, potential_col=1, skiprows=None):
+    """Parse `source` (path, bytes or binary file) and return an (n, 2) float64 array.
+
+    Column 0 is the current and column 1 the potential; `current_col` and
+    `potential_col` are 0-based. If the file has fewer columns than
+    requested, the first two are used. `skiprows` skips at least that many
+    leading lines on top of the detected header. Files over
+    `CHUNKED_BYTES` go through `load_columns_chunked`.
     """
-    if not os.path.exists(path):
-        raise FileNotFoundError(path)
+    if isinstance(source, (str, os.PathLike)):
+        if not os.path.exists(source):
+            raise FileNotFoundError(source)
+        if os.path.getsize(source) > CHUNKED_BYTES:
+            return load_columns_chunked(source, delimiter, current_col, potential_col, skiprows=skiprows)
+    fmt = sniff_format(source, delimiter)
+    if skiprows:
+        fmt.skiprows = max(fmt.skiprows, int(skiprows))
+    cols = _select_columns(fmt.n_columns, current_col, potential_col)
+    kws = read_csv_kwargs(fmt, cols)
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    try:
+        df = pd.read_csv(source, dtype=np.float64, **kws)
+    except (ValueError, TypeError):
+        # a units row or footer inside the body: read as text and coerce per column
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        df = pd.read_csv(source, dtype=str, **kws)
+    # usecols keeps file order; put current first
+    return _coerce_block(df, cols, fmt.decimal)
+
+
+class ColumnBuffer:
+    """Growable (n, k) float64 array filled block by block.
+
+    Capacity doubles when full, so appending N rows costs O(N) copies in
+    total; `array()` returns the filled rows.
+    """
+
+    def __init__(self, n_columns=2, capacity=65536):
+        self._data = np.empty((max(1, int(capacity)), int(n_columns)))
+        self.n = 0
+
+    def append(self, block):
+        m = block.shape[0]
+        if self.n + m > self._data.shape[0]:
+            grown = np.empty((max(self.n + m, 2 * self._data.shape[0]), self._data.shape[1]))
+            grown[:self.n] = self._data[:self.n]
+            self._data = grown
+        self._data[self.n:self.n + m] = block
+        self.n += m
+
+    def array(self):
+        # trim the slack only when it is worth a copy
+        if self._data.shape[0] - self.n > self._data.shape[0] // 8:
+            return self._data[:self.n].copy()
+        return self._data[:self.n]
+
 
-    sep = None
-    if isinstance(delimiter, str) and delimiter != 'auto' and delimiter != 'auto-detect':
-        if delimiter == '\\t':
-            sep = '\t'
+def iter_blocks(source, fmt, cols, chunksize=CHUNK_ROWS, how='any'):
+    """Yield float64 blocks of `cols` from `source`, `chunksize` rows at a time."""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    # no fixed dtype: each chunk is inferred on its own, so a footer only slows its own chunk
+    with pd.read_csv(source, chunksize=chunksize, **read_csv_kwargs(fmt, cols)) as reader:
+        for df in reader:
+            yield _coerce_block(df, cols, fmt.decimal, how)
+
+
+def load_columns_chunked(source, delimiter='auto', current_col=0, potential_col=1, skiprows=None,
+                         chunksize=CHUNK_ROWS):
+    """Like `load_columns`, but parse `chunksize` rows at a time into a ColumnBuffer."""
+    fmt = sniff_format(source, delimiter)
+    if skiprows:
+        fmt.skiprows = max(fmt.skiprows, int(skiprows))
+    cols = _select_columns(fmt.n_columns, current_col, potential_col)
+    buf = ColumnBuffer(2, capacity=min(chunksize, 1 << 20))
+    for block in iter_blocks(source, fmt, cols, chunksize):
+        buf.append(block)
+    return buf.array()
+
+
+def parse_columns(source, delimiter='auto', chunksize=CHUNK_ROWS, max_columns=8):
+    """Parse every numeric column (up to `max_columns`) of `source` into ParsedColumns.
+
+    Used when the (current, potential) pair is chosen later, e.g. for the
+    binary dataset store, which serves any column choice from one parse.
+    """
+    fmt = sniff_format(source, delimiter)
+    cols = list(range(min(max(fmt.n_columns, 2), max_columns)))
+    buf = ColumnBuffer(len(cols), capacity=min(chunksize, 1 << 20))
+    for block in iter_blocks(source, fmt, cols, chunksize, how='all'):
+        buf.append(block)
+    return ParsedColumns(buf.array(), fmt, cols)
+
+
+class ParsedColumns:
+    """Numeric columns of one file kept by the streaming parser.
+
+    `data` holds the file columns listed in `columns` (0-based); `select`
+    picks the (current, potential) pair later, once the form is known.
+    """
+
+    def __init__(self, data, fmt, columns):
+        self.data = data
+        self.fmt = fmt
+        self.columns = list(columns)
+
+    @classmethod
+    def from_arrays(cls, *arrays):
+        """Wrap in-memory 1-D arrays as the columns of a parsed file (no copy beyond the stack)."""
+        cols = [np.asarray(a, dtype=float).ravel() for a in arrays]
+        if len({c.shape[0] for c in cols}) > 1:
+            raise ValueError('Arrays must have the same length: ' + ', '.join(str(c.shape[0]) for c in cols))
+        return cls(np.column_stack(cols), ParseFormat(None, 0, '.', len(cols), None), range(len(cols)))
+
+    @property
+    def complete(self):
+        """True when every column of the file was kept (any pair can be selected)."""
+        return self.columns == list(range(len(self.columns))) and len(self.columns) >= self.fmt.n_columns
+
+    def select(self, current_col=0, potential_col=1):
+        cols = _select_columns(self.fmt.n_columns, current_col, potential_col)
+        missing = [c for c in cols if c not in self.columns]
+        if missing:
+            raise ValueError(f'Column(s) {missing} were not kept while streaming the upload')
+        i, j = (self.columns.index(c) for c in cols)
+        # a strided slice picks the pair as a view, so memory-mapped data is not copied
+        step = j - i
+        if step == 0:
+            data = self.data[:, [i, j]]
         else:
-            sep = delimiter
-    elif delimiter == 'auto' or delimiter == 'auto-detect' or delimiter is None:
-        sep = detect_separator(path) or None
+            stop = j + (1 if step > 0 else -1)
+            data = self.data[:, i:(stop if stop >= 0 else None):step]
+        # with every column kept, only all-NaN rows were dropped; finish on the chosen pair
+        bad = np.isnan(data).any(axis=1)
+        return data[~bad] if bad.any() else data
+
+
+class ChunkPipe(io.RawIOBase):
+    """Blocking in-memory byte pipe between a producer thread and a file reader.
+
+    The producer calls `feed` (blocks when `max_chunks` are queued, which
+    throttles an upload to the parser's pace) and `finish`; the reader sees
+    a normal binary file that ends after `finish`. If the producer goes
+    away instead (`abort`, or nothing fed for `idle_timeout` seconds), the
+    reader gets an OSError rather than waiting forever.
+    """
+
+    def __init__(self, max_chunks=64, idle_timeout=300.0):
+        super().__init__()
+        self._queue = queue.Queue(max_chunks)
+        self._buf = b''
+        self._eof = False
+        self.idle_timeout = idle_timeout
+        self.reader_gone = threading.Event()
+        self.writer_gone = threading.Event()
+
+    def readable(self):
+        return True
+
+    def feed(self, data):
+        if not data:
+            return
+        data = bytes(data)
+        while not self.reader_gone.is_set():
+            try:
+                self._queue.put(data, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def finish(self):
+        while not self.reader_gone.is_set():
+            try:
+                self._queue.put(None, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def abort(self):
+        """Producer side: no more data will come; the reader stops and the queue is dropped."""
+        self.writer_gone.set()
+        self.reader_gone.set()
+
+    def unread(self, data):
+        self._buf = bytes(data) + self._buf
+
+    def readinto(self, b):
+        idle = 0.0
+        while not self._buf and not self._eof:
+            if self.writer_gone.is_set():
+                self._drop()
+                raise OSError('upload aborted before the end of the data')
+            try:
+                item = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                idle += 0.5
+                if self.idle_timeout and idle >= self.idle_timeout:
+                    self.writer_gone.set()
+                continue
+            idle = 0.0
+            if item is None:
+                self._eof = True
+            else:
+                self._buf = item
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+    def _drop(self):
+        # free the queued chunks of an aborted upload
+        self._buf = b''
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                return
 
-    df = pd.read_csv(path, sep=sep, engine='python', comment='#', header=None, skiprows=skiprows)
 
-    # Convert to numeric and pick columns
+class StreamingColumnParser:
+    """Parse a file from bytes fed while it is still arriving.
+
+    `columns` is the 0-based (current, potential) pair to keep; when the
+    caller does not know it yet, every column (up to `max_columns`) is kept
+    and chosen later with `ParsedColumns.select`. `close()` waits for the
+    parser and returns the ParsedColumns (or raises its error). `abort()`
+    stops it when the upload will not complete; a feed that stalls for
+    `idle_timeout` seconds aborts it as well.
+    """
+
+    def __init__(self, delimiter='auto', columns=None, chunksize=CHUNK_ROWS, max_columns=8, idle_timeout=300.0):
+        self.delimiter = delimiter
+        self.columns = columns
+        self.chunksize = chunksize
+        self.max_columns = max_columns
+        self.pipe = ChunkPipe(idle_timeout=idle_timeout)
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='theher-parse', daemon=True)
+        self._thread.start()
+
+    def feed(self, data):
+        self.pipe.feed(data)
+
+    def close(self):
+        self.pipe.finish()
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def abort(self):
+        self.pipe.abort()
+
+    def join(self, timeout=None):
+        """Wait up to `timeout` seconds for the parser thread; True once it has exited."""
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _read_head(self):
+        chunks, size = [], 0
+        while size < SNIFF_BYTES:
+            data = self.pipe.read(SNIFF_BYTES - size)
+            if not data:
+                break
+            chunks.append(data)
+            size += len(data)
+        return b''.join(chunks)
+
+    def _run(self):
+        try:
+            head = self._read_head()
+            fmt = sniff_format(head, self.delimiter)
+            self.pipe.unread(head)
+            if self.columns is not None:
+                cols, how = _select_columns(fmt.n_columns, *self.columns), 'any'
+            else:
+                cols, how = list(range(min(max(fmt.n_columns, 2), self.max_columns))), 'all'
+            buf = ColumnBuffer(len(cols), capacity=65536)
+            for block in iter_blocks(io.BufferedReader(self.pipe, SNIFF_BYTES), fmt, cols, self.chunksize, how):
+                buf.append(block)
+            self._result = ParsedColumns(buf.array(), fmt, cols)
+        except Exception as e:
+            self._error = e
+        finally:
+            # unblock the producer if parsing stopped before the end of the data
+            self.pipe.reader_gone.set()
+
+
+def detect_separator(path, sample_lines=5):
+    """Return the sniffed delimiter of `path` (None if it cannot be determined)."""
+    try:
+        return sniff_format(path).sep
+    except Exception:
+        return None
+
+
+def parse_data_file(path, delimiter='auto', current_col=1, potential_col=2, skiprows=0):
+    """Parse an uploaded data file and return (potential, current) as numpy arrays.
+
+    Columns are 1-based by default (UI-friendly). Returns (potential, current).
+    """
     try:
         c_idx = int(current_col) - 1
     except Exception:
@@ -49,20 +511,7 @@ def parse_data_file(path, delimiter='auto', current_col=1, potential_col=2, skip
         p_idx = int(potential_col) - 1
     except Exception:
         p_idx = 1
-
-    if df.shape[1] > max(c_idx, p_idx):
-        sel = df.iloc[:, [c_idx, p_idx]]
-    elif df.shape[1] >= 2:
-        sel = df.iloc[:, :2]
-    else:
-        raise ValueError('File does not contain enough columns')
-
-    sel = sel.apply(pd.to_numeric, errors='coerce')
-    sel = sel.dropna(how='any')
-    arr = sel.values
+    arr = load_columns(path, delimiter, c_idx, p_idx, skiprows=skiprows)
     if arr.shape[0] < 1:
         raise ValueError('No numeric rows found')
-
-    current = np.asarray(arr[:, 0], dtype=float)
-    potential = np.asarray(arr[:, 1], dtype=float)
-    return potential, current
+    return arr[:, 1].copy(), arr[:, 0].copy()
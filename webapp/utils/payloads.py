@@ -0,0 +1,107 @@
+"""Compact array encodings for plot data responses.
+
+The browser draws the curves itself, so plot endpoints can answer with
+the numbers only. Three encodings are offered for a dict of 1-D arrays:
+
+- `list`: plain JSON lists (non-finite values as null), the old format;
+- `base64`: each array as {"dtype", "shape", "data"} where `data` is the
+  base64 of the little-endian buffer; decodes with
+  `new Float64Array(Uint8Array.from(atob(data), c => c.charCodeAt(0)).buffer)`;
+- `binary`: one typed-array container (`pack_arrays`): the magic
+  b'THER', a little-endian uint32 header length `h`, a UTF-8 JSON header
+  {"dtype", "fields": {name: {"offset", "length"}}, "meta": {...}} padded
+  to a multiple of 8 bytes, then the arrays. Offsets count from the end of
+  the header (byte 8 + h) and are 8-byte aligned, so
+  `new Float32Array(buf, 8 + h + offset, length)` views an array without
+  a copy.
+
+`float32` halves the payload again and is plenty for a screen; exports
+should keep `float64`. NaN and inf survive both binary encodings.
+"""
+import json
+import base64
+import struct
+import numpy as np
+
+ENCODINGS = ('list', 'base64', 'binary')
+DTYPES = ('float64', 'float32')
+MAGIC = b'THER'
+BINARY_CONTENT_TYPE = 'application/x-theher-arrays'
+
+
+def _finite_list(a):
+    # JSON has no NaN/inf; send null so browsers can parse the response
+    return [v if np.isfinite(v) else None for v in np.asarray(a, dtype=float).tolist()]
+
+
+def _le(a, dtype):
+    return np.ascontiguousarray(a, dtype=np.dtype(dtype).newbyteorder('<'))
+
+
+def encode_base64(a, dtype='float64'):
+    a = _le(a, dtype)
+    return {'dtype': dtype, 'shape': list(a.shape), 'data': base64.b64encode(a.tobytes()).decode('ascii')}
+
+
+def decode_base64(obj):
+    return np.frombuffer(base64.b64decode(obj['data']), dtype=np.dtype(obj['dtype']).newbyteorder('<')).reshape(obj['shape'])
+
+
+def _pad(n, align=8):
+    return (-n) % align
+
+
+def pack_arrays(arrays, dtype='float64', meta=None):
+    """Return the `binary` container for {name: 1-D array} (None values are skipped)."""
+    arrays = {k: _le(v, dtype).ravel() for k, v in arrays.items() if v is not None}
+    fields = {}
+    offset = 0
+    for name, a in arrays.items():
+        fields[name] = {'offset': offset, 'length': int(a.shape[0])}
+        offset += a.nbytes + _pad(a.nbytes)
+    header = json.dumps({'dtype': dtype, 'fields': fields, 'meta': meta or {}}, default=str).encode('utf-8')
+    # pad the header with spaces so the data block starts 8-byte aligned
+    header += b' ' * _pad(len(header))
+    parts = [MAGIC, struct.pack('<I', len(header)), header]
+    for a in arrays.values():
+        parts.append(a.tobytes())
+        parts.append(b'\0' * _pad(a.nbytes))
+    return b''.join(parts)
+
+
+def unpack_arrays(blob):
+    """Inverse of `pack_arrays`: return ({name: array}, meta)."""
+    if blob[:4] != MAGIC:
+        raise ValueError('Not a TheHER array container')
+    (size,) = struct.unpack('<I', blob[4:8])
+    header = json.loads(blob[8:8 + size].decode('utf-8'))
+    dt = np.dtype(header['dtype']).newbyteorder('<')
+    start = 8 + size
+    arrays = {name: np.frombuffer(blob, dtype=dt, count=f['length'], offset=start + f['offset'])
+              for name, f in header['fields'].items()}
+    return arrays, header.get('meta') or {}
+
+
+def encode_arrays(arrays, encoding='list', dtype='float64'):
+    """Encode {name: array or None} for a JSON body (`list` or `base64`)."""
+    if encoding == 'base64':
+        return {k: encode_base64(v, dtype) if v is not None else None for k, v in arrays.items()}
+    return {k: _finite_list(v) if v is not None else None for k, v in arrays.items()}
+
+
+def data_format(form, accept=''):
+    """Return (encoding, dtype) from the `encoding`/`dtype` fields, or the Accept header.
+
+    Unknown values raise ValueError; the default is `list` / `float64`.
+    """
+    get = form.get if hasattr(form, 'get') else (lambda k, d=None: d)
+    encoding = (get('encoding') or '').lower()
+    if not encoding:
+        encoding = 'binary' if BINARY_CONTENT_TYPE in (accept or '') or 'application/octet-stream' in (accept or '') else 'list'
+    dtype = (get('dtype') or 'float64').lower()
+    dtype = {'f32': 'float32', 'f64': 'float64'}.get(dtype, dtype)
+    if encoding not in ENCODINGS:
+        raise ValueError(f'Unknown encoding {encoding!r}; expected one of {ENCODINGS}')
+    if dtype not in DTYPES:
+        raise ValueError(f'Unknown dtype {dtype!r}; expected one of {DTYPES}')
+    return encoding, dtype
@@ -0,0 +1,130 @@
+"""Split multi-sweep exports into single-direction segments.
+
+Potentiostat exports often hold several sweeps or CV cycles in one file.
+Two kinds of boundaries are recognised:
+
+- separators in the text: blank lines, comment lines and repeated header
+  or label lines between numeric blocks (`load_blocks`; `parse_blocks`
+  keeps the block numbers as a third column, so one parse can be stored
+  in the dataset store and split again later);
+- reversals of the potential sweep direction inside a block
+  (`split_reversals`). A reversal only counts once the potential has moved
+  back by more than `tol` from the last extreme, so noise on a slow sweep
+  does not cut it into pieces.
+
+`segments` combines both and labels each piece with its sweep direction:
+-1 (cathodic, potential decreasing) or +1 (anodic).
+"""
+import io
+import numpy as np
+import pandas as pd
+
+from .parsers import CHUNK_ROWS, ColumnBuffer, ParsedColumns, sniff_format, read_csv_kwargs, _select_columns
+
+CATHODIC, ANODIC = -1, 1
+
+
+def parse_blocks(source, delimiter='auto', current_col=0, potential_col=1, chunksize=CHUNK_ROWS):
+    """Parse `source` into ParsedColumns of (n, 3) [current, potential, block] rows.
+
+    Any blank, comment or non-numeric line between data rows starts a new
+    block; `block` numbers them. `columns` names the two file columns kept.
+    Columns are 0-based, as in `load_columns`. The text is read `chunksize`
+    rows at a time into a ColumnBuffer, so only one chunk is held as strings.
+    """
+    fmt = sniff_format(source, delimiter)
+    cols = _select_columns(fmt.n_columns, current_col, potential_col)
+    kws = read_csv_kwargs(fmt, cols)
+    kws['skip_blank_lines'] = False
+    # comment lines must reach the parser: as non-numeric rows they separate blocks
+    kws['comment'] = None
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    buf = ColumnBuffer(3, capacity=min(chunksize, 1 << 20))
+    separators = 0
+    with pd.read_csv(source, dtype=str, chunksize=chunksize, **kws) as reader:
+        for df in reader:
+            arr = np.empty((len(df), 2))
+            for i, c in enumerate(cols):
+                # a trailing '# ...' comment after the values is not part of the number
+                text = df[c].astype(str).str.split('#', n=1).str[0].str.strip()
+                if fmt.decimal == ',':
+                    text = text.str.replace(',', '.', regex=False)
+                arr[:, i] = pd.to_numeric(text, errors='coerce').to_numpy(dtype=np.float64)
+            bad = np.isnan(arr).any(axis=1)
+            # every separator row starts a new block id, counted across chunks
+            block = separators + np.cumsum(bad)
+            separators = int(block[-1]) if block.shape[0] else separators
+            buf.append(np.column_stack([arr[~bad], block[~bad]]))
+    return ParsedColumns(buf.array(), fmt, cols)
+
+
+def split_blocks(parsed):
+    """Return the blocks of `parse_blocks` output as (n, 2) [current, potential] arrays of at least two rows."""
+    data = parsed.data
+    cuts = np.flatnonzero(np.diff(data[:, 2])) + 1
+    return [b[:, :2] for b in np.split(data, cuts) if b.shape[0] >= 2]
+
+
+def load_blocks(source, delimiter='auto', current_col=0, potential_col=1):
+    """Return the numeric blocks of `source` as a list of (n, 2) [current, potential] arrays.
+
+    Any blank, comment or non-numeric line between data rows ends a block.
+    Columns are 0-based, as in `load_columns`.
+    """
+    return split_blocks(parse_blocks(source, delimiter, current_col, potential_col))
+
+
+def split_reversals(potential, tol=None):
+    """Return [(start, stop, direction)] monotonic runs of `potential`.
+
+    `tol` (V) is the hysteresis: the sweep is taken to reverse once the
+    potential has come back more than `tol` from the running extreme. The
+    default is 1% of the potential span. The turning point is shared by
+    the two runs it separates.
+    """
+    x = np.asarray(potential, dtype=float)
+    n = x.shape[0]
+    if n < 2:
+        return [(0, n, 0)]
+    if tol is None:
+        tol = 0.01 * float(np.nanmax(x) - np.nanmin(x))
+    runs = []
+    start = 0
+    direction = 0
+    ext, ext_i = x[0], 0
+    for i in range(1, n):
+        v = x[i]
+        if direction == 0:
+            # direction of the first run: the first move larger than tol
+            if abs(v - x[start]) > tol:
+                direction = 1 if v > x[start] else -1
+                ext, ext_i = v, i
+            continue
+        if (v - ext) * direction >= 0:
+            ext, ext_i = v, i
+        elif (ext - v) * direction > tol:
+            runs.append((start, ext_i + 1, direction))
+            start, direction = ext_i, -direction
+            ext, ext_i = v, i
+    runs.append((start, n, direction))
+    return runs
+
+
+def segments(blocks, branch='cathodic', min_points=5, tol=None):
+    """Split `blocks` (from `load_blocks`) at sweep reversals.
+
+    Returns a list of dicts with `block`, `start`/`stop` (row indices in the
+    block), `direction` and the `data` slice ([current, potential] rows).
+    `branch` keeps 'cathodic', 'anodic' or 'all' runs; runs shorter than
+    `min_points` are dropped.
+    """
+    wanted = {'cathodic': (CATHODIC,), 'anodic': (ANODIC,)}.get(branch, (CATHODIC, ANODIC, 0))
+    out = []
+    for b, data in enumerate(blocks):
+        for start, stop, direction in split_reversals(data[:, 1], tol):
+            if stop - start < min_points or direction not in wanted:
+                continue
+            out.append({'block': b, 'start': start, 'stop': stop, 'direction': direction,
+                        'data': data[start:stop]})
+    return out